@@ -0,0 +1,70 @@
+"""Add indexes for hot queries
+
+Revision ID: 3c1d2e4f5a6b
+Revises: f6a76cb7fef6
+Create Date: 2025-03-01 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = '3c1d2e4f5a6b'
+down_revision = 'f6a76cb7fef6'
+branch_labels = None
+depends_on = None
+
+
+# (имя, таблица, колонки, условие частичного индекса)
+INDEXES = [
+    ('ix_appeal_user_id_dt_id', 'appeal', ['user_id', 'dt', 'id'], None),
+    ('ix_appeal_responsible_user_id_dt_id', 'appeal', ['responsible_user_id', 'dt', 'id'], None),
+    ('ix_appeal_dt_id', 'appeal', ['dt', 'id'], None),
+    ('ix_appeal_status_id', 'appeal', ['status_id'], None),
+    ('ix_appeal_region_id', 'appeal', ['region_id'], None),
+    ('ix_appeal_open_responsible_user_id_dt', 'appeal', ['responsible_user_id', 'dt'], 'actual_date IS NULL'),
+    ('ix_comment_appeal_id_created_at_id', 'comment', ['appeal_id', 'created_at', 'id'], None),
+    ('ix_task_appeal_id', 'task', ['appeal_id'], None),
+    ('ix_task_user_id', 'task', ['user_id'], None),
+    ('ix_representative_user_id_organization_id', 'representative', ['user_id', 'organization_id'], None),
+    ('ix_representative_organization_id', 'representative', ['organization_id'], None),
+    ('ix_specialist_user_id', 'specialist', ['user_id'], None),
+    ('ix_appealstopinterval_appeal_id_start_dt', 'appealstopinterval', ['appeal_id', 'start_dt', 'end_dt'], None),
+    ('ix_appealstatus_name', 'appealstatus', ['name'], None),
+    ('ix_appealfile_appeal_id', 'appealfile', ['appeal_id'], None),
+    ('ix_commentfile_comment_id', 'commentfile', ['comment_id'], None),
+]
+
+
+def upgrade():
+    # Колонки интервалов остановки не совпадали с моделью
+    op.alter_column('appealstopinterval', 'start_date', new_column_name='start_dt')
+    op.alter_column('appealstopinterval', 'end_date', new_column_name='end_dt')
+    op.add_column('appealstopinterval', sa.Column('description', sqlmodel.sql.sqltypes.AutoString(), nullable=True))
+    op.add_column('appealstatus', sa.Column('name_rus', sqlmodel.sql.sqltypes.AutoString(), nullable=True))
+
+    # CONCURRENTLY не блокирует запись в таблицы, но не работает в транзакции
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                unique=False,
+                postgresql_concurrently=True,
+                postgresql_where=sa.text(where) if where else None,
+                if_not_exists=True,
+            )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+
+    op.drop_column('appealstatus', 'name_rus')
+    op.drop_column('appealstopinterval', 'description')
+    op.alter_column('appealstopinterval', 'end_dt', new_column_name='end_date')
+    op.alter_column('appealstopinterval', 'start_dt', new_column_name='start_date')
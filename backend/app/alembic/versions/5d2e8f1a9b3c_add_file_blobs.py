@@ -0,0 +1,58 @@
+"""Add content-addressed file blobs
+
+Revision ID: 5d2e8f1a9b3c
+Revises: 3c1d2e4f5a6b
+Create Date: 2025-03-10 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = '5d2e8f1a9b3c'
+down_revision = '3c1d2e4f5a6b'
+branch_labels = None
+depends_on = None
+
+
+FILE_TABLES = ['appealfile', 'commentfile']
+
+
+def upgrade():
+    op.create_table(
+        'fileblob',
+        sa.Column('sha256', sqlmodel.sql.sqltypes.AutoString(length=64), nullable=False),
+        sa.Column('size', sa.Integer(), nullable=False),
+        sa.Column('ref_count', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('sha256'),
+    )
+    # Уже загруженные файлы остаются по своим путям, blob_sha256 у них пуст
+    for table in FILE_TABLES:
+        op.add_column(table, sa.Column('blob_sha256', sqlmodel.sql.sqltypes.AutoString(length=64), nullable=True))
+        op.create_foreign_key(f'{table}_blob_sha256_fkey', table, 'fileblob', ['blob_sha256'], ['sha256'])
+
+    # Индексы нужны для проверки внешних ключей при удалении блобов
+    with op.get_context().autocommit_block():
+        for table in FILE_TABLES:
+            op.create_index(
+                f'ix_{table}_blob_sha256',
+                table,
+                ['blob_sha256'],
+                unique=False,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for table in reversed(FILE_TABLES):
+            op.drop_index(f'ix_{table}_blob_sha256', table_name=table, postgresql_concurrently=True, if_exists=True)
+
+    for table in reversed(FILE_TABLES):
+        op.drop_constraint(f'{table}_blob_sha256_fkey', table, type_='foreignkey')
+        op.drop_column(table, 'blob_sha256')
+    op.drop_table('fileblob')
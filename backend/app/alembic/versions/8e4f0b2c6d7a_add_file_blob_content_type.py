@@ -0,0 +1,33 @@
+"""Add content type to file blobs
+
+Revision ID: 8e4f0b2c6d7a
+Revises: 5d2e8f1a9b3c
+Create Date: 2025-03-14 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = '8e4f0b2c6d7a'
+down_revision = '5d2e8f1a9b3c'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        'fileblob',
+        sa.Column(
+            'content_type',
+            sqlmodel.sql.sqltypes.AutoString(length=255),
+            nullable=False,
+            server_default='application/octet-stream',
+        ),
+    )
+
+
+def downgrade():
+    op.drop_column('fileblob', 'content_type')
@@ -0,0 +1,46 @@
+"""Add notification outbox
+
+Revision ID: b4d7e1f9a2c6
+Revises: 8e4f0b2c6d7a
+Create Date: 2025-03-20 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'b4d7e1f9a2c6'
+down_revision = '8e4f0b2c6d7a'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'notificationoutbox',
+        sa.Column('id', sa.Uuid(), nullable=False),
+        sa.Column('kind', sqlmodel.sql.sqltypes.AutoString(length=64), nullable=False),
+        sa.Column('payload', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column('status', sqlmodel.sql.sqltypes.AutoString(length=16), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('available_at', sa.DateTime(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('last_error', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    # Таблица новая и пустая, CONCURRENTLY не нужен
+    op.create_index(
+        'ix_notificationoutbox_pending_available_at',
+        'notificationoutbox',
+        ['available_at'],
+        unique=False,
+        postgresql_where=sa.text("status = 'pending'"),
+    )
+
+
+def downgrade():
+    op.drop_index('ix_notificationoutbox_pending_available_at', table_name='notificationoutbox')
+    op.drop_table('notificationoutbox')
@@ -0,0 +1,51 @@
+"""Add appeal SLA columns
+
+Revision ID: c7e2a9d4f1b8
+Revises: b4d7e1f9a2c6
+Create Date: 2025-03-27 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7e2a9d4f1b8'
+down_revision = 'b4d7e1f9a2c6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Сроки существующих обращений заполняет app/initial_data.py
+    op.add_column('appeal', sa.Column('sla_hours', sa.Integer(), nullable=True))
+    op.add_column('appeal', sa.Column('sla_paused_seconds', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('appeal', sa.Column('sla_paused_since', sa.DateTime(), nullable=True))
+    op.add_column('appeal', sa.Column('sla_deadline', sa.DateTime(), nullable=True))
+
+    # CONCURRENTLY не блокирует запись в таблицу, но не работает в транзакции
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_appeal_open_sla_deadline',
+            'appeal',
+            ['sla_deadline'],
+            unique=False,
+            postgresql_concurrently=True,
+            postgresql_where=sa.text('actual_date IS NULL AND sla_deadline IS NOT NULL'),
+            if_not_exists=True,
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_appeal_open_sla_deadline',
+            table_name='appeal',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+    op.drop_column('appeal', 'sla_deadline')
+    op.drop_column('appeal', 'sla_paused_since')
+    op.drop_column('appeal', 'sla_paused_seconds')
+    op.drop_column('appeal', 'sla_hours')
@@ -0,0 +1,45 @@
+"""Add stop interval period index
+
+Revision ID: d3f8b6a1c5e9
+Revises: c7e2a9d4f1b8
+Create Date: 2025-04-02 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = 'd3f8b6a1c5e9'
+down_revision = 'c7e2a9d4f1b8'
+branch_labels = None
+depends_on = None
+
+
+# Должно совпадать с app.models.appeal_stop_interval.stop_period
+PERIOD = "tstzrange(timezone('UTC', start_dt), timezone('UTC', end_dt), '[)')"
+
+
+def upgrade():
+    # CONCURRENTLY не блокирует запись в таблицу, но не работает в транзакции
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_appealstopinterval_period',
+            'appealstopinterval',
+            [sa.text(PERIOD)],
+            unique=False,
+            postgresql_using='gist',
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_appealstopinterval_period',
+            table_name='appealstopinterval',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
@@ -0,0 +1,27 @@
+"""Add appeal SLA notified deadlines
+
+Revision ID: e5a1c8f2d7b4
+Revises: d3f8b6a1c5e9
+Create Date: 2025-04-07 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5a1c8f2d7b4'
+down_revision = 'd3f8b6a1c5e9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('appeal', sa.Column('sla_warned_deadline', sa.DateTime(), nullable=True))
+    op.add_column('appeal', sa.Column('sla_breached_deadline', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('appeal', 'sla_breached_deadline')
+    op.drop_column('appeal', 'sla_warned_deadline')
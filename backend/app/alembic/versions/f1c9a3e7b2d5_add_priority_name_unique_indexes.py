@@ -0,0 +1,73 @@
+"""Add priority name unique indexes
+
+Revision ID: f1c9a3e7b2d5
+Revises: e5a1c8f2d7b4
+Create Date: 2025-04-10 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = 'f1c9a3e7b2d5'
+down_revision = 'e5a1c8f2d7b4'
+branch_labels = None
+depends_on = None
+
+
+# (имя, таблица, колонки); уникальность названий раньше проверялась только
+# приложением, дубликаты нужно устранить до миграции
+INDEXES = [
+    ('ix_standardpriority_name', 'standardpriority', ['name']),
+    ('ix_individualpriority_contract_id_name', 'individualpriority', ['contract_id', 'name']),
+]
+
+
+def _check_duplicates(table, columns):
+    keys = ', '.join(columns)
+    duplicates = op.get_bind().execute(
+        sa.text(f'SELECT {keys} FROM {table} GROUP BY {keys} HAVING count(*) > 1 LIMIT 10')
+    ).all()
+    if duplicates:
+        raise RuntimeError(
+            f'Duplicate {table} ({keys}) values must be resolved before the '
+            f'migration: {", ".join(str(tuple(row)) for row in duplicates)}'
+        )
+
+
+def upgrade():
+    # Проверка до начала построения: неудачный CREATE INDEX CONCURRENTLY
+    # оставляет после себя индекс в состоянии INVALID
+    for _, table, columns in INDEXES:
+        _check_duplicates(table, columns)
+    # CONCURRENTLY не блокирует запись в таблицы, но не работает в транзакции
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            # INVALID-индекс от прерванного запуска IF NOT EXISTS счел бы
+            # готовым, поэтому индекс с тем же именем строится заново
+            op.drop_index(
+                name,
+                table_name=table,
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
+            op.create_index(
+                name,
+                table,
+                columns,
+                unique=True,
+                postgresql_concurrently=True,
+            )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(
+                name,
+                table_name=table,
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
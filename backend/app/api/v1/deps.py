@@ -1,5 +1,6 @@
 from collections.abc import AsyncGenerator, Generator
 from typing import Annotated
+from uuid import UUID
 
 import jwt
 from fastapi import Depends, HTTPException, status
@@ -12,6 +13,9 @@ from sqlmodel.ext.asyncio.session import AsyncSession
 from app.core import security
 from app.core.config import settings
 from app.core.db import async_engine, engine
+from app.core.principal import Principal
+from app.cruds.loaders import loader_options
+from app.cruds.principal import get_principal, get_principal_async
 from app.models.auth import TokenPayload
 from app.models.user import User
 
@@ -40,7 +44,7 @@ def get_current_user(session: SessionDep, token: TokenDep) -> User:
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Could not validate credentials",
         )
-    user = session.get(User, token_data.sub)
+    user = session.get(User, token_data.sub, options=loader_options("auth_user"))
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     if not user.is_active:
@@ -51,7 +55,40 @@ def get_current_user(session: SessionDep, token: TokenDep) -> User:
 CurrentUser = Annotated[User, Depends(get_current_user)]
 
 
-def get_current_active_superuser(current_user: CurrentUser) -> User:
+def get_token_user_id(token: TokenDep) -> UUID:
+    try:
+        payload = jwt.decode(
+            token, settings.SECRET_KEY, algorithms=[security.ALGORITHM]
+        )
+        token_data = TokenPayload(**payload)
+        return UUID(token_data.sub)
+    except (InvalidTokenError, ValidationError, TypeError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Could not validate credentials",
+        )
+
+
+TokenUserIdDep = Annotated[UUID, Depends(get_token_user_id)]
+
+
+def get_current_principal(session: SessionDep, user_id: TokenUserIdDep) -> Principal:
+    """
+    Текущий пользователь без ORM-графа: для маршрутов, которым нужны только
+    идентификатор, флаги и организации. При попадании в кэш запросов к БД нет.
+    """
+    principal = get_principal(session=session, user_id=user_id)
+    if not principal:
+        raise HTTPException(status_code=404, detail="User not found")
+    if not principal.is_active:
+        raise HTTPException(status_code=400, detail="Inactive user")
+    return principal
+
+
+CurrentPrincipal = Annotated[Principal, Depends(get_current_principal)]
+
+
+def get_current_active_superuser(current_user: CurrentPrincipal) -> Principal:
     if not current_user.is_superuser:
         raise HTTPException(
             status_code=403, detail="The user doesn't have enough privileges"
@@ -78,7 +115,7 @@ async def get_current_user_async(session: AsyncSessionDep, token: TokenDep) -> U
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Could not validate credentials",
         )
-    user = await session.get(User, token_data.sub)
+    user = await session.get(User, token_data.sub, options=loader_options("auth_user"))
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     if not user.is_active:
@@ -87,3 +124,18 @@ async def get_current_user_async(session: AsyncSessionDep, token: TokenDep) -> U
 
 
 CurrentUserAsync = Annotated[User, Depends(get_current_user_async)]
+
+
+async def get_current_principal_async(
+    session: AsyncSessionDep, user_id: TokenUserIdDep
+) -> Principal:
+    """Асинхронная версия get_current_principal"""
+    principal = await get_principal_async(session=session, user_id=user_id)
+    if not principal:
+        raise HTTPException(status_code=404, detail="User not found")
+    if not principal.is_active:
+        raise HTTPException(status_code=400, detail="Inactive user")
+    return principal
+
+
+CurrentPrincipalAsync = Annotated[Principal, Depends(get_current_principal_async)]
@@ -1,76 +1,127 @@
-from datetime import UTC, datetime
-from pathlib import Path
-from typing import Any
+from datetime import UTC, datetime, timedelta
+from typing import Annotated, Any
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
+from fastapi import APIRouter, Depends, File, HTTPException, Request, UploadFile
+from fastapi.responses import StreamingResponse
 from sqlmodel import select
 
-from app.api.v1.deps import AsyncSessionDep, CurrentUserAsync
-from app.core.config import settings
-from app.core.files import get_file_response, save_upload_file
+from app.api.v1.deps import (
+    AsyncSessionDep,
+    CurrentPrincipalAsync,
+    CurrentUserAsync,
+    get_current_active_superuser,
+)
+from app.core.archive import iter_zip
+from app.core.pagination import CursorParams, PaginatedResponse, PaginationParams
+from app.core.storage import content_disposition
+from app.cruds.access import check_appeal_access_async
 from app.cruds.appeal import (
     create_appeal_async,
     delete_appeal_async,
     get_appeal_async,
-    get_appeals_async,
+    get_appeals_page_async,
+    get_appeals_paginated_async,
     update_appeal_async,
+    update_appeals_status_async,
+)
+from app.cruds.file_blob import (
+    file_response_async,
+    get_appeal_archive_entries_async,
+    purge_released_files_async,
+    release_files_async,
+    save_upload_files_async,
+)
+from app.cruds.notification_outbox import enqueue_appeal_notifications
+from app.cruds.sla import get_breaching_appeals_async, refresh_appeals_sla_async
+from app.models.appeal import (
+    Appeal,
+    AppealBase,
+    AppealBulkStatusResult,
+    AppealBulkStatusUpdate,
+    AppealUpdate,
 )
-from app.models.appeal import Appeal, AppealBase
 from app.models.appeal_file import AppealFile
 from app.models.appeal_status import AppealStatus
 from app.models.common import Message
-from app.utils.bot import send_appeal_updated_message, send_new_appeal_message
-from app.utils.email import (
-    send_new_appeal_email,
-    send_new_status_appeal_email,
-    send_new_status_email,
-)
+from app.models.file_blob import FileVariant
 
 router = APIRouter(prefix="/appeals", tags=["appeals"])
 
 
-@router.get("/", response_model=list[Appeal])
+@router.get("/", response_model=PaginatedResponse[Appeal])
 async def read_appeals(
     *,
     session: AsyncSessionDep,
-    current_user: CurrentUserAsync,
-    skip: int = 0,
-    limit: int = 100,
+    current_user: CurrentPrincipalAsync,
+    params: Annotated[CursorParams, Depends()],
 ) -> Any:
     """
-    Получить список обращений.
+    Получить список обращений, новые первыми.
 
     - Обычные пользователи видят только свои обращения
     - Представители организаций видят обращения своей организации
     - Суперпользователи видят все обращения
+
+    Следующая и предыдущая страницы запрашиваются по next_cursor/prev_cursor.
+    """
+    return await get_appeals_paginated_async(
+        session=session, principal=current_user, params=params
+    )
+
+
+@router.get("/pages", response_model=PaginatedResponse[Appeal])
+async def read_appeals_page(
+    *,
+    session: AsyncSessionDep,
+    current_user: CurrentPrincipalAsync,
+    params: Annotated[PaginationParams, Depends()],
+) -> Any:
+    """
+    Получить страницу обращений по номеру, новые первыми.
+
+    Доступ к обращениям тот же, что и у списка по курсору. Общее количество
+    считается способом из параметра count: estimated (по умолчанию) -
+    оценка планировщика, exact - точный подсчет, cached - точный подсчет,
+    закэшированный на короткое время, none - без total.
+    """
+    return await get_appeals_page_async(
+        session=session, principal=current_user, params=params
+    )
+
+
+@router.get(
+    "/sla/breaching",
+    response_model=list[Appeal],
+    dependencies=[Depends(get_current_active_superuser)],
+)
+async def read_breaching_appeals(
+    *,
+    session: AsyncSessionDep,
+    within_minutes: int = 0,
+    limit: int = 100,
+) -> Any:
+    """
+    Открытые обращения, срок решения которых истек или истечет в ближайшие
+    within_minutes минут, ближайшие к нарушению первыми.
+    Только для суперпользователей.
     """
-    appeals = await get_appeals_async(
-        session=session, user=current_user, skip=skip, limit=limit
+    return await get_breaching_appeals_async(
+        session=session, within=timedelta(minutes=within_minutes), limit=limit
     )
-    return appeals
 
 
 @router.get("/{appeal_id}", response_model=Appeal)
 async def get_appeal(
     appeal_id: UUID,
     session: AsyncSessionDep,
-    current_user: CurrentUserAsync,
+    current_user: CurrentPrincipalAsync,
 ) -> Any:
     """Получить обращение по ID"""
-    appeal = await get_appeal_async(session=session, appeal_id=appeal_id)
-    if not appeal:
-        raise HTTPException(status_code=404, detail="Appeal not found")
-
-    # Проверка прав доступа
-    if not current_user.is_superuser:
-        if hasattr(current_user, "representative"):
-            if appeal.organization_id != current_user.representative.organization_id:
-                raise HTTPException(status_code=403, detail="Not enough permissions")
-        elif appeal.user_id != current_user.id:
-            raise HTTPException(status_code=403, detail="Not enough permissions")
-
-    return appeal
+    await check_appeal_access_async(
+        session=session, principal=current_user, appeal_id=appeal_id
+    )
+    return await get_appeal_async(session=session, appeal_id=appeal_id)
 
 
 @router.post("/", response_model=Appeal)
@@ -84,102 +135,115 @@ async def create_new_appeal(
     """
     Создать новое обращение.
     """
-    appeal = await create_appeal_async(
+    # Уведомления отправит диспетчер outbox, запрос их не ждет
+    return await create_appeal_async(
         session=session,
         user=current_user,
         appeal=appeal_in,
         files=files,
     )
 
-    try:
-        await send_new_appeal_email(appeal=appeal)
-    except Exception as e:
-        print(f"Error sending email: {e}")
-
-    try:
-        await send_new_appeal_message(appeal=appeal)
-    except Exception as e:
-        # Логируем ошибку, но не прерываем выполнение
-        print(f"Error sending message: {e}")
-
-    return appeal
-
 
 @router.patch("/{appeal_id}", response_model=Appeal)
 async def update_appeal(
     *,
     session: AsyncSessionDep,
-    current_user: CurrentUserAsync,
+    current_user: CurrentPrincipalAsync,
     appeal_id: UUID,
-    status_id: UUID | None = None,
-    responsible_user_id: UUID | None = None,
-    solving: str | None = None,
+    appeal_in: AppealUpdate,
 ) -> Any:
     """Обновить обращение"""
+    await check_appeal_access_async(
+        session=session, principal=current_user, appeal_id=appeal_id
+    )
     appeal = await get_appeal_async(session=session, appeal_id=appeal_id)
-    if not appeal:
-        raise HTTPException(status_code=404, detail="Appeal not found")
 
-    # Проверка прав на обновление
-    if not current_user.is_superuser:
-        if hasattr(current_user, "representative"):
-            if appeal.organization_id != current_user.representative.organization_id:
-                raise HTTPException(status_code=403, detail="Not enough permissions")
-        elif appeal.user_id != current_user.id:
-            raise HTTPException(status_code=403, detail="Not enough permissions")
-
-    old_status = appeal.status_id
-    updated_appeal = await update_appeal_async(
+    # Об изменении статуса уведомит диспетчер outbox
+    return await update_appeal_async(
         session=session,
         db_appeal=appeal,
-        appeal_in=AppealBase(
-            status_id=status_id,
-            responsible_user_id=responsible_user_id,
-            solving=solving,
-        ),
+        appeal_in=appeal_in,
     )
 
-    if status_id and status_id != old_status:
-        await send_new_status_email(updated_appeal)
-        await send_appeal_updated_message(updated_appeal)
 
-    return updated_appeal
+@router.post(
+    "/bulk/status",
+    response_model=AppealBulkStatusResult,
+    dependencies=[Depends(get_current_active_superuser)],
+)
+async def update_appeals_status(
+    *,
+    session: AsyncSessionDep,
+    bulk_in: AppealBulkStatusUpdate,
+) -> Any:
+    """
+    Сменить статус многих обращений сразу.
+    Только для суперпользователей.
+
+    Каждый получатель получит одно письмо со всеми своими обращениями.
+    """
+    status = await session.get(AppealStatus, bulk_in.status_id)
+    if not status:
+        raise HTTPException(status_code=404, detail="Status not found")
+    return await update_appeals_status_async(
+        session=session, appeal_ids=bulk_in.appeal_ids, status=status
+    )
+
+
+@router.get("/{appeal_id}/files/archive")
+async def get_appeal_files_archive(
+    appeal_id: UUID,
+    session: AsyncSessionDep,
+    current_user: CurrentPrincipalAsync,
+) -> StreamingResponse:
+    """Скачать все файлы обращения и его комментариев одним ZIP-архивом
+
+    Архив собирается на лету, по мере отправки: без временных файлов и
+    без загрузки файлов в память целиком.
+    """
+    await check_appeal_access_async(
+        session=session, principal=current_user, appeal_id=appeal_id
+    )
+    entries = await get_appeal_archive_entries_async(
+        session=session, appeal_id=appeal_id
+    )
+
+    return StreamingResponse(
+        iter_zip(entries),
+        media_type="application/zip",
+        headers={"Content-Disposition": content_disposition(f"appeal_{appeal_id}.zip")},
+    )
 
 
 @router.get("/{appeal_id}/files/{file_id}")
 async def get_appeal_file(
     appeal_id: UUID,
     file_id: UUID,
+    request: Request,
     session: AsyncSessionDep,
-    current_user: CurrentUserAsync,
+    current_user: CurrentPrincipalAsync,
+    variant: FileVariant | None = None,
 ) -> Any:
-    """Получить файл обращения"""
-    # Проверяем существование обращения
-    appeal = await get_appeal_async(session=session, appeal_id=appeal_id)
-    if not appeal:
-        raise HTTPException(status_code=404, detail="Appeal not found")
-
-    # Проверяем права доступа
-    if not current_user.is_superuser:
-        if hasattr(current_user, "representative"):
-            if appeal.organization_id != current_user.representative.organization_id:
-                raise HTTPException(status_code=403, detail="Not enough permissions")
-        elif appeal.user_id != current_user.id:
-            raise HTTPException(status_code=403, detail="Not enough permissions")
+    """Получить файл обращения; variant=thumb - миниатюра изображения или PDF"""
+    await check_appeal_access_async(
+        session=session, principal=current_user, appeal_id=appeal_id
+    )
 
     # Получаем файл
     appeal_file = await session.get(AppealFile, file_id)
     if not appeal_file or appeal_file.appeal_id != appeal_id:
         raise HTTPException(status_code=404, detail="File not found")
 
-    return await get_file_response(file_path=appeal_file.file)
+    return await file_response_async(
+        session=session, request=request, file=appeal_file, variant=variant
+    )
 
 
 @router.post("/{appeal_id}/files")
 async def upload_appeal_files(
     *,
     session: AsyncSessionDep,
-    current_user: CurrentUserAsync,
+    current_user: CurrentPrincipalAsync,
     appeal_id: UUID,
     files: list[UploadFile] = File(...),  # noqa: UP006
 ) -> list[AppealFile]:
@@ -187,39 +251,22 @@ async def upload_appeal_files(
 
     - **files**: Один или несколько файлов для загрузки
     """
-    # Проверяем существование обращения
-    appeal = await get_appeal_async(session=session, appeal_id=appeal_id)
-    if not appeal:
-        raise HTTPException(status_code=404, detail="Appeal not found")
+    await check_appeal_access_async(
+        session=session, principal=current_user, appeal_id=appeal_id
+    )
 
-    # Проверяем права доступа
-    if not current_user.is_superuser:
-        if hasattr(current_user, "representative"):
-            if appeal.organization_id != current_user.representative.organization_id:
-                raise HTTPException(status_code=403, detail="Not enough permissions")
-        elif appeal.user_id != current_user.id:
-            raise HTTPException(status_code=403, detail="Not enough permissions")
+    # Размер проверяется при сохранении, по мере копирования файла
+    stored_files = await save_upload_files_async(
+        session=session, files=files, folder="appeal", entity_id=appeal_id
+    )
 
     appeal_files = []
-    for file in files:
-        # Проверяем размер файла
-        if file.size > settings.MAX_UPLOAD_SIZE:
-            raise HTTPException(
-                status_code=400,
-                detail=f"File {file.filename} is too large. Maximum size is {settings.MAX_UPLOAD_SIZE} bytes",
-            )
-
-        # Сохраняем файл
-        file_path = save_upload_file(
-            file=file,
-            folder="appeal",
-            entity_id=appeal_id,
-        )
-
+    for stored in stored_files:
         # Создаем запись в БД
         appeal_file = AppealFile(
             appeal_id=appeal_id,
-            file=file_path,
+            file=stored.path,
+            blob_sha256=stored.sha256,
         )
         session.add(appeal_file)
         appeal_files.append(appeal_file)
@@ -236,70 +283,46 @@ async def delete_appeal_file(
     appeal_id: UUID,
     file_id: UUID,
     session: AsyncSessionDep,
-    current_user: CurrentUserAsync,
+    current_user: CurrentPrincipalAsync,
 ) -> None:
     """Удалить файл обращения"""
-    # Проверяем существование обращения
-    appeal = await get_appeal_async(session=session, appeal_id=appeal_id)
-    if not appeal:
-        raise HTTPException(status_code=404, detail="Appeal not found")
-
-    # Проверяем права доступа
-    if not current_user.is_superuser:
-        if hasattr(current_user, "representative"):
-            if appeal.organization_id != current_user.representative.organization_id:
-                raise HTTPException(status_code=403, detail="Not enough permissions")
-        elif appeal.user_id != current_user.id:
-            raise HTTPException(status_code=403, detail="Not enough permissions")
+    await check_appeal_access_async(
+        session=session, principal=current_user, appeal_id=appeal_id
+    )
 
     # Получаем файл
     appeal_file = await session.get(AppealFile, file_id)
     if not appeal_file or appeal_file.appeal_id != appeal_id:
         raise HTTPException(status_code=404, detail="File not found")
 
-    # Удаляем физический файл
-    file_path = Path(settings.UPLOAD_DIR) / appeal_file.file
-    if file_path.exists():
-        file_path.unlink()
-
-    # Удаляем запись из БД
+    # Удаляем запись из БД и содержимое, если на него больше нет ссылок
     await session.delete(appeal_file)
+    released = await release_files_async(session=session, files=[appeal_file])
     await session.commit()
+    await purge_released_files_async(session=session, released=released)
 
 
 @router.delete("/{appeal_id}")
 async def delete_appeal(
     *,
     session: AsyncSessionDep,
-    current_user: CurrentUserAsync,
+    current_user: CurrentPrincipalAsync,
     appeal_id: UUID,
 ) -> Message:
     """
     Удалить обращение
 
-    Только суперпользователи или создатель обращения могут его удалить.
+    Удалить обращение может любой, кому оно доступно (app.cruds.access):
+    суперпользователь, автор, ответственный, представитель организации
+    и специалист, за которым закреплена организация.
     При удалении также удаляются все связанные файлы.
     """
-    # Проверяем существование обращения
-    appeal = await get_appeal_async(session=session, appeal_id=appeal_id)
-    if not appeal:
-        raise HTTPException(status_code=404, detail="Appeal not found")
+    await check_appeal_access_async(
+        session=session, principal=current_user, appeal_id=appeal_id
+    )
 
-    # Проверяем права доступа
-    if not current_user.is_superuser:
-        if hasattr(current_user, "representative"):
-            if appeal.organization_id != current_user.representative.organization_id:
-                raise HTTPException(status_code=403, detail="Not enough permissions")
-        elif appeal.user_id != current_user.id:
-            raise HTTPException(status_code=403, detail="Not enough permissions")
-
-    # Удаляем физические файлы
-    for appeal_file in appeal.files:
-        file_path = Path(settings.UPLOAD_DIR) / appeal_file.file
-        if file_path.exists():
-            file_path.unlink()
-
-    # Удаляем обращение (каскадно удалятся все связанные записи)
+    # Удаляем обращение вместе со связанными записями; содержимое файлов
+    # удаляется, только если на него не ссылаются другие записи
     await delete_appeal_async(session=session, appeal_id=appeal_id)
     return Message(message="Appeal deleted successfully")
 
@@ -308,7 +331,7 @@ async def delete_appeal(
 async def close_appeal(
     *,
     session: AsyncSessionDep,
-    current_user: CurrentUserAsync,
+    current_user: CurrentPrincipalAsync,
     appeal_id: UUID,
     solving: str,
 ) -> Any:
@@ -328,14 +351,14 @@ async def close_appeal(
         raise HTTPException(status_code=403, detail="Not enough permissions")
 
     # Получаем статус "Выполнено"
-    if appeal.user.representative.organization.custom_appeal_completion:
-        done_status = (
-            appeal.user.representative.organization.custom_appeal_completion_status
-        )
+    representative = appeal.user.representative
+    if representative and representative.organization.custom_appeal_completion:
+        done_status = representative.organization.custom_appeal_completion_status
     else:
-        done_status = await session.exec(
+        result = await session.exec(
             select(AppealStatus).where(AppealStatus.name == "Done")
-        ).first()
+        )
+        done_status = result.first()
 
     if not done_status:
         raise HTTPException(status_code=500, detail="Status 'Done' not found")
@@ -346,13 +369,8 @@ async def close_appeal(
     appeal.solving = solving
 
     session.add(appeal)
+    enqueue_appeal_notifications(session=session, event="closed", appeal=appeal)
+    await refresh_appeals_sla_async(session=session, appeal_ids=[appeal.id])
     await session.commit()
     await session.refresh(appeal)
-
-    # Отправка уведомлений можно добавить здесь
-    try:
-        await send_new_status_appeal_email(appeal=appeal)
-    except Exception as e:
-        print(f"Error sending email: {e}")
-
     return appeal
@@ -1,68 +1,50 @@
-from typing import Any
+from typing import Annotated, Any
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
+from fastapi import APIRouter, Depends, File, HTTPException, Request, UploadFile
 
-from app.api.v1.deps import AsyncSessionDep, CurrentUserAsync
-from app.core.files import get_file_response
-from app.cruds.appeal import get_appeal_async
+from app.api.v1.deps import AsyncSessionDep, CurrentPrincipalAsync
+from app.core.pagination import CursorParams, PaginatedResponse
+from app.cruds.access import check_appeal_access_async
 from app.cruds.comment import (
     create_comment_async,
-    get_appeal_comments_async,
+    get_appeal_comments_paginated_async,
     get_comment_async,
     get_comment_file_async,
 )
+from app.cruds.file_blob import file_response_async
 from app.models.comment import Comment, CommentBase
+from app.models.file_blob import FileVariant
 
 router = APIRouter(prefix="/comments", tags=["comments"])
 
 
-@router.get("/appeal/{appeal_id}", response_model=list[Comment])
+@router.get("/appeal/{appeal_id}", response_model=PaginatedResponse[Comment])
 async def read_appeal_comments(
     *,
     session: AsyncSessionDep,
-    current_user: CurrentUserAsync,
+    current_user: CurrentPrincipalAsync,
     appeal_id: UUID,
-    skip: int = 0,
-    limit: int = 100,
+    params: Annotated[CursorParams, Depends()],
 ) -> Any:
     """
     Получить комментарии к обращению.
     """
     # Проверка доступа к обращению
-    appeal = await get_appeal_async(session=session, appeal_id=appeal_id)
-    if not appeal:
-        raise HTTPException(status_code=404, detail="Appeal not found")
-
-    # Проверяем права доступа
-    if not current_user.is_superuser:
-        # Если пользователь - представитель организации
-        if (
-            hasattr(current_user, "representative")
-            and appeal.organization_id != current_user.representative.organization_id
-        ):
-            raise HTTPException(
-                status_code=403,
-                detail="Not enough permissions to access this appeal's comments",
-            )
-        # Если обычный пользователь, проверяем что это его обращение
-        elif appeal.user_id != current_user.id:
-            raise HTTPException(
-                status_code=403,
-                detail="Not enough permissions to access this appeal's comments",
-            )
-
-    comments = await get_appeal_comments_async(
-        session=session, appeal_id=appeal_id, skip=skip, limit=limit
+    await check_appeal_access_async(
+        session=session, principal=current_user, appeal_id=appeal_id
+    )
+
+    return await get_appeal_comments_paginated_async(
+        session=session, appeal_id=appeal_id, params=params
     )
-    return comments
 
 
 @router.post("/appeal/{appeal_id}", response_model=Comment)
 async def create_new_comment(
     *,
     session: AsyncSessionDep,
-    current_user: CurrentUserAsync,
+    current_user: CurrentPrincipalAsync,
     appeal_id: UUID,
     comment_in: CommentBase = Depends(),
     files: list[UploadFile] = File(None),  # noqa: UP006
@@ -71,26 +53,9 @@ async def create_new_comment(
     Создать новый комментарий к обращению.
     """
     # Проверка доступа к обращению
-    appeal = await get_appeal_async(session=session, appeal_id=appeal_id)
-    if not appeal:
-        raise HTTPException(status_code=404, detail="Appeal not found")
-
-    # Проверяем права доступа
-    if not current_user.is_superuser:
-        # Если пользователь - представитель организации
-        if hasattr(current_user, "representative"):
-            # Проверяем, что обращение принадлежит организации представителя
-            if appeal.organization_id != current_user.representative.organization_id:
-                raise HTTPException(
-                    status_code=403,
-                    detail="Not enough permissions to comment on this appeal",
-                )
-        # Если обычный пользователь, проверяем что это его обращение
-        elif appeal.user_id != current_user.id:
-            raise HTTPException(
-                status_code=403,
-                detail="Not enough permissions to comment on this appeal",
-            )
+    await check_appeal_access_async(
+        session=session, principal=current_user, appeal_id=appeal_id
+    )
 
     comment = await create_comment_async(
         session=session,
@@ -106,7 +71,7 @@ async def create_new_comment(
 async def read_comment(
     *,
     session: AsyncSessionDep,
-    _current_user: CurrentUserAsync,
+    current_user: CurrentPrincipalAsync,
     comment_id: UUID,
 ) -> Any:
     """
@@ -116,24 +81,10 @@ async def read_comment(
     if not comment:
         raise HTTPException(status_code=404, detail="Comment not found")
 
-    # Проверка доступа к комментарию
-    appeal = await get_appeal_async(session=session, appeal_id=comment.appeal_id)
-
-    # Проверяем права доступа
-    if not _current_user.is_superuser:
-        # Если пользователь - представитель организации
-        if (
-            hasattr(_current_user, "representative")
-            and appeal.organization_id != _current_user.representative.organization_id
-        ):
-            raise HTTPException(
-                status_code=403, detail="Not enough permissions to access this comment"
-            )
-        # Если обычный пользователь, проверяем что это его обращение
-        elif appeal.user_id != _current_user.id:
-            raise HTTPException(
-                status_code=403, detail="Not enough permissions to access this comment"
-            )
+    # Проверка доступа к обращению комментария
+    await check_appeal_access_async(
+        session=session, principal=current_user, appeal_id=comment.appeal_id
+    )
 
     return comment
 
@@ -227,13 +178,15 @@ async def read_comment(
 @router.get("/{comment_id}/files/{file_id}")
 async def download_comment_file(
     *,
+    request: Request,
     session: AsyncSessionDep,
-    _current_user: CurrentUserAsync,
+    current_user: CurrentPrincipalAsync,
     comment_id: UUID,
     file_id: UUID,
+    variant: FileVariant | None = None,
 ) -> Any:
     """
-    Скачать файл комментария.
+    Скачать файл комментария; variant=thumb - миниатюра изображения или PDF.
     """
     comment_file = await get_comment_file_async(
         session=session, comment_id=comment_id, file_id=file_id
@@ -241,4 +194,11 @@ async def download_comment_file(
     if not comment_file:
         raise HTTPException(status_code=404, detail="File not found")
 
-    return await get_file_response(file_path=comment_file.file)
+    comment = await get_comment_async(session=session, comment_id=comment_id)
+    await check_appeal_access_async(
+        session=session, principal=current_user, appeal_id=comment.appeal_id
+    )
+
+    return await file_response_async(
+        session=session, request=request, file=comment_file, variant=variant
+    )
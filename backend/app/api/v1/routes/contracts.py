@@ -3,8 +3,14 @@ from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException
 
-from app.api.v1.deps import SessionDep, get_current_user
+from app.api.v1.deps import (
+    SessionDep,
+    get_current_active_superuser,
+    get_current_principal,
+)
+from app.core.principal import Principal
 from app.cruds.contract import (
+    apply_contracts_bulk,
     create_contract,
     delete_contract,
     get_actual_organization_contract,
@@ -13,8 +19,13 @@ from app.cruds.contract import (
     get_organization_contracts,
     update_contract,
 )
-from app.models.contract import Contract, ContractCreate, ContractUpdate
-from app.models.user import User
+from app.models.contract import (
+    Contract,
+    ContractBulkRequest,
+    ContractBulkResult,
+    ContractCreate,
+    ContractUpdate,
+)
 
 router = APIRouter(prefix="/contracts", tags=["contracts"])
 
@@ -24,7 +35,7 @@ def create(
     *,
     session: SessionDep,
     contract_in: ContractCreate,
-    _: User = Depends(get_current_user),
+    _: Principal = Depends(get_current_principal),
 ) -> Contract:
     """
     Создание нового контракта.
@@ -32,12 +43,32 @@ def create(
     return create_contract(session=session, contract_in=contract_in)
 
 
+@router.post(
+    "/bulk",
+    response_model=ContractBulkResult,
+    dependencies=[Depends(get_current_active_superuser)],
+)
+def apply_bulk(
+    *,
+    session: SessionDep,
+    bulk_in: ContractBulkRequest,
+) -> ContractBulkResult:
+    """
+    Массовое создание и обновление стандартных приоритетов и договоров.
+    Только для суперпользователей.
+
+    Все изменения применяются одной транзакцией; результат - по каждому
+    элементу запроса, ошибочные элементы не мешают остальным.
+    """
+    return apply_contracts_bulk(session=session, bulk_in=bulk_in)
+
+
 @router.get("/{contract_id}", response_model=Contract)
 def get_by_id(
     *,
     session: SessionDep,
     contract_id: UUID,
-    _: User = Depends(get_current_user),
+    _: Principal = Depends(get_current_principal),
 ) -> Contract:
     """
     Получение контракта по ID.
@@ -57,7 +88,7 @@ def get_list(
     session: SessionDep,
     skip: int = 0,
     limit: int = 100,
-    _: User = Depends(get_current_user),
+    _: Principal = Depends(get_current_principal),
 ) -> list[Contract]:
     """
     Получение списка всех контрактов.
@@ -72,7 +103,7 @@ def get_by_organization(
     organization_id: UUID,
     skip: int = 0,
     limit: int = 100,
-    _: User = Depends(get_current_user),
+    _: Principal = Depends(get_current_principal),
 ) -> list[Contract]:
     """
     Получение списка контрактов организации.
@@ -91,7 +122,7 @@ def get_actual(
     session: SessionDep,
     organization_id: UUID,
     current_date: date | None = None,
-    _: User = Depends(get_current_user),
+    _: Principal = Depends(get_current_principal),
 ) -> Contract:
     """
     Получение актуального контракта организации.
@@ -115,7 +146,7 @@ def update(
     session: SessionDep,
     contract_id: UUID,
     contract_in: ContractUpdate,
-    _: User = Depends(get_current_user),
+    _: Principal = Depends(get_current_principal),
 ) -> Contract:
     """
     Обновление контракта.
@@ -138,7 +169,7 @@ def delete(
     *,
     session: SessionDep,
     contract_id: UUID,
-    _: User = Depends(get_current_user),
+    _: Principal = Depends(get_current_principal),
 ) -> None:
     """
     Удаление контракта.
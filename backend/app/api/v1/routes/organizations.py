@@ -3,7 +3,7 @@ from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException
 
-from app.api.v1.deps import CurrentUser, SessionDep, get_current_active_superuser
+from app.api.v1.deps import CurrentPrincipal, SessionDep, get_current_active_superuser
 from app.cruds.organization import (
     create_organization,
     delete_organization,
@@ -11,7 +11,6 @@ from app.cruds.organization import (
     get_organizations,
     update_organization,
 )
-from app.cruds.representative import get_representative_by_user_id
 from app.models.common import Message
 from app.models.organization import Organization, OrganizationCreate, OrganizationUpdate
 
@@ -21,7 +20,7 @@ router = APIRouter(prefix="/organizations", tags=["organizations"])
 @router.get("/", response_model=list[Organization])
 def read_organizations(
     session: SessionDep,
-    current_user: CurrentUser,
+    current_user: CurrentPrincipal,
     skip: int = 0,
     limit: int = 100,
 ) -> Any:
@@ -33,12 +32,12 @@ def read_organizations(
     if current_user.is_superuser:
         organizations = get_organizations(session=session, skip=skip, limit=limit)
     else:
-        representative = get_representative_by_user_id(
-            session=session, user_id=current_user.id
-        )
-        if not representative:
+        if current_user.organization_id is None:
             return []
-        organizations = [representative.organization]
+        organization = get_organization(
+            session=session, organization_id=current_user.organization_id
+        )
+        organizations = [organization] if organization else []
     return organizations
 
 
@@ -67,7 +66,7 @@ def create_new_organization(
 def read_organization(
     *,
     session: SessionDep,
-    current_user: CurrentUser,
+    current_user: CurrentPrincipal,
     organization_id: UUID,
 ) -> Any:
     """
@@ -82,10 +81,7 @@ def read_organization(
         )
 
     if not current_user.is_superuser:
-        representative = get_representative_by_user_id(
-            session=session, user_id=current_user.id
-        )
-        if not representative or representative.organization_id != organization_id:
+        if current_user.organization_id != organization_id:
             raise HTTPException(
                 status_code=403,
                 detail="Not enough permissions to access this organization",
@@ -98,7 +94,7 @@ def read_organization(
 def update_organization_by_id(
     *,
     session: SessionDep,
-    current_user: CurrentUser,
+    current_user: CurrentPrincipal,
     organization_id: UUID,
     organization_in: OrganizationUpdate,
 ) -> Any:
@@ -115,10 +111,7 @@ def update_organization_by_id(
         )
 
     if not current_user.is_superuser:
-        representative = get_representative_by_user_id(
-            session=session, user_id=current_user.id
-        )
-        if not representative or representative.organization_id != organization_id:
+        if current_user.organization_id != organization_id:
             raise HTTPException(
                 status_code=403,
                 detail="Not enough permissions to update this organization",
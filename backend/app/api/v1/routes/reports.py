@@ -1,15 +1,32 @@
 from datetime import date
+from typing import Annotated
 from uuid import UUID
 
-from fastapi import APIRouter, Depends
-from fastapi.responses import StreamingResponse
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi import Path as PathParam
+from fastapi.responses import FileResponse, StreamingResponse
 
-from app.api.v1.deps import SessionDep, get_current_user
-from app.models.user import User
-from app.utils.reports import generate_organization_report
+from app.api.v1.deps import SessionDep, get_current_principal
+from app.core.principal import Principal
+from app.models.report import ReportFormat, ReportJobCreate, ReportJobPublic
+from app.utils.report_jobs import (
+    read_report_job,
+    report_artifact_path,
+    submit_report_job,
+)
+from app.utils.reports import (
+    REPORT_MEDIA_TYPES,
+    generate_organization_report,
+    iter_file,
+    stream_organization_report_csv,
+)
 
 router = APIRouter(prefix="/reports", tags=["reports"])
 
+# Идентификатор задачи - sha256 в hex; проверка не дает выйти за пределы
+# папки отчетов через путь
+JobId = Annotated[str, PathParam(pattern=r"^[0-9a-f]{64}$")]
+
 
 @router.get("/organization/{organization_id}")
 def get_organization_report(
@@ -18,7 +35,8 @@ def get_organization_report(
     organization_id: UUID,
     date_from: date,
     date_to: date,
-    _: User = Depends(get_current_user),
+    format: ReportFormat = "xlsx",
+    _: Principal = Depends(get_current_principal),
 ) -> StreamingResponse:
     """
     Генерация отчета по обращениям организации за период.
@@ -27,21 +45,84 @@ def get_organization_report(
         organization_id: ID организации
         date_from: Начальная дата периода
         date_to: Конечная дата периода
+        format: Формат файла: xlsx, csv или parquet
 
     Returns:
-        StreamingResponse: Excel-файл с отчетом
+        StreamingResponse: Файл с отчетом
     """
-    file = generate_organization_report(
-        session=session,
-        organization_id=organization_id,
-        date_from=date_from,
-        date_to=date_to,
-    )
+    if format == "csv":
+        # CSV отдается по мере чтения строк, без временного файла
+        content = stream_organization_report_csv(
+            organization_id=organization_id, date_from=date_from, date_to=date_to
+        )
+    else:
+        content = iter_file(
+            generate_organization_report(
+                session=session,
+                organization_id=organization_id,
+                date_from=date_from,
+                date_to=date_to,
+                format=format,
+            )
+        )
 
-    filename = f"organization_report_{date_from}_{date_to}.xlsx"
+    filename = f"organization_report_{date_from}_{date_to}.{format}"
 
     return StreamingResponse(
-        file,
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        content,
+        media_type=REPORT_MEDIA_TYPES[format],
         headers={"Content-Disposition": f'attachment; filename="{filename}"'},
     )
+
+
+@router.post("/jobs", status_code=202, response_model=ReportJobPublic)
+def create_report_job(
+    *,
+    session: SessionDep,
+    job_in: ReportJobCreate,
+    _: Principal = Depends(get_current_principal),
+) -> ReportJobPublic:
+    """
+    Постановка отчета в очередь генерации.
+
+    Отчет генерируется в пуле процессов. Если отчет с теми же параметрами
+    по неизменившимся данным уже готов, задача сразу возвращается
+    со статусом done.
+    """
+    return submit_report_job(session=session, job_in=job_in)
+
+
+@router.get("/jobs/{job_id}", response_model=ReportJobPublic)
+def read_report_job_status(
+    job_id: JobId,
+    _: Principal = Depends(get_current_principal),
+) -> ReportJobPublic:
+    """
+    Статус задачи генерации отчета.
+    """
+    job = read_report_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Report job not found")
+    return job
+
+
+@router.get("/jobs/{job_id}/download")
+def download_report_job(
+    job_id: JobId,
+    _: Principal = Depends(get_current_principal),
+) -> FileResponse:
+    """
+    Скачивание готового отчета.
+    """
+    job = read_report_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Report job not found")
+    path = report_artifact_path(job)
+    if job.status != "done" or not path.exists():
+        raise HTTPException(status_code=409, detail="Report is not ready")
+
+    return FileResponse(
+        path=path,
+        media_type=REPORT_MEDIA_TYPES[job.format],
+        filename=f"organization_report_{job.date_from}_{job.date_to}.{job.format}",
+    )
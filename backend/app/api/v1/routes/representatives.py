@@ -3,7 +3,7 @@ from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException
 
-from app.api.v1.deps import CurrentUser, SessionDep, get_current_active_superuser
+from app.api.v1.deps import CurrentPrincipal, SessionDep, get_current_active_superuser
 from app.cruds.representative import (
     create_representative,
     delete_representative,
@@ -23,7 +23,7 @@ router = APIRouter(prefix="/representatives", tags=["representatives"])
 @router.get("/", response_model=list[Representative])
 def read_representatives(
     session: SessionDep,
-    current_user: CurrentUser,
+    current_user: CurrentPrincipal,
     organization_id: UUID | None = None,
     skip: int = 0,
     limit: int = 100,
@@ -41,14 +41,11 @@ def read_representatives(
             limit=limit,
         )
     else:
-        representative = get_representative_by_user_id(
-            session=session, user_id=current_user.id
-        )
-        if not representative:
+        if current_user.organization_id is None:
             return []
         representatives = get_organization_representatives(
             session=session,
-            organization_id=representative.organization_id,
+            organization_id=current_user.organization_id,
             skip=skip,
             limit=limit,
         )
@@ -96,7 +93,7 @@ def create_new_representative(
 def read_representative(
     *,
     session: SessionDep,
-    current_user: CurrentUser,
+    current_user: CurrentPrincipal,
     representative_id: UUID,
 ) -> Any:
     """
@@ -113,13 +110,7 @@ def read_representative(
         )
 
     if not current_user.is_superuser:
-        current_representative = get_representative_by_user_id(
-            session=session, user_id=current_user.id
-        )
-        if (
-            not current_representative
-            or current_representative.organization_id != representative.organization_id
-        ):
+        if current_user.organization_id != representative.organization_id:
             raise HTTPException(
                 status_code=403,
                 detail="Not enough permissions to access this representative",
@@ -132,7 +123,7 @@ def read_representative(
 def update_representative_by_id(
     *,
     session: SessionDep,
-    current_user: CurrentUser,
+    current_user: CurrentPrincipal,
     representative_id: UUID,
     representative_in: RepresentativeBase,
 ) -> Any:
@@ -190,7 +181,7 @@ def delete_representative_by_id(
 def read_subordinate_representatives(
     *,
     session: SessionDep,
-    current_user: CurrentUser,
+    current_user: CurrentPrincipal,
     representative_id: UUID,
 ) -> Any:
     """
@@ -1,19 +1,22 @@
+from typing import Annotated
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException
 
-from app.api.v1.deps import SessionDep, get_current_user
+from app.api.v1.deps import SessionDep, get_current_principal
+from app.core.pagination import CursorParams, PaginatedResponse
+from app.core.principal import Principal
+from app.cruds.access import check_appeal_access
 from app.cruds.task import (
     create_task,
     delete_task,
     get_appeal_tasks,
     get_task,
-    get_tasks,
+    get_tasks_paginated,
     get_user_tasks,
     update_task,
 )
 from app.models.task import Task, TaskBase
-from app.models.user import User
 
 router = APIRouter(prefix="/tasks", tags=["tasks"])
 
@@ -24,11 +27,12 @@ def create(
     session: SessionDep,
     task_in: TaskBase,
     appeal_id: UUID,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
 ) -> Task:
     """
     Создание новой задачи.
     """
+    check_appeal_access(session=session, principal=current_user, appeal_id=appeal_id)
     return create_task(
         session=session,
         task_in=task_in,
@@ -42,7 +46,7 @@ def get_by_id(
     *,
     session: SessionDep,
     task_id: UUID,
-    _: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
 ) -> Task:
     """
     Получение задачи по ID.
@@ -53,21 +57,23 @@ def get_by_id(
             status_code=404,
             detail="Task not found",
         )
+    check_appeal_access(
+        session=session, principal=current_user, appeal_id=db_task.appeal_id
+    )
     return db_task
 
 
-@router.get("/", response_model=list[Task])
+@router.get("/", response_model=PaginatedResponse[Task])
 def get_list(
     *,
     session: SessionDep,
-    skip: int = 0,
-    limit: int = 100,
-    _: User = Depends(get_current_user),
-) -> list[Task]:
+    params: Annotated[CursorParams, Depends()],
+    current_user: Principal = Depends(get_current_principal),
+) -> PaginatedResponse[Task]:
     """
-    Получение списка всех задач.
+    Получение списка задач доступных пользователю обращений.
     """
-    return get_tasks(session=session, skip=skip, limit=limit)
+    return get_tasks_paginated(session=session, principal=current_user, params=params)
 
 
 @router.get("/appeal/{appeal_id}", response_model=list[Task])
@@ -77,11 +83,12 @@ def get_by_appeal(
     appeal_id: UUID,
     skip: int = 0,
     limit: int = 100,
-    _: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
 ) -> list[Task]:
     """
     Получение списка задач обращения.
     """
+    check_appeal_access(session=session, principal=current_user, appeal_id=appeal_id)
     return get_appeal_tasks(
         session=session,
         appeal_id=appeal_id,
@@ -97,7 +104,7 @@ def get_by_user(
     user_id: UUID,
     skip: int = 0,
     limit: int = 100,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
 ) -> list[Task]:
     """
     Получение списка задач пользователя.
@@ -124,7 +131,7 @@ def update(
     gitlab_url: str | None = None,
     status: str | None = None,
     description: str | None = None,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
 ) -> Task:
     """
     Обновление задачи.
@@ -155,7 +162,7 @@ def delete(
     *,
     session: SessionDep,
     task_id: UUID,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
 ) -> None:
     """
     Удаление задачи.
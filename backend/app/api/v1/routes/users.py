@@ -6,10 +6,12 @@ from sqlalchemy.sql import func, select
 
 from app.api.v1.deps import (
     AsyncSessionDep,
+    CurrentPrincipalAsync,
     CurrentUserAsync,
     get_current_active_superuser,
 )
 from app.core.config import settings
+from app.core.principal import invalidate_principal
 from app.core.security import get_password_hash, verify_password
 from app.cruds.user import (
     create_user_async,
@@ -142,6 +144,7 @@ async def delete_user_me(
         )
     await session.delete(current_user)
     await session.commit()
+    invalidate_principal(current_user.id)
     return Message(message="User deleted successfully")
 
 
@@ -163,13 +166,13 @@ async def register_user(session: AsyncSessionDep, user_in: UserRegister) -> Any:
 
 @router.get("/{user_id}", response_model=UserPublic)
 async def read_user_by_id(
-    user_id: uuid.UUID, session: AsyncSessionDep, current_user: CurrentUserAsync
+    user_id: uuid.UUID, session: AsyncSessionDep, current_user: CurrentPrincipalAsync
 ) -> Any:
     """
     Get a specific user by id.
     """
     user = await session.get(User, user_id)
-    if user == current_user:
+    if user and user.id == current_user.id:
         return user
     if not current_user.is_superuser:
         raise HTTPException(
@@ -213,7 +216,7 @@ async def update_user_by_id(
 
 @router.delete("/{user_id}", dependencies=[Depends(get_current_active_superuser)])
 async def delete_user(
-    session: AsyncSessionDep, current_user: CurrentUserAsync, user_id: uuid.UUID
+    session: AsyncSessionDep, current_user: CurrentPrincipalAsync, user_id: uuid.UUID
 ) -> Message:
     """
     Delete a user.
@@ -221,10 +224,11 @@ async def delete_user(
     user = await session.get(User, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    if user == current_user:
+    if user.id == current_user.id:
         raise HTTPException(
             status_code=403, detail="Super users are not allowed to delete themselves"
         )
     await session.delete(user)
     await session.commit()
+    invalidate_principal(user.id)
     return Message(message="User deleted successfully")
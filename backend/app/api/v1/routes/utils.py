@@ -2,7 +2,8 @@ from fastapi import APIRouter, Depends
 from pydantic.networks import EmailStr
 
 from app.api.v1.deps import get_current_active_superuser
-from app.models.common import Message
+from app.core.db import get_pool_stats
+from app.models.common import Message, PoolStats
 from app.utils import generate_test_email, send_email
 
 router = APIRouter(prefix="/utils", tags=["utils"])
@@ -29,3 +30,15 @@ def test_email(email_to: EmailStr) -> Message:
 @router.get("/health-check/")
 async def health_check() -> bool:
     return True
+
+
+@router.get(
+    "/db-pool-stats/",
+    dependencies=[Depends(get_current_active_superuser)],
+    response_model=list[PoolStats],
+)
+def db_pool_stats() -> list[PoolStats]:
+    """
+    Метрики пулов соединений с БД текущего воркера.
+    """
+    return [PoolStats(**stats) for stats in get_pool_stats()]
@@ -0,0 +1,124 @@
+import io
+import zipfile
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import PurePosixPath
+
+from app.core.storage import get_storage
+
+# Порция чтения файла при упаковке
+ARCHIVE_CHUNK_SIZE = 256 * 1024
+
+# Форматы, которые уже сжаты: повторное сжатие тратит CPU и почти ничего
+# не дает, такие файлы кладутся в архив без сжатия
+_COMPRESSED_TYPES = {
+    "application/gzip",
+    "application/pdf",
+    "application/vnd.rar",
+    "application/x-7z-compressed",
+    "application/zip",
+}
+_COMPRESSED_PREFIXES = (
+    "image/",
+    "video/",
+    "audio/",
+    "application/vnd.openxmlformats-officedocument.",
+    "application/vnd.oasis.opendocument.",
+)
+
+
+@dataclass(frozen=True)
+class ArchiveEntry:
+    """Файл для архива: имя внутри архива и ключ содержимого в хранилище"""
+
+    name: str
+    key: str
+    content_type: str
+    size: int | None = None
+    modified: datetime | None = None
+
+
+def is_compressed(content_type: str) -> bool:
+    # SVG - текст, хорошо сжимается, хотя и image/*
+    if content_type == "image/svg+xml":
+        return False
+    return content_type in _COMPRESSED_TYPES or content_type.startswith(
+        _COMPRESSED_PREFIXES
+    )
+
+
+def unique_name(name: str, used: set[str]) -> str:
+    """Имя внутри архива без совпадений: report.pdf, report (2).pdf, ..."""
+    candidate, index = name, 1
+    path = PurePosixPath(name)
+    while candidate in used:
+        index += 1
+        candidate = str(path.with_name(f"{path.stem} ({index}){path.suffix}"))
+    used.add(candidate)
+    return candidate
+
+
+class _ZipSink(io.RawIOBase):
+    """
+    Приемник байтов архива без перемотки: zipfile пишет в него, а генератор
+    забирает накопленное после каждой порции
+    """
+
+    def __init__(self) -> None:
+        self._chunks: list[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data: bytes) -> int:  # type: ignore[override]
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def iter_zip(entries: Iterable[ArchiveEntry]) -> Iterator[bytes]:
+    """
+    ZIP-архив, собираемый на лету
+
+    Поток не перематывается, поэтому размеры и CRC каждого файла пишутся
+    после его данных (data descriptor). В памяти одновременно не больше
+    одной порции файла; временные файлы не создаются. Файлы, которых нет
+    в хранилище, пропускаются.
+    """
+    storage = get_storage()
+    sink = _ZipSink()
+    with zipfile.ZipFile(sink, mode="w", allowZip64=True) as archive:
+        for entry in entries:
+            size = entry.size
+            modified = entry.modified
+            if size is None or modified is None:
+                stat = storage.stat(key=entry.key)
+                if stat is None:
+                    continue
+                size, modified = stat.size, stat.modified
+            info = zipfile.ZipInfo(entry.name, date_time=modified.timetuple()[:6])
+            info.file_size = size
+            info.compress_type = (
+                zipfile.ZIP_STORED
+                if is_compressed(entry.content_type)
+                else zipfile.ZIP_DEFLATED
+            )
+            with (
+                storage.open(key=entry.key) as source,
+                archive.open(info, mode="w") as target,
+            ):
+                while chunk := source.read(ARCHIVE_CHUNK_SIZE):
+                    target.write(chunk)
+                    # Сжатие копит данные, поэтому после порции может
+                    # не быть готовых байтов
+                    if data := sink.drain():
+                        yield data
+            if data := sink.drain():
+                yield data
+    # Центральный каталог пишется при закрытии архива
+    yield sink.drain()
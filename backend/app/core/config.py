@@ -69,12 +69,49 @@ class Settings(BaseSettings):
             path=self.POSTGRES_DB,
         )
 
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def SQLALCHEMY_ASYNC_DATABASE_URI(self) -> PostgresDsn:
+        return MultiHostUrl.build(
+            scheme="postgresql+asyncpg",
+            username=self.POSTGRES_USER,
+            password=self.POSTGRES_PASSWORD,
+            host=self.POSTGRES_SERVER,
+            port=self.POSTGRES_PORT,
+            path=self.POSTGRES_DB,
+        )
+
+    # Пул соединений. Параметры действуют на каждый движок (sync и async)
+    # в каждом воркере: всего до workers * 2 * (POOL_SIZE + MAX_OVERFLOW)
+    # соединений, это число должно укладываться в max_connections Postgres
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 5
+    # Сколько секунд ждать свободное соединение, прежде чем вернуть ошибку
+    DB_POOL_TIMEOUT: float = 10.0
+    # Через сколько секунд пересоздавать соединение (-1 - никогда)
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    # Внешний пулер (PgBouncer в режиме transaction): собственный пул
+    # приложения заменяется на NullPool, кэши prepared statements драйверов
+    # отключаются
+    DB_EXTERNAL_POOLER: bool = False
+
     SMTP_TLS: bool = True
     SMTP_SSL: bool = False
     SMTP_PORT: int = 587
     SMTP_HOST: str | None = None
     SMTP_USER: str | None = None
     SMTP_PASSWORD: str | None = None
+    # Пул постоянных SMTP-соединений (app.core.mailer): сколько писем
+    # отправляется параллельно и сколько писем в секунду допускает провайдер
+    # (0 - без ограничения)
+    SMTP_POOL_SIZE: int = 4
+    SMTP_RATE_LIMIT_PER_SECOND: float = 0
+    SMTP_TIMEOUT_SECONDS: float = 30
+    # Соединение переоткрывается после стольких писем и после такого простоя:
+    # провайдеры ограничивают письма на сессию и закрывают простаивающие
+    SMTP_MAX_MESSAGES_PER_CONNECTION: int = 100
+    SMTP_IDLE_TIMEOUT_SECONDS: float = 60
     # TODO: update type to EmailStr when sqlmodel supports it
     EMAILS_FROM_EMAIL: str | None = None
     EMAILS_FROM_NAME: str | None = None
@@ -86,6 +123,9 @@ class Settings(BaseSettings):
         return self
 
     EMAIL_RESET_TOKEN_EXPIRE_HOURS: int = 48
+    # Куда сохранять байткод скомпилированных шаблонов писем;
+    # None - временная директория системы
+    EMAIL_TEMPLATES_CACHE_DIR: str | None = None
 
     @computed_field  # type: ignore[prop-decorator]
     @property
@@ -124,11 +164,74 @@ class Settings(BaseSettings):
 
         return self
 
+    # Кэш принципалов (id, флаги, организации) для авторизации запросов.
+    # Кэш свой в каждом воркере, TTL ограничивает время жизни устаревших данных
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 30
+    PRINCIPAL_CACHE_MAXSIZE: int = 10_000
+
+    # Кэш каталогов приоритетов организаций (название -> норматив в часах)
+    # для создания обращений; сбрасывается при изменении договоров и
+    # приоритетов, TTL ограничивает расхождение между воркерами
+    PRIORITY_CATALOG_CACHE_TTL_SECONDS: int = 300
+    PRIORITY_CATALOG_CACHE_MAXSIZE: int = 10_000
+
+    # Кэш количества записей для пагинации (стратегия count="cached")
+    PAGINATION_COUNT_CACHE_TTL_SECONDS: int = 60
+    PAGINATION_COUNT_CACHE_MAXSIZE: int = 1024
+
     # Директория для загруженных файлов
     UPLOAD_DIR: str = "uploads"
 
+    # Хранилище загруженных файлов: local - UPLOAD_DIR на диске,
+    # s3 - S3-совместимое объектное хранилище (S3, MinIO)
+    STORAGE_BACKEND: Literal["local", "s3"] = "local"
+    S3_ENDPOINT_URL: str | None = None
+    S3_REGION: str | None = None
+    S3_BUCKET: str = "helpdesk"
+    S3_ACCESS_KEY_ID: str | None = None
+    S3_SECRET_ACCESS_KEY: str | None = None
+    # Файлы больше этого размера загружаются multipart-частями такого размера
+    S3_MULTIPART_CHUNK_SIZE: int = 8 * 1024 * 1024
+    S3_PRESIGNED_URL_EXPIRE_SECONDS: int = 300
+
+    # Передача локальных файлов обратному прокси: приложение отдает только
+    # заголовки, а файл читает и отправляет nginx (X-Accel-Redirect, путь
+    # internal-location с префиксом ниже) или Apache/Caddy (X-Sendfile,
+    # абсолютный путь к файлу). None - файлы отдает приложение
+    FILE_SENDFILE_HEADER: Literal["X-Accel-Redirect", "X-Sendfile"] | None = None
+    FILE_ACCEL_REDIRECT_PREFIX: str = "/protected-uploads/"
+
     # Максимальный размер файла (в байтах), по умолчанию 10MB
     MAX_UPLOAD_SIZE: int = 10 * 1024 * 1024
 
+    # Миниатюры изображений и PDF (?variant=thumb): сторона квадрата,
+    # в который вписывается миниатюра, и предел размера исходного
+    # изображения - больше не декодируем, чтобы не исчерпать память воркера
+    THUMBNAIL_SIZE: int = 320
+    THUMBNAIL_MAX_SOURCE_PIXELS: int = 50_000_000
+
+    # Пул процессов для тяжелых фоновых задач (отчеты, миниатюры)
+    WORKER_PROCESSES: int = 2
+    # Через сколько секунд незавершенная задача отчета считается зависшей
+    # (например, процесс пула был убит) и запускается заново
+    REPORT_JOB_TIMEOUT_SECONDS: int = 30 * 60
+
+    # Диспетчер уведомлений (python -m app.utils.outbox): сколько уведомлений
+    # отправлять за транзакцию и как часто проверять пустую очередь
+    OUTBOX_BATCH_SIZE: int = 100
+    OUTBOX_POLL_INTERVAL_SECONDS: float = 1.0
+    # Повторы с экспоненциальной задержкой: 10 с, 20 с, 40 с ... до часа;
+    # после OUTBOX_MAX_ATTEMPTS попыток уведомление помечается failed
+    OUTBOX_MAX_ATTEMPTS: int = 8
+    OUTBOX_RETRY_BASE_SECONDS: int = 10
+    OUTBOX_RETRY_MAX_SECONDS: int = 60 * 60
+
+    # Контроль сроков (python -m app.utils.breach_watch): за сколько минут до
+    # срока предупреждать; в памяти держатся сроки на SLA_WATCH_HORIZON_MINUTES
+    # вперед; дольше SLA_WATCH_MAX_SLEEP_SECONDS процесс не спит
+    SLA_NEAR_BREACH_MINUTES: int = 60
+    SLA_WATCH_HORIZON_MINUTES: int = 24 * 60
+    SLA_WATCH_MAX_SLEEP_SECONDS: float = 300
+
 
 settings = Settings()  # type: ignore
@@ -1,20 +1,62 @@
+from typing import Any
+
 from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, Pool, QueuePool
 from sqlmodel import Session, create_engine, select
 
 from app.core.config import settings
+from app.core.pool import POOL_METRICS, instrumented_pool_class
 from app.cruds.appeal_status import create_appeal_status
 from app.cruds.user import create_user
 from app.models.appeal_status import AppealStatus
 from app.models.user import User, UserCreate
 
-engine = create_engine(str(settings.SQLALCHEMY_DATABASE_URI))
+
+def get_engine_options(*, name: str, is_async: bool) -> dict[str, Any]:
+    """Параметры пула соединений для create_engine/create_async_engine"""
+    if settings.DB_EXTERNAL_POOLER:
+        # Соединения держит PgBouncer; в режиме transaction соседние запросы
+        # могут попасть на разные серверные соединения, поэтому
+        # prepared statements использовать нельзя
+        connect_args = (
+            {"statement_cache_size": 0, "prepared_statement_cache_size": 0}
+            if is_async
+            else {"prepare_threshold": None}
+        )
+        return {
+            "poolclass": instrumented_pool_class(NullPool, name),
+            "connect_args": connect_args,
+        }
+
+    base: type[Pool] = AsyncAdaptedQueuePool if is_async else QueuePool
+    return {
+        "poolclass": instrumented_pool_class(base, name),
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
+engine = create_engine(
+    str(settings.SQLALCHEMY_DATABASE_URI),
+    **get_engine_options(name="sync", is_async=False),
+)
 async_engine = create_async_engine(
-    str(settings.SQLALCHEMY_DATABASE_URI).replace(
-        "postgresql://", "postgresql+asyncpg://"
-    )
+    str(settings.SQLALCHEMY_ASYNC_DATABASE_URI),
+    **get_engine_options(name="async", is_async=True),
 )
 
 
+def get_pool_stats() -> list[dict[str, Any]]:
+    """Метрики пулов соединений текущего процесса"""
+    return [
+        POOL_METRICS["sync"].snapshot(engine.pool),
+        POOL_METRICS["async"].snapshot(async_engine.pool),
+    ]
+
+
 # make sure all SQLModel models are imported (app.models) before initializing DB
 # otherwise, SQLModel might fail to initialize relationships properly
 # for more details: https://github.com/fastapi/full-stack-fastapi-template/issues/28
@@ -1,57 +1,302 @@
+import hashlib
+import mimetypes
 import os
+from collections.abc import Iterator
+from datetime import timezone
+from email.utils import format_datetime, parsedate_to_datetime
 from pathlib import Path
 from uuid import UUID
 
-from fastapi import HTTPException, UploadFile
-from fastapi.responses import FileResponse
-from starlette.status import HTTP_404_NOT_FOUND
+from fastapi import HTTPException, Request, UploadFile
+from fastapi.responses import (
+    FileResponse,
+    RedirectResponse,
+    Response,
+    StreamingResponse,
+)
+from starlette.concurrency import run_in_threadpool
+from starlette.status import (
+    HTTP_404_NOT_FOUND,
+    HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+)
 
 from app.core.config import settings
+from app.core.storage import (
+    UPLOAD_CHUNK_SIZE,
+    LimitedReader,
+    ObjectStat,
+    content_disposition,
+    get_storage,
+)
+from app.models.file_blob import FileVariant
 
+DEFAULT_CONTENT_TYPE = "application/octet-stream"
+# Размер порции при отдаче части файла (Range)
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
 
-def save_upload_file(
-    *,
-    file: UploadFile,
-    folder: str,
-    entity_id: UUID,
-) -> str:
+# Сигнатуры форматов в начале файла
+_SIGNATURES: tuple[tuple[bytes, str], ...] = (
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+    (b"%PDF-", "application/pdf"),
+    (b"\x1f\x8b", "application/gzip"),
+    (b"7z\xbc\xaf\x27\x1c", "application/x-7z-compressed"),
+    (b"Rar!\x1a\x07", "application/vnd.rar"),
+)
+
+# Производные файлы (миниатюры), которые хранятся рядом с оригиналом
+FILE_VARIANTS: tuple[FileVariant, ...] = ("thumb",)
+VARIANT_CONTENT_TYPE = "image/webp"
+
+
+def upload_path(*, filename: str | None, folder: str, entity_id: UUID) -> str:
+    """
+    Логическое имя файла: сохраняется в БД и дает имя при скачивании,
+    но не определяет, где лежит содержимое
     """
-    Сохраняет загруженный файл и возвращает путь к нему
+    # Только имя файла: путь из имени, присланного клиентом, не используем
+    name = Path(filename or "").name
+    if not name:
+        raise HTTPException(status_code=400, detail="File name is required")
+    return os.path.join(folder, str(entity_id), name)
 
-    Args:
-        file: Загруженный файл
-        folder: Папка для сохранения (например, 'appeal' или 'comment')
-        entity_id: ID сущности, к которой относится файл
+
+def blob_key(sha256: str) -> str:
+    """Ключ содержимого в хранилище; префиксы не дают папкам разрастаться"""
+    return f"blobs/{sha256[:2]}/{sha256[2:4]}/{sha256}"
+
+
+def variant_key(sha256: str, variant: FileVariant) -> str:
+    """Ключ производного файла: рядом с содержимым оригинала"""
+    return f"{blob_key(sha256)}.{variant}.webp"
+
+
+def sniff_content_type(head: bytes, filename: str | None) -> str:
+    """
+    MIME-тип по первым байтам содержимого, а если формат не распознан -
+    по расширению имени файла
+    """
+    guessed = mimetypes.guess_type(filename or "")[0]
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    for signature, content_type in _SIGNATURES:
+        if head.startswith(signature):
+            return content_type
+    if head.startswith(b"PK\x03\x04"):
+        # docx, xlsx и другие офисные форматы - тоже zip, уточняем по имени
+        if guessed and guessed.startswith("application/vnd."):
+            return guessed
+        return "application/zip"
+    return guessed or DEFAULT_CONTENT_TYPE
+
+
+def hash_upload(file: UploadFile) -> tuple[str, int, str]:
+    """
+    sha256, размер и MIME-тип загруженного файла за один проход порциями
+
+    MAX_UPLOAD_SIZE проверяется по мере чтения. После подсчета файл
+    перематывается на начало.
+    """
+    reader = LimitedReader(file.file, file.filename or "")
+    digest = hashlib.sha256()
+    content_type = None
+    while chunk := reader.read(UPLOAD_CHUNK_SIZE):
+        if content_type is None:
+            content_type = sniff_content_type(chunk, file.filename)
+        digest.update(chunk)
+    file.file.seek(0)
+    return (
+        digest.hexdigest(),
+        reader.size,
+        content_type or sniff_content_type(b"", file.filename),
+    )
+
+
+def store_blob(*, file: UploadFile, sha256: str, force: bool) -> None:
+    """
+    Записывает содержимое в хранилище, если его там еще нет
+
+    force - блоб только что создан в БД, и содержимое нужно записать
+    без проверки наличия.
     """
-    # Создаем директорию если её нет
-    upload_dir = Path(settings.UPLOAD_DIR) / folder / str(entity_id)
-    upload_dir.mkdir(parents=True, exist_ok=True)
+    storage = get_storage()
+    key = blob_key(sha256)
+    if force or not storage.exists(key=key):
+        storage.save(key=key, source=file.file, filename=file.filename or "")
 
-    # Сохраняем файл с оригинальным именем
-    file_path = upload_dir / file.filename
 
-    with open(file_path, "wb") as buffer:
-        # Копируем содержимое файла
-        buffer.write(file.file.read())
+def delete_upload_file(*, file_path: str) -> None:
+    """Удаляет из хранилища файл, сохраненный до дедупликации, по его пути"""
+    get_storage().delete(key=file_path)
 
-    # Возвращаем относительный путь для сохранения в БД
-    return os.path.join(folder, str(entity_id), file.filename)
 
+def delete_blob(*, sha256: str) -> None:
+    storage = get_storage()
+    storage.delete(key=blob_key(sha256))
+    for variant in FILE_VARIANTS:
+        storage.delete(key=variant_key(sha256, variant))
+
+
+def _etag(
+    *, blob_sha256: str | None, variant: FileVariant | None, stat: ObjectStat
+) -> str:
+    # Содержимое блоба неизменно, его хэш - сильный ETag; у файлов до
+    # дедупликации ETag строится из размера и времени изменения
+    if blob_sha256:
+        return f'"{blob_sha256}.{variant}"' if variant else f'"{blob_sha256}"'
+    return f'"{stat.size:x}-{int(stat.modified.timestamp() * 1_000_000):x}"'
 
-def get_file_response(*, file_path: str) -> FileResponse:
+
+def _is_not_modified(request: Request, *, etag: str, stat: ObjectStat) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return "*" in tags or etag in tags
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        # Даты HTTP всегда в GMT; зона -0000 дает datetime без tzinfo
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        return stat.modified.replace(microsecond=0) <= since
+    return False
+
+
+def _requested_range(
+    request: Request, *, etag: str, size: int
+) -> tuple[int, int] | None:
     """
-    Создает FileResponse для загруженного файла
+    Запрошенный диапазон байтов (начало, конец включительно) или None,
+    если нужно отдать файл целиком
+    """
+    header = request.headers.get("range", "")
+    if not header.startswith("bytes="):
+        return None
+    # If-Range: диапазон действителен, только если файл не изменился
+    if_range = request.headers.get("if-range")
+    if if_range is not None and if_range != etag:
+        return None
+    spec = header.removeprefix("bytes=").strip()
+    # Несколько диапазонов сразу не поддерживаем и отдаем файл целиком,
+    # это допустимо по RFC 9110
+    if "," in spec:
+        return None
+    first, _, last = spec.partition("-")
+    try:
+        if first:
+            start = int(first)
+            end = int(last) if last else size - 1
+        else:
+            # bytes=-N - последние N байтов
+            start = max(size - int(last), 0)
+            end = size - 1
+    except ValueError:
+        return None
+    if start >= size or start > end:
+        raise HTTPException(
+            status_code=HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{size}"},
+        )
+    return start, min(end, size - 1)
+
+
+def _iter_range(path: Path, start: int, end: int) -> Iterator[bytes]:
+    with open(path, "rb") as file:
+        file.seek(start)
+        remaining = end - start + 1
+        while remaining > 0 and (
+            chunk := file.read(min(DOWNLOAD_CHUNK_SIZE, remaining))
+        ):
+            remaining -= len(chunk)
+            yield chunk
+
+
+async def get_file_response(
+    *,
+    request: Request,
+    file_path: str,
+    blob_sha256: str | None,
+    content_type: str | None = None,
+    variant: FileVariant | None = None,
+) -> Response:
+    """
+    Ответ для скачивания загруженного файла
+
+    - If-None-Match/If-Modified-Since: 304 без тела, если файл не изменился
+    - S3: редирект на presigned URL, содержимое отдает хранилище
+    - FILE_SENDFILE_HEADER: передача файла обратному прокси (nginx
+      X-Accel-Redirect или X-Sendfile), приложение отдает только заголовки
+    - иначе файл целиком или запрошенный диапазон (Range, 206)
 
     Args:
+        request: Запрос, из него берутся условные заголовки и Range
         file_path: Относительный путь к файлу (как сохранен в БД)
+        blob_sha256: Хэш содержимого; None у файлов до дедупликации
+        content_type: MIME-тип, определенный при загрузке
+        variant: Производный файл (миниатюра) вместо оригинала; должен
+            быть уже сгенерирован
     """
-    full_path = Path(settings.UPLOAD_DIR) / file_path
-
-    if not full_path.exists():
+    storage = get_storage()
+    # Оригинальное имя файла для скачивания
+    filename = Path(file_path).name
+    if variant and blob_sha256:
+        key = variant_key(blob_sha256, variant)
+        filename = f"{Path(filename).stem}.{variant}.webp"
+        content_type = VARIANT_CONTENT_TYPE
+    else:
+        key = blob_key(blob_sha256) if blob_sha256 else file_path
+    stat = await run_in_threadpool(storage.stat, key=key)
+    if stat is None:
         raise HTTPException(status_code=HTTP_404_NOT_FOUND, detail="File not found")
 
-    return FileResponse(
-        path=full_path,
-        filename=full_path.name,  # Оригинальное имя файла для скачивания
-        media_type=None,  # Автоопределение типа файла
+    content_type = content_type or sniff_content_type(b"", filename)
+    etag = _etag(blob_sha256=blob_sha256, variant=variant, stat=stat)
+    headers = {
+        "ETag": etag,
+        "Last-Modified": format_datetime(stat.modified, usegmt=True),
+        # Кэшировать можно, но перед использованием нужно проверить ETag:
+        # доступ к файлу проверяется на каждый запрос
+        "Cache-Control": "private, no-cache",
+        "Accept-Ranges": "bytes",
+        "X-Content-Type-Options": "nosniff",
+    }
+    if _is_not_modified(request, etag=etag, stat=stat):
+        return Response(status_code=304, headers=headers)
+
+    url = storage.download_url(key=key, filename=filename, content_type=content_type)
+    if url is not None:
+        return RedirectResponse(url, status_code=307)
+
+    headers["Content-Disposition"] = content_disposition(filename)
+    if settings.FILE_SENDFILE_HEADER == "X-Accel-Redirect":
+        location = f"{settings.FILE_ACCEL_REDIRECT_PREFIX.rstrip('/')}/{key}"
+        headers["X-Accel-Redirect"] = location
+        return Response(media_type=content_type, headers=headers)
+    path = storage.local_path(key=key)
+    if path is None:
+        # Хранилище без локальных файлов обязано отдавать прямые ссылки
+        raise RuntimeError(
+            f"{type(storage).__name__} returned neither a download URL nor a local path"
+        )
+    if settings.FILE_SENDFILE_HEADER == "X-Sendfile":
+        headers["X-Sendfile"] = str(path.resolve())
+        return Response(media_type=content_type, headers=headers)
+
+    byte_range = _requested_range(request, etag=etag, size=stat.size)
+    if byte_range is None:
+        return FileResponse(path=path, media_type=content_type, headers=headers)
+    start, end = byte_range
+    headers["Content-Range"] = f"bytes {start}-{end}/{stat.size}"
+    headers["Content-Length"] = str(end - start + 1)
+    return StreamingResponse(
+        _iter_range(path, start, end),
+        status_code=206,
+        media_type=content_type,
+        headers=headers,
     )
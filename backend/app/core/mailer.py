@@ -0,0 +1,309 @@
+import copy
+import io
+import re
+import smtplib
+import ssl
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from email.generator import BytesGenerator
+from email.message import EmailMessage
+from email.utils import getaddresses
+from functools import lru_cache
+from typing import Any
+
+from app.core.config import settings
+
+# Ошибки, после которых соединение выбрасывается и открывается заново
+_CONNECTION_ERRORS = (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError)
+# Точка в начале строки тела письма удваивается (RFC 5321, 4.5.2)
+_LEADING_DOT = re.compile(rb"^\.", re.MULTILINE)
+
+
+class RateLimiter:
+    """
+    Ограничение частоты отправки (token bucket): в среднем rate писем в
+    секунду, не больше burst подряд. rate <= 0 - без ограничения
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.burst, self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+@dataclass
+class MailerMetrics:
+    """Счетчики отправки; snapshot() - согласованный срез для логов"""
+
+    started_at: float = field(default_factory=time.monotonic)
+    sent: int = 0
+    failed: int = 0
+    pipelined: int = 0
+    connections_opened: int = 0
+    reconnects: int = 0
+    send_seconds: float = 0.0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def add(self, **counters: Any) -> None:
+        with self._lock:
+            for name, value in counters.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def snapshot(self) -> dict[str, float]:
+        with self._lock:
+            uptime = time.monotonic() - self.started_at
+            return {
+                "sent": self.sent,
+                "failed": self.failed,
+                "pipelined": self.pipelined,
+                "connections_opened": self.connections_opened,
+                "reconnects": self.reconnects,
+                "messages_per_second": self.sent / uptime if uptime else 0.0,
+                "avg_send_seconds": self.send_seconds / self.sent if self.sent else 0.0,
+            }
+
+
+def _reset(smtp: smtplib.SMTP) -> None:
+    # Сбрасываем незавершенную транзакцию, соединение остается в пуле
+    try:
+        smtp.rset()
+    except smtplib.SMTPServerDisconnected:
+        pass
+
+
+def _send_pipelined(smtp: smtplib.SMTP, message: EmailMessage) -> bool:
+    """
+    Отправка письма с PIPELINING (RFC 2920)
+
+    MAIL, все RCPT и DATA уходят одним пакетом, ответы читаются после:
+    письмо стоит два обмена с сервером вместо трех и больше. False, если
+    сервер не поддерживает PIPELINING или адреса требуют SMTPUTF8, - тогда
+    письмо нужно отправить обычным send_message.
+    """
+    smtp.ehlo_or_helo_if_needed()
+    from_addr = getaddresses([message["Sender"] or message["From"]])[0][1]
+    headers = [
+        value for name in ("To", "Cc", "Bcc") for value in message.get_all(name, [])
+    ]
+    recipients = [address for _, address in getaddresses(headers)]
+    if not smtp.has_extn("pipelining") or not all(
+        address.isascii() for address in (from_addr, *recipients)
+    ):
+        return False
+
+    commands = [
+        f"MAIL FROM:{smtplib.quoteaddr(from_addr)}",
+        *(f"RCPT TO:{smtplib.quoteaddr(address)}" for address in recipients),
+        "DATA",
+    ]
+    smtp.send("".join(f"{command}\r\n" for command in commands))
+    (mail_code, mail_reply), *rcpt_replies, (data_code, data_reply) = (
+        smtp.getreply() for _ in commands
+    )
+    refused = {
+        address: reply
+        for address, reply in zip(recipients, rcpt_replies, strict=True)
+        if reply[0] not in (250, 251)
+    }
+    if mail_code != 250 or len(refused) == len(recipients) or data_code != 354:
+        if data_code == 354:
+            # Сервер принял DATA без отправителя или получателей: завершаем
+            # пустые данные, чтобы вернуть соединение в исходное состояние
+            smtp.send(b".\r\n")
+            smtp.getreply()
+        _reset(smtp)
+        if mail_code != 250:
+            raise smtplib.SMTPSenderRefused(mail_code, mail_reply, from_addr)
+        if len(refused) == len(recipients):
+            raise smtplib.SMTPRecipientsRefused(refused)
+        raise smtplib.SMTPDataError(data_code, data_reply)
+
+    if "Bcc" in message:
+        # Скрытые получатели не попадают в заголовки доставленного письма
+        message = copy.copy(message)
+        del message["Bcc"]
+    buffer = io.BytesIO()
+    BytesGenerator(buffer).flatten(message, linesep="\r\n")
+    data = _LEADING_DOT.sub(b"..", buffer.getvalue())
+    if not data.endswith(b"\r\n"):
+        data += b"\r\n"
+    smtp.send(data + b".\r\n")
+    code, reply = smtp.getreply()
+    if code != 250:
+        _reset(smtp)
+        raise smtplib.SMTPDataError(code, reply)
+    return True
+
+
+@dataclass(eq=False)
+class _Connection:
+    smtp: smtplib.SMTP
+    messages: int = 0
+    last_used: float = field(default_factory=time.monotonic)
+
+
+class Mailer:
+    """
+    Отправка писем через пул постоянных SMTP-соединений одного провайдера
+
+    Каждый из pool_size потоков держит свое авторизованное соединение и
+    отправляет по нему письма одно за другим: рукопожатие, STARTTLS и AUTH
+    выполняются один раз на соединение, а не на каждое письмо, а команды
+    письма отправляются конвейером, если сервер поддерживает PIPELINING.
+    Соединение переоткрывается после max_messages писем, после простоя
+    дольше idle_timeout и при обрыве. Частота отправки ограничивается для
+    провайдера в целом, а не для отдельного соединения.
+    """
+
+    def __init__(
+        self,
+        *,
+        host: str,
+        port: int,
+        user: str | None = None,
+        password: str | None = None,
+        use_tls: bool = False,
+        use_ssl: bool = False,
+        pool_size: int = 1,
+        rate_limit: float = 0,
+        timeout: float = 30,
+        max_messages: int = 100,
+        idle_timeout: float = 60,
+    ):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.use_tls = use_tls
+        self.use_ssl = use_ssl
+        self.timeout = timeout
+        self.max_messages = max_messages
+        self.idle_timeout = idle_timeout
+        self.limiter = RateLimiter(rate_limit, burst=pool_size)
+        self.metrics = MailerMetrics()
+        self._executor = ThreadPoolExecutor(
+            max_workers=pool_size, thread_name_prefix="smtp"
+        )
+        self._local = threading.local()
+        self._connections: set[_Connection] = set()
+        self._lock = threading.Lock()
+
+    def _connect(self) -> _Connection:
+        context = ssl.create_default_context()
+        if self.use_ssl:
+            smtp: smtplib.SMTP = smtplib.SMTP_SSL(
+                self.host, self.port, timeout=self.timeout, context=context
+            )
+        else:
+            smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+            if self.use_tls:
+                smtp.starttls(context=context)
+        if self.user:
+            smtp.login(self.user, self.password or "")
+        connection = _Connection(smtp)
+        with self._lock:
+            self._connections.add(connection)
+        self.metrics.add(connections_opened=1)
+        return connection
+
+    def _discard(self, connection: _Connection) -> None:
+        with self._lock:
+            self._connections.discard(connection)
+        try:
+            connection.smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            connection.smtp.close()
+
+    def _connection(self) -> _Connection:
+        connection: _Connection | None = getattr(self._local, "connection", None)
+        if connection is not None and (
+            connection.messages >= self.max_messages
+            or time.monotonic() - connection.last_used > self.idle_timeout
+        ):
+            self._discard(connection)
+            connection = None
+        if connection is None:
+            connection = self._local.connection = self._connect()
+        return connection
+
+    def _deliver(self, connection: _Connection, message: EmailMessage) -> None:
+        if _send_pipelined(connection.smtp, message):
+            self.metrics.add(pipelined=1)
+        else:
+            connection.smtp.send_message(message)
+
+    def _send(self, message: EmailMessage) -> None:
+        self.limiter.acquire()
+        started = time.monotonic()
+        try:
+            connection = self._connection()
+            try:
+                self._deliver(connection, message)
+            except _CONNECTION_ERRORS:
+                # Сервер закрыл соединение, пока оно простаивало в пуле
+                self._discard(connection)
+                self._local.connection = None
+                self.metrics.add(reconnects=1)
+                connection = self._local.connection = self._connect()
+                self._deliver(connection, message)
+        except Exception:
+            self.metrics.add(failed=1)
+            raise
+        connection.messages += 1
+        connection.last_used = time.monotonic()
+        self.metrics.add(sent=1, send_seconds=time.monotonic() - started)
+
+    def submit(self, message: EmailMessage) -> Future[None]:
+        """Ставит письмо в очередь пула; ошибка отправки - в Future"""
+        return self._executor.submit(self._send, message)
+
+    def send(self, message: EmailMessage) -> None:
+        """Отправляет письмо и ждет результата"""
+        self.submit(message).result()
+
+    def close(self) -> None:
+        """Дожидается отправки очереди и закрывает соединения"""
+        self._executor.shutdown(wait=True)
+        with self._lock:
+            connections = list(self._connections)
+        for connection in connections:
+            self._discard(connection)
+
+
+@lru_cache
+def get_mailer() -> Mailer:
+    """Пул соединений с SMTP-сервером из настроек, общий для процесса"""
+    assert settings.SMTP_HOST, "no provided configuration for email variables"
+    return Mailer(
+        host=settings.SMTP_HOST,
+        port=settings.SMTP_PORT,
+        user=settings.SMTP_USER,
+        password=settings.SMTP_PASSWORD,
+        use_tls=settings.SMTP_TLS,
+        use_ssl=settings.SMTP_SSL and not settings.SMTP_TLS,
+        pool_size=settings.SMTP_POOL_SIZE,
+        rate_limit=settings.SMTP_RATE_LIMIT_PER_SECOND,
+        timeout=settings.SMTP_TIMEOUT_SECONDS,
+        max_messages=settings.SMTP_MAX_MESSAGES_PER_CONNECTION,
+        idle_timeout=settings.SMTP_IDLE_TIMEOUT_SECONDS,
+    )
@@ -1,11 +1,25 @@
-from typing import Generic, TypeVar
+import base64
+import hashlib
+import hmac
+import json
+from collections.abc import Sequence
+from datetime import date, datetime
+from typing import Any, Generic, Literal, TypeVar
 from uuid import UUID
 
-from fastapi import Query
+from fastapi import HTTPException, Query
+from sqlalchemy import tuple_
 from sqlmodel import Session, SQLModel, func, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.models.common import CountStrategy
 
 T = TypeVar("T")
 
+CursorDirection = Literal["next", "prev"]
+
 
 class PaginationParams(SQLModel):
     # Параметры страничной пагинации
@@ -15,10 +29,20 @@ class PaginationParams(SQLModel):
     )
 
     # Параметры курсор-пагинации
-    cursor: UUID | None = Query(
-        default=None, description="ID последнего элемента предыдущей страницы"
+    cursor: str | None = Query(
+        default=None,
+        description="Непрозрачный курсор из next_cursor/prev_cursor предыдущего ответа",
+    )
+    # Если указан cursor, будет использоваться этот лимит
+    limit: int | None = Query(
+        default=None,
+        ge=1,
+        le=100,
+        description="Количество элементов на странице при курсор-пагинации",
+    )
+    count: CountStrategy = Query(
+        default="estimated", description="Способ подсчета общего количества"
     )
-    limit: int | None = None  # Если указан cursor, будет использоваться этот лимит
 
     def get_limit(self) -> int:
         """Возвращает актуальный размер страницы"""
@@ -27,6 +51,18 @@ class PaginationParams(SQLModel):
         return self.per_page
 
 
+class CursorParams(SQLModel):
+    """Параметры keyset-пагинации списков"""
+
+    cursor: str | None = Query(
+        default=None,
+        description="Непрозрачный курсор из next_cursor/prev_cursor предыдущего ответа",
+    )
+    limit: int = Query(
+        default=20, ge=1, le=100, description="Количество элементов на странице"
+    )
+
+
 class PaginatedResponse(SQLModel, Generic[T]):
     items: list[T]
     # Поля для страничной пагинации
@@ -34,51 +70,365 @@ class PaginatedResponse(SQLModel, Generic[T]):
     page: int | None = None
     per_page: int | None = None
     total_pages: int | None = None
+    # total получен оценкой планировщика, а не точным подсчетом
+    total_is_estimate: bool | None = None
     has_prev: bool | None = None
     # Поля для курсор-пагинации
-    next_cursor: UUID | None = None
+    next_cursor: str | None = None
+    prev_cursor: str | None = None
     has_next: bool
 
 
-def paginate_query(
-    session: Session,
-    query: select,
-    params: PaginationParams,
-) -> PaginatedResponse:
+class SortKey:
     """
-    Универсальная функция пагинации для SQLModel запросов
+    Колонка ключа сортировки keyset-пагинации
 
-    Поддерживает как страничную, так и курсор-пагинацию
+    Последняя колонка ключа должна быть уникальной (обычно id), иначе
+    строки с одинаковыми значениями ключа могут потеряться между страницами.
     """
-    # Если используется курсор-пагинация
-    if params.cursor:
-        # Не делаем запрос для подсчета total
-        query = query.where(query.primary_key > params.cursor)
-        items = session.exec(query.limit(params.get_limit())).all()
 
-        has_next = len(items) == params.get_limit()
-        next_cursor = items[-1].id if has_next and items else None
+    __slots__ = ("column", "descending")
+
+    def __init__(self, column: Any, *, descending: bool = False):
+        self.column = column
+        self.descending = descending
+
+    @property
+    def name(self) -> str:
+        key: str = self.column.key
+        return key
+
+
+def _encode_value(value: Any) -> Any:
+    # JSON не различает строку, UUID и дату, поэтому помечаем тип значения
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    if isinstance(value, date):
+        return {"d": value.isoformat()}
+    if isinstance(value, UUID):
+        return {"uuid": str(value)}
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        if "dt" in value:
+            return datetime.fromisoformat(value["dt"])
+        if "d" in value:
+            return date.fromisoformat(value["d"])
+        if "uuid" in value:
+            return UUID(value["uuid"])
+    return value
+
+
+def _sign(payload: bytes) -> str:
+    digest = hmac.new(settings.SECRET_KEY.encode(), payload, hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest[:16]).decode().rstrip("=")
 
-        return PaginatedResponse(
-            items=items, has_next=has_next, next_cursor=next_cursor
-        )
 
-    # Для страничной пагинации считаем total
-    total = session.exec(select(func.count()).select_from(query.subquery())).one()
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
 
-    # Страничная пагинация
-    items = session.exec(
-        query.offset((params.page - 1) * params.per_page).limit(params.per_page)
-    ).all()
 
-    total_pages = (total + params.per_page - 1) // params.per_page
+def encode_cursor(
+    keys: Sequence[SortKey], values: Sequence[Any], direction: CursorDirection
+) -> str:
+    """Кодирует позицию в списке в подписанный непрозрачный курсор"""
+    payload = json.dumps(
+        {
+            "k": [key.name for key in keys],
+            "v": [_encode_value(value) for value in values],
+            "d": direction,
+        },
+        separators=(",", ":"),
+    ).encode()
+    body = base64.urlsafe_b64encode(payload).decode().rstrip("=")
+    return f"{body}.{_sign(payload)}"
+
+
+def decode_cursor(
+    keys: Sequence[SortKey], cursor: str
+) -> tuple[list[Any], CursorDirection]:
+    """Проверяет подпись курсора и возвращает значения ключа и направление"""
+    try:
+        body, signature = cursor.split(".", 1)
+        payload = _b64decode(body)
+        if not hmac.compare_digest(signature, _sign(payload)):
+            raise ValueError("bad signature")
+        data = json.loads(payload)
+        values = [_decode_value(value) for value in data["v"]]
+        direction = data["d"]
+        # Курсор выдан для другого списка или другой сортировки
+        if data["k"] != [key.name for key in keys] or len(values) != len(keys):
+            raise ValueError("sort keys mismatch")
+        if direction not in ("next", "prev"):
+            raise ValueError("bad direction")
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values, direction
+
+
+def _keyset_statement(
+    query: Any,
+    keys: Sequence[SortKey],
+    params: CursorParams,
+) -> tuple[Any, CursorDirection]:
+    if len({key.descending for key in keys}) != 1:
+        raise ValueError("All keyset sort keys must share one direction")
+    descending = keys[0].descending
+    direction: CursorDirection = "next"
+
+    if params.cursor:
+        values, direction = decode_cursor(keys, params.cursor)
+        columns = tuple_(*(key.column for key in keys))
+        bound = tuple_(*values)
+        # Сравнение кортежей (a, b) > (x, y) использует составной индекс
+        forward = direction == "next"
+        if descending == forward:
+            query = query.where(columns < bound)
+        else:
+            query = query.where(columns > bound)
+
+    reverse = (direction == "prev") != descending
+    order = [key.column.desc() if reverse else key.column.asc() for key in keys]
+    # Берем на одну строку больше, чтобы узнать, есть ли следующая страница
+    query = query.order_by(None).order_by(*order).limit(params.limit + 1)
+    return query, direction
+
+
+def _keyset_page(
+    rows: Sequence[Any],
+    keys: Sequence[SortKey],
+    params: CursorParams,
+    direction: CursorDirection,
+) -> PaginatedResponse[Any]:
+    items = list(rows[: params.limit])
+    has_more = len(rows) > params.limit
+    if direction == "prev":
+        items.reverse()
+        has_next, has_prev = True, has_more
+    else:
+        has_next, has_prev = has_more, params.cursor is not None
+
+    def cursor_for(item: Any, to: CursorDirection) -> str:
+        return encode_cursor(keys, [getattr(item, key.name) for key in keys], to)
 
     return PaginatedResponse(
         items=items,
+        has_next=has_next,
+        has_prev=has_prev,
+        next_cursor=cursor_for(items[-1], "next") if has_next and items else None,
+        prev_cursor=cursor_for(items[0], "prev") if has_prev and items else None,
+    )
+
+
+def paginate_keyset(
+    session: Session,
+    query: Any,
+    keys: Sequence[SortKey],
+    params: CursorParams,
+) -> PaginatedResponse[Any]:
+    """
+    Keyset-пагинация: страница отбирается условием по ключу сортировки,
+    а не OFFSET, поэтому любая страница стоит столько же, сколько первая
+    """
+    statement, direction = _keyset_statement(query, keys, params)
+    rows = session.exec(statement).all()
+    return _keyset_page(rows, keys, params, direction)
+
+
+async def paginate_keyset_async(
+    session: AsyncSession,
+    query: Any,
+    keys: Sequence[SortKey],
+    params: CursorParams,
+) -> PaginatedResponse[Any]:
+    """Асинхронная keyset-пагинация"""
+    statement, direction = _keyset_statement(query, keys, params)
+    result = await session.exec(statement)
+    return _keyset_page(result.all(), keys, params, direction)
+
+
+# Точные количества по отпечатку запроса (SQL + параметры)
+count_cache: TTLCache[str, int] = TTLCache(
+    maxsize=settings.PAGINATION_COUNT_CACHE_MAXSIZE,
+    ttl=settings.PAGINATION_COUNT_CACHE_TTL_SECONDS,
+)
+
+
+def _count_statement(query: Any) -> Any:
+    return select(func.count()).select_from(query.order_by(None).subquery())
+
+
+def _compile_for_driver(query: Any, dialect: Any) -> tuple[str, Any]:
+    """
+    SQL запроса и параметры в виде, который примет драйвер напрямую
+
+    Списки IN раскрываются в отдельные параметры (render_postcompile): иначе
+    в тексте остается заглушка __[POSTCOMPILE_...], которую понимает только
+    execute SQLAlchemy. Для позиционных драйверов (asyncpg) параметры
+    выстраиваются по порядку.
+    """
+    compiled = query.order_by(None).compile(
+        dialect=dialect, compile_kwargs={"render_postcompile": True}
+    )
+    params: Any = compiled.params
+    if compiled.positional:
+        params = tuple(params[name] for name in compiled.positiontup)
+    return str(compiled), params
+
+
+def _query_fingerprint(query: Any, dialect: Any) -> str:
+    sql, params = _compile_for_driver(query, dialect)
+    if isinstance(params, dict):
+        params = sorted(params.items())
+    return hashlib.sha256(f"{sql}|{params!r}".encode()).hexdigest()
+
+
+def _plan_rows(plan: Any) -> int:
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def _estimated_count(session: Session, query: Any) -> int:
+    """Оценка количества строк из плана запроса Postgres, без его выполнения"""
+    connection = session.connection()
+    sql, params = _compile_for_driver(query, connection.dialect)
+    plan = connection.exec_driver_sql(
+        f"EXPLAIN (FORMAT JSON) {sql}", params
+    ).scalar_one()
+    return _plan_rows(plan)
+
+
+async def _estimated_count_async(session: AsyncSession, query: Any) -> int:
+    connection = await session.connection()
+    sql, params = _compile_for_driver(query, connection.dialect)
+    result = await connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {sql}", params)
+    return _plan_rows(result.scalar_one())
+
+
+def count_total(
+    session: Session, query: Any, strategy: CountStrategy
+) -> tuple[int | None, bool]:
+    """
+    Общее количество строк запроса по выбранной стратегии
+
+    Возвращает количество (None для стратегии none) и признак того,
+    что это оценка, а не точное значение.
+    """
+    if strategy == "none":
+        return None, False
+    if strategy == "estimated":
+        return _estimated_count(session, query), True
+    if strategy == "cached":
+        key = _query_fingerprint(query, session.get_bind().dialect)
+        total = count_cache.get(key)
+        if total is None:
+            total = session.exec(_count_statement(query)).one()
+            count_cache.set(key, total)
+        return total, False
+    return session.exec(_count_statement(query)).one(), False
+
+
+async def count_total_async(
+    session: AsyncSession, query: Any, strategy: CountStrategy
+) -> tuple[int | None, bool]:
+    """Асинхронный подсчет строк запроса по выбранной стратегии"""
+    if strategy == "none":
+        return None, False
+    if strategy == "estimated":
+        return await _estimated_count_async(session, query), True
+    if strategy == "cached":
+        key = _query_fingerprint(query, session.get_bind().dialect)
+        total = count_cache.get(key)
+        if total is None:
+            total = (await session.exec(_count_statement(query))).one()
+            count_cache.set(key, total)
+        return total, False
+    return (await session.exec(_count_statement(query))).one(), False
+
+
+def _page_statement(
+    query: Any, params: PaginationParams, keys: Sequence[SortKey] | None
+) -> Any:
+    if keys is not None:
+        query = query.order_by(None).order_by(
+            *(key.column.desc() if key.descending else key.column.asc() for key in keys)
+        )
+    # Лишняя строка показывает, есть ли следующая страница, без опоры на
+    # приблизительный или отсутствующий total
+    return query.offset((params.page - 1) * params.per_page).limit(params.per_page + 1)
+
+
+def _page(
+    rows: Sequence[Any],
+    params: PaginationParams,
+    total: int | None,
+    is_estimate: bool,
+) -> PaginatedResponse[Any]:
+    total_pages = None
+    if total is not None:
+        total_pages = (total + params.per_page - 1) // params.per_page
+
+    return PaginatedResponse(
+        items=list(rows[: params.per_page]),
         total=total,
         page=params.page,
         per_page=params.per_page,
         total_pages=total_pages,
+        total_is_estimate=is_estimate if total is not None else None,
         has_prev=params.page > 1,
-        has_next=params.page < total_pages,
+        has_next=len(rows) > params.per_page,
     )
+
+
+def _cursor_params(params: PaginationParams) -> CursorParams:
+    return CursorParams(cursor=params.cursor, limit=params.get_limit())
+
+
+def _default_keys(query: Any) -> list[SortKey]:
+    entity = query.column_descriptions[0]["entity"]
+    return [SortKey(entity.id)]
+
+
+def paginate_query(
+    session: Session,
+    query: Any,
+    params: PaginationParams,
+    keys: Sequence[SortKey] | None = None,
+) -> PaginatedResponse[Any]:
+    """
+    Универсальная функция пагинации для SQLModel запросов
+
+    Поддерживает как страничную, так и курсор-пагинацию. Для курсорной
+    пагинации нужен ключ сортировки; по умолчанию это первичный ключ.
+    Страницы сортируются по тому же ключу, если он передан.
+    """
+    # Если используется курсор-пагинация
+    if params.cursor:
+        # Не делаем запрос для подсчета total
+        return paginate_keyset(
+            session, query, keys or _default_keys(query), _cursor_params(params)
+        )
+
+    total, is_estimate = count_total(session, query, params.count)
+    rows = session.exec(_page_statement(query, params, keys)).all()
+    return _page(rows, params, total, is_estimate)
+
+
+async def paginate_query_async(
+    session: AsyncSession,
+    query: Any,
+    params: PaginationParams,
+    keys: Sequence[SortKey] | None = None,
+) -> PaginatedResponse[Any]:
+    """Асинхронная страничная или курсор-пагинация"""
+    if params.cursor:
+        return await paginate_keyset_async(
+            session, query, keys or _default_keys(query), _cursor_params(params)
+        )
+
+    total, is_estimate = await count_total_async(session, query, params.count)
+    result = await session.exec(_page_statement(query, params, keys))
+    return _page(result.all(), params, total, is_estimate)
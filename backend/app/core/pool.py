@@ -0,0 +1,81 @@
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any
+
+from sqlalchemy import exc
+from sqlalchemy.pool import Pool
+
+# Метрики всех инструментированных пулов процесса, по имени пула
+POOL_METRICS: dict[str, "PoolMetrics"] = {}
+
+
+@dataclass
+class PoolMetrics:
+    """Счетчики выдачи соединений из пула"""
+
+    name: str
+    checkouts: int = 0
+    timeouts: int = 0
+    wait_total: float = 0.0
+    wait_max: float = 0.0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def record_checkout(self, wait: float) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.wait_total += wait
+            self.wait_max = max(self.wait_max, wait)
+
+    def record_timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+    def snapshot(self, pool: Pool | None = None) -> dict[str, Any]:
+        """Текущее состояние счетчиков и, если передан пул, его заполненность"""
+        with self._lock:
+            data: dict[str, Any] = {
+                "name": self.name,
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_avg_ms": (
+                    self.wait_total / self.checkouts * 1000 if self.checkouts else 0.0
+                ),
+                "wait_max_ms": self.wait_max * 1000,
+            }
+        if pool is not None:
+            data["pool_class"] = getattr(pool, "base_name", type(pool).__name__)
+            for attr in ("size", "checkedin", "checkedout", "overflow"):
+                method = getattr(pool, attr, None)
+                data[attr] = method() if callable(method) else None
+        return data
+
+
+class _InstrumentedPoolMixin:
+    metrics: PoolMetrics
+    base_name: str
+
+    def connect(self) -> Any:
+        start = time.perf_counter()
+        try:
+            connection = super().connect()  # type: ignore[misc]
+        except exc.TimeoutError:
+            self.metrics.record_timeout()
+            raise
+        self.metrics.record_checkout(time.perf_counter() - start)
+        return connection
+
+
+def instrumented_pool_class(base: type[Pool], name: str) -> type[Pool]:
+    """
+    Создает подкласс пула, который учитывает время ожидания соединения
+
+    Метрики хранятся на классе, поэтому переживают pool.recreate()
+    (например, при engine.dispose()).
+    """
+    metrics = POOL_METRICS.setdefault(name, PoolMetrics(name=name))
+    return type(
+        f"Instrumented{base.__name__}",
+        (_InstrumentedPoolMixin, base),
+        {"metrics": metrics, "base_name": base.__name__},
+    )
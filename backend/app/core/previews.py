@@ -0,0 +1,125 @@
+import asyncio
+import io
+import logging
+from concurrent.futures import Future
+from functools import lru_cache
+from importlib.util import find_spec
+from typing import Any
+
+from PIL import Image, ImageOps
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.files import blob_key, variant_key
+from app.core.storage import get_storage
+from app.core.workers import get_process_pool
+from app.models.file_blob import FileVariant
+
+logger = logging.getLogger(__name__)
+
+# Форматы, которые Pillow открывает без дополнительных зависимостей
+PREVIEW_IMAGE_TYPES = frozenset({"image/png", "image/jpeg", "image/gif", "image/webp"})
+PDF_CONTENT_TYPE = "application/pdf"
+THUMBNAIL_QUALITY = 75
+
+
+@lru_cache
+def _pdf_supported() -> bool:
+    # pypdfium2 необязателен: без него у PDF просто нет миниатюр
+    return find_spec("pypdfium2") is not None
+
+
+def has_preview(content_type: str) -> bool:
+    """Можно ли построить миниатюру для файла такого типа"""
+    if content_type in PREVIEW_IMAGE_TYPES:
+        return True
+    return content_type == PDF_CONTENT_TYPE and _pdf_supported()
+
+
+def _render_pdf_page(data: bytes) -> Image.Image:
+    import pypdfium2  # type: ignore[import-untyped]
+
+    pdf = pypdfium2.PdfDocument(data)
+    try:
+        page = pdf[0]
+        # Страница сразу рендерится в размере миниатюры
+        scale = settings.THUMBNAIL_SIZE / max(page.get_size())
+        image: Image.Image = page.render(scale=scale).to_pil()
+        return image
+    finally:
+        pdf.close()
+
+
+def _open_image(data: bytes, content_type: str) -> Image.Image:
+    if content_type == PDF_CONTENT_TYPE:
+        return _render_pdf_page(data)
+    image = Image.open(io.BytesIO(data))
+    # Размеры известны из заголовка до декодирования пикселей
+    if image.width * image.height > settings.THUMBNAIL_MAX_SOURCE_PIXELS:
+        raise ValueError(f"Image is too large: {image.width}x{image.height}")
+    # JPEG декодируется сразу в уменьшенном масштабе (1/2 - 1/8)
+    image.draft("RGB", (settings.THUMBNAIL_SIZE, settings.THUMBNAIL_SIZE))
+    return image
+
+
+def make_thumbnail(data: bytes, content_type: str) -> bytes:
+    """
+    Миниатюра в WebP, вписанная в квадрат THUMBNAIL_SIZE: первый кадр
+    анимации, первая страница PDF, с учетом поворота из EXIF
+    """
+    image = _open_image(data, content_type)
+    image.thumbnail((settings.THUMBNAIL_SIZE, settings.THUMBNAIL_SIZE))
+    image = ImageOps.exif_transpose(image)
+    image = image.convert("RGBA" if image.has_transparency_data else "RGB")
+    buffer = io.BytesIO()
+    image.save(buffer, format="WEBP", quality=THUMBNAIL_QUALITY)
+    return buffer.getvalue()
+
+
+def render_variants(sha256: str, content_type: str) -> bool:
+    """
+    Точка входа процесса пула: строит производные файлы блоба и
+    сохраняет их в хранилище рядом с оригиналом
+
+    Возвращает False, если файл не удалось прочитать как изображение.
+    """
+    storage = get_storage()
+    try:
+        with storage.open(key=blob_key(sha256)) as source:
+            data = source.read()
+        thumbnail = make_thumbnail(data, content_type)
+    except Exception:
+        logger.exception("Failed to render preview of blob %s", sha256)
+        return False
+    storage.save(
+        key=variant_key(sha256, "thumb"),
+        source=io.BytesIO(thumbnail),
+        filename=f"{sha256}.thumb.webp",
+    )
+    return True
+
+
+def schedule_variants(*, sha256: str, content_type: str) -> Future[Any] | None:
+    """Ставит генерацию миниатюр нового блоба в пул процессов"""
+    if not has_preview(content_type):
+        return None
+    return get_process_pool().submit(render_variants, sha256, content_type)
+
+
+async def ensure_variant_async(
+    *, sha256: str, content_type: str, variant: FileVariant
+) -> bool:
+    """
+    Проверяет, что производный файл есть в хранилище, и при необходимости
+    строит его (файлы, загруженные до появления миниатюр, или задача пула
+    еще не завершилась)
+
+    Возвращает False, если для файла такого типа миниатюры не бывает.
+    """
+    if not has_preview(content_type):
+        return False
+    storage = get_storage()
+    if await run_in_threadpool(storage.exists, key=variant_key(sha256, variant)):
+        return True
+    future = get_process_pool().submit(render_variants, sha256, content_type)
+    return await asyncio.wrap_future(future)
@@ -0,0 +1,57 @@
+from collections.abc import Iterable
+from uuid import UUID
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+
+
+class Principal:
+    """
+    Минимальные данные о пользователе, нужные для авторизации запроса
+
+    В отличие от ORM-модели User не тянет за собой связи и не привязан
+    к сессии, поэтому может переиспользоваться между запросами.
+    """
+
+    __slots__ = (
+        "id",
+        "is_active",
+        "is_superuser",
+        "organization_id",
+        "controlled_organization_ids",
+    )
+
+    def __init__(
+        self,
+        *,
+        id: UUID,
+        is_active: bool,
+        is_superuser: bool,
+        organization_id: UUID | None = None,
+        controlled_organization_ids: Iterable[UUID] = (),
+    ) -> None:
+        self.id = id
+        self.is_active = is_active
+        self.is_superuser = is_superuser
+        # Организация, которую пользователь представляет (если представитель)
+        self.organization_id = organization_id
+        # Организации, закрепленные за пользователем-специалистом
+        self.controlled_organization_ids = frozenset(controlled_organization_ids)
+
+    @property
+    def is_representative(self) -> bool:
+        return self.organization_id is not None
+
+    def __repr__(self) -> str:
+        return f"Principal(id={self.id}, is_superuser={self.is_superuser})"
+
+
+principal_cache: TTLCache[UUID, Principal] = TTLCache(
+    maxsize=settings.PRINCIPAL_CACHE_MAXSIZE,
+    ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+)
+
+
+def invalidate_principal(user_id: UUID) -> None:
+    """Сбрасывает закэшированного принципала после изменения пользователя"""
+    principal_cache.pop(user_id)
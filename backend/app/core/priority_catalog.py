@@ -0,0 +1,43 @@
+from collections.abc import Mapping
+from dataclasses import dataclass
+from uuid import UUID
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+
+
+@dataclass(frozen=True, slots=True)
+class ResolvedPriority:
+    """
+    Приоритет, действующий для организации по ее актуальному договору
+
+    Ссылка ровно на один из приоритетов: индивидуальный приоритет договора
+    перекрывает стандартный с тем же названием.
+    """
+
+    name: str
+    hours: int
+    standard_priority_id: UUID | None = None
+    individual_priority_id: UUID | None = None
+
+
+# Каталог приоритетов организации: название -> действующий приоритет
+PriorityCatalog = Mapping[str, ResolvedPriority]
+
+priority_catalog_cache: TTLCache[UUID, PriorityCatalog] = TTLCache(
+    maxsize=settings.PRIORITY_CATALOG_CACHE_MAXSIZE,
+    ttl=settings.PRIORITY_CATALOG_CACHE_TTL_SECONDS,
+)
+
+
+def invalidate_priority_catalog(organization_id: UUID | None = None) -> None:
+    """
+    Сбрасывает закэшированный каталог приоритетов организации
+
+    Без organization_id сбрасываются каталоги всех организаций: стандартный
+    приоритет может входить в договоры любых организаций.
+    """
+    if organization_id is None:
+        priority_catalog_cache.clear()
+    else:
+        priority_catalog_cache.pop(organization_id)
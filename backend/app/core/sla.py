@@ -0,0 +1,192 @@
+import heapq
+from collections.abc import Iterable
+from dataclasses import dataclass, field, replace
+from datetime import UTC, datetime, timedelta
+from typing import Literal
+from uuid import UUID
+
+# Интервал остановки; None в конце - остановка еще не снята
+Interval = tuple[datetime, datetime | None]
+
+
+def naive_utc(value: datetime) -> datetime:
+    """Время в UTC без часового пояса, как хранятся даты обращений"""
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(UTC).replace(tzinfo=None)
+
+
+def merge_intervals(intervals: Iterable[Interval]) -> list[Interval]:
+    """
+    Объединяет пересекающиеся и смежные интервалы
+
+    Один проход по интервалам, отсортированным по началу; открытый интервал
+    поглощает все, что начинается после него.
+    """
+    merged: list[Interval] = []
+    normalized = ((naive_utc(s), naive_utc(e) if e else None) for s, e in intervals)
+    for start, end in sorted(normalized, key=lambda interval: interval[0]):
+        if merged:
+            last_start, last_end = merged[-1]
+            if last_end is None:
+                break
+            if start <= last_end:
+                merged[-1] = (last_start, None if end is None else max(last_end, end))
+                continue
+        merged.append((start, end))
+    return merged
+
+
+@dataclass(frozen=True)
+class SlaState:
+    """
+    Срок решения обращения
+
+    paused_seconds - на сколько срок сдвинули завершенные остановки,
+    paused_since - начало остановки, которая еще не снята. У остановленного
+    и у решенного обращения deadline не определен: срок не может истечь.
+    """
+
+    opened_at: datetime
+    hours: int | None = None
+    paused_seconds: int = 0
+    paused_since: datetime | None = None
+    deadline: datetime | None = None
+
+    @property
+    def due_at(self) -> datetime | None:
+        """Срок без учета незавершенной остановки"""
+        if self.hours is None:
+            return None
+        return self.opened_at + timedelta(hours=self.hours, seconds=self.paused_seconds)
+
+    def remaining(self, now: datetime) -> timedelta | None:
+        """Оставшееся время; отрицательное - срок нарушен"""
+        due_at = self.due_at
+        if due_at is None:
+            return None
+        # Пока обращение остановлено, остаток не убывает
+        until = self.paused_since if self.paused_since is not None else now
+        return due_at - naive_utc(until)
+
+
+def compute_sla(
+    *,
+    opened_at: datetime,
+    hours: int | None,
+    intervals: Iterable[Interval],
+    resolved: bool = False,
+) -> SlaState:
+    """
+    Срок решения по нормативу приоритета и остановкам обращения
+
+    Объединенные остановки просматриваются по порядку, каждая сдвигает срок
+    на свою длительность. Остановки до открытия обращения обрезаются, после
+    истечения срока - не учитываются: нарушенный срок они не восстанавливают.
+    """
+    opened_at = naive_utc(opened_at)
+    if hours is None:
+        return SlaState(opened_at=opened_at)
+    due_at = opened_at + timedelta(hours=hours)
+    paused = timedelta()
+    for start, end in merge_intervals(intervals):
+        if end is not None and end <= opened_at:
+            continue
+        start = max(start, opened_at)
+        if start >= due_at:
+            break
+        if end is None:
+            return SlaState(
+                opened_at=opened_at,
+                hours=hours,
+                paused_seconds=int(paused.total_seconds()),
+                paused_since=start,
+            )
+        paused += end - start
+        due_at += end - start
+    state = SlaState(
+        opened_at=opened_at, hours=hours, paused_seconds=int(paused.total_seconds())
+    )
+    return state if resolved else replace(state, deadline=state.due_at)
+
+
+SlaEvent = Literal["sla_warning", "sla_breached"]
+
+
+@dataclass(frozen=True, order=True)
+class SlaAlarm:
+    """Срабатывание: предупреждение до срока или нарушение срока"""
+
+    fire_at: datetime
+    appeal_id: UUID = field(compare=False)
+    event: SlaEvent = field(compare=False)
+    deadline: datetime = field(compare=False)
+
+
+class DeadlineHeap:
+    """
+    Ближайшие срабатывания по срокам обращений (min-heap)
+
+    На обращение в куче не больше двух записей: предупреждение за warning до
+    срока и нарушение в сам срок. При изменении срока старые записи не
+    ищутся в куче: они отбрасываются, когда оказываются на вершине, если срок
+    обращения с тех пор изменился.
+    """
+
+    def __init__(self, warning: timedelta):
+        self.warning = warning
+        self._heap: list[SlaAlarm] = []
+        self._deadlines: dict[UUID, datetime] = {}
+
+    def __len__(self) -> int:
+        return len(self._deadlines)
+
+    def schedule(
+        self,
+        appeal_id: UUID,
+        deadline: datetime | None,
+        *,
+        warned: bool = False,
+        breached: bool = False,
+    ) -> None:
+        """Новый срок обращения; None - обращение больше не отслеживается"""
+        if deadline is None or breached:
+            self._deadlines.pop(appeal_id, None)
+            return
+        if self._deadlines.get(appeal_id) == deadline:
+            return
+        self._deadlines[appeal_id] = deadline
+        if not warned:
+            heapq.heappush(
+                self._heap,
+                SlaAlarm(deadline - self.warning, appeal_id, "sla_warning", deadline),
+            )
+        heapq.heappush(
+            self._heap, SlaAlarm(deadline, appeal_id, "sla_breached", deadline)
+        )
+
+    def _is_current(self, alarm: SlaAlarm) -> bool:
+        return self._deadlines.get(alarm.appeal_id) == alarm.deadline
+
+    def next_at(self) -> datetime | None:
+        """Время ближайшего срабатывания"""
+        while self._heap and not self._is_current(self._heap[0]):
+            heapq.heappop(self._heap)
+        return self._heap[0].fire_at if self._heap else None
+
+    def pop_due(self, now: datetime) -> list[SlaAlarm]:
+        """Снимает с кучи все срабатывания, время которых наступило"""
+        now = naive_utc(now)
+        due = []
+        while self._heap and self._heap[0].fire_at <= now:
+            alarm = heapq.heappop(self._heap)
+            if not self._is_current(alarm):
+                continue
+            if alarm.event == "sla_breached":
+                del self._deadlines[alarm.appeal_id]
+            due.append(alarm)
+        # Срок уже нарушен - предупреждать о его приближении поздно
+        breached = {a.appeal_id for a in due if a.event == "sla_breached"}
+        return [
+            a for a in due if a.event == "sla_breached" or a.appeal_id not in breached
+        ]
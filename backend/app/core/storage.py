@@ -0,0 +1,223 @@
+import os
+import tempfile
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, BinaryIO
+from urllib.parse import quote
+
+from fastapi import HTTPException
+from starlette.status import HTTP_413_REQUEST_ENTITY_TOO_LARGE
+
+from app.core.config import settings
+
+# Размер порции при копировании загруженного файла
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+def file_too_large(filename: str) -> HTTPException:
+    return HTTPException(
+        status_code=HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"File {filename} is too large. Maximum size is {settings.MAX_UPLOAD_SIZE} bytes",
+    )
+
+
+def content_disposition(filename: str) -> str:
+    """Content-Disposition для скачивания, в том числе для имен не в ASCII"""
+    return f"attachment; filename*=utf-8''{quote(filename)}"
+
+
+class LimitedReader:
+    """
+    Обертка над файлом-источником, прерывающая чтение при превышении
+    MAX_UPLOAD_SIZE: лимит проверяется по мере копирования, а не после
+    """
+
+    def __init__(self, source: BinaryIO, filename: str):
+        self._source = source
+        self._filename = filename
+        self.size = 0
+
+    def read(self, size: int = -1) -> bytes:
+        chunk = self._source.read(size)
+        self.size += len(chunk)
+        if self.size > settings.MAX_UPLOAD_SIZE:
+            raise file_too_large(self._filename)
+        return chunk
+
+
+@dataclass(frozen=True)
+class ObjectStat:
+    size: int
+    modified: datetime
+
+
+class StorageBackend(ABC):
+    """
+    Хранилище загруженных файлов
+
+    Файлы адресуются ключом - относительным путем, который сохраняется в БД
+    (например, appeal/<id>/<имя файла>). Методы блокирующие; из async-кода
+    их нужно вызывать через пул потоков.
+    """
+
+    @abstractmethod
+    def save(self, *, key: str, source: BinaryIO, filename: str) -> None:
+        """Сохраняет файл порциями, соблюдая MAX_UPLOAD_SIZE"""
+
+    @abstractmethod
+    def delete(self, *, key: str) -> None:
+        """Удаляет файл; отсутствие файла ошибкой не считается"""
+
+    @abstractmethod
+    def stat(self, *, key: str) -> ObjectStat | None:
+        """Размер и время изменения файла; None, если файла нет"""
+
+    @abstractmethod
+    def open(self, *, key: str) -> BinaryIO:
+        """Файл на чтение с начала; закрывает вызывающий код"""
+
+    def exists(self, *, key: str) -> bool:
+        return self.stat(key=key) is not None
+
+    def local_path(self, *, key: str) -> Path | None:
+        """Путь к файлу на локальном диске, если хранилище локальное"""
+        return None
+
+    def download_url(self, *, key: str, filename: str, content_type: str) -> str | None:
+        """
+        Прямая ссылка на скачивание в обход приложения; None, если
+        хранилище ее не поддерживает и файл отдает приложение
+        """
+        return None
+
+
+class LocalStorage(StorageBackend):
+    """Файлы в settings.UPLOAD_DIR на локальном диске"""
+
+    def _path(self, key: str) -> Path:
+        return Path(settings.UPLOAD_DIR) / key
+
+    def save(self, *, key: str, source: BinaryIO, filename: str) -> None:
+        # Пишем во временный файл рядом с целевым и атомарно переименовываем:
+        # недописанный файл никогда не виден под своим именем
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        reader = LimitedReader(source, filename)
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=".upload-")
+        try:
+            with os.fdopen(fd, "wb") as target:
+                while chunk := reader.read(UPLOAD_CHUNK_SIZE):
+                    target.write(chunk)
+            os.replace(tmp_name, path)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+
+    def delete(self, *, key: str) -> None:
+        self._path(key).unlink(missing_ok=True)
+
+    def stat(self, *, key: str) -> ObjectStat | None:
+        try:
+            stat_result = self._path(key).stat()
+        except FileNotFoundError:
+            return None
+        return ObjectStat(
+            size=stat_result.st_size,
+            modified=datetime.fromtimestamp(stat_result.st_mtime, timezone.utc),
+        )
+
+    def open(self, *, key: str) -> BinaryIO:
+        return open(self._path(key), "rb")
+
+    def local_path(self, *, key: str) -> Path | None:
+        return self._path(key)
+
+
+class S3Storage(StorageBackend):
+    """
+    S3-совместимое объектное хранилище (AWS S3, MinIO и т.п.)
+
+    Большие файлы загружаются multipart-частями по S3_MULTIPART_CHUNK_SIZE,
+    скачивание отдается ссылкой на presigned URL, поэтому содержимое
+    файлов не проходит через воркеры приложения.
+    """
+
+    def __init__(self) -> None:
+        # boto3 нужен только для этого драйвера
+        import boto3  # type: ignore[import-untyped]
+        from boto3.s3.transfer import (  # type: ignore[import-untyped]
+            TransferConfig,
+        )
+
+        self.bucket = settings.S3_BUCKET
+        self.client: Any = boto3.client(
+            "s3",
+            endpoint_url=settings.S3_ENDPOINT_URL,
+            region_name=settings.S3_REGION,
+            aws_access_key_id=settings.S3_ACCESS_KEY_ID,
+            aws_secret_access_key=settings.S3_SECRET_ACCESS_KEY,
+        )
+        self.transfer_config = TransferConfig(
+            multipart_threshold=settings.S3_MULTIPART_CHUNK_SIZE,
+            multipart_chunksize=settings.S3_MULTIPART_CHUNK_SIZE,
+        )
+
+    def save(self, *, key: str, source: BinaryIO, filename: str) -> None:
+        # При ошибке посреди multipart-загрузки boto3 сам отменяет ее,
+        # незавершенные части в бакете не остаются
+        self.client.upload_fileobj(
+            LimitedReader(source, filename),
+            self.bucket,
+            key,
+            Config=self.transfer_config,
+        )
+
+    def delete(self, *, key: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=key)
+
+    def stat(self, *, key: str) -> ObjectStat | None:
+        from botocore.exceptions import (  # type: ignore[import-untyped]
+            ClientError,
+        )
+
+        try:
+            head = self.client.head_object(Bucket=self.bucket, Key=key)
+        except ClientError as e:
+            if e.response["Error"]["Code"] in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+        return ObjectStat(size=head["ContentLength"], modified=head["LastModified"])
+
+    def open(self, *, key: str) -> BinaryIO:
+        # Тело ответа GetObject читается потоком, объект целиком не загружается
+        body: BinaryIO = self.client.get_object(Bucket=self.bucket, Key=key)["Body"]
+        return body
+
+    def download_url(self, *, key: str, filename: str, content_type: str) -> str:
+        # Range и условные запросы по presigned URL обрабатывает само хранилище
+        url: str = self.client.generate_presigned_url(
+            "get_object",
+            Params={
+                "Bucket": self.bucket,
+                "Key": key,
+                "ResponseContentDisposition": content_disposition(filename),
+                "ResponseContentType": content_type,
+            },
+            ExpiresIn=settings.S3_PRESIGNED_URL_EXPIRE_SECONDS,
+        )
+        return url
+
+
+STORAGE_BACKENDS: dict[str, type[StorageBackend]] = {
+    "local": LocalStorage,
+    "s3": S3Storage,
+}
+
+
+@lru_cache
+def get_storage() -> StorageBackend:
+    """Хранилище, выбранное в settings.STORAGE_BACKEND"""
+    return STORAGE_BACKENDS[settings.STORAGE_BACKEND]()
@@ -0,0 +1,67 @@
+from collections.abc import Mapping
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
+
+from app.core.config import settings
+
+EMAIL_TEMPLATES_DIR = Path(__file__).parent.parent / "email-templates" / "build"
+
+
+class TemplateRegistry:
+    """
+    Скомпилированные шаблоны писем
+
+    Шаблоны компилируются один раз и остаются в памяти процесса; байткод
+    сохраняется на диск, поэтому новый процесс не разбирает шаблоны заново.
+    Файлы на диске перепроверяются только при auto_reload (локальная
+    разработка). Значения, общие для всех писем (название проекта, адрес
+    фронтенда), - глобальные переменные окружения, их не нужно передавать
+    в каждый вызов. Готовые письма не кэшируются: в них бывают пароли и
+    ссылки для сброса пароля.
+
+    Отдельно статические части не пререндерятся: постоянный текст шаблона
+    уже скомпилирован в строковые константы, а каждый шаблон зависит от
+    переменных конкретного письма.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        *,
+        auto_reload: bool = False,
+        bytecode_cache_dir: str | None = None,
+    ):
+        self.environment = Environment(
+            loader=FileSystemLoader(directory),
+            auto_reload=auto_reload,
+            # Все шаблоны помещаются в кэш, ни один не вытесняется
+            cache_size=-1,
+            bytecode_cache=FileSystemBytecodeCache(bytecode_cache_dir),
+        )
+        self.environment.globals.update(
+            project_name=settings.PROJECT_NAME,
+            frontend_host=settings.FRONTEND_HOST,
+        )
+
+    def load_all(self) -> int:
+        """Компилирует все шаблоны заранее; возвращает их количество"""
+        names = self.environment.list_templates(extensions=["html"])
+        for name in names:
+            self.environment.get_template(name)
+        return len(names)
+
+    def render(self, name: str, context: Mapping[str, Any]) -> str:
+        return self.environment.get_template(name).render(context)
+
+
+@lru_cache
+def get_email_templates() -> TemplateRegistry:
+    """Шаблоны писем из email-templates/build, общие для процесса"""
+    return TemplateRegistry(
+        EMAIL_TEMPLATES_DIR,
+        auto_reload=settings.ENVIRONMENT == "local",
+        bytecode_cache_dir=settings.EMAIL_TEMPLATES_CACHE_DIR,
+    )
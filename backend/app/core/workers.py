@@ -0,0 +1,35 @@
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from app.core.config import settings
+
+_pool: ProcessPoolExecutor | None = None
+_lock = threading.Lock()
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """
+    Общий пул процессов воркера, создается при первом обращении
+
+    Процессы запускаются через spawn: fork процесса с работающим event loop,
+    потоками и открытыми соединениями к БД небезопасен. Каждый процесс пула
+    создает собственные соединения.
+    """
+    global _pool
+    with _lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.WORKER_PROCESSES,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def shutdown_process_pool(*, wait: bool = True) -> None:
+    """Останавливает пул процессов при завершении приложения"""
+    global _pool
+    with _lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=wait, cancel_futures=True)
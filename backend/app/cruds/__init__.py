@@ -36,6 +36,7 @@ from .comment import (
     delete_comment_async,
     get_appeal_comments,
     get_appeal_comments_async,
+    get_appeal_comments_paginated_async,
     get_comment,
     get_comment_async,
     get_comment_file,
@@ -69,6 +70,7 @@ from .organization import (
     get_organizations,
     update_organization,
 )
+from .principal import get_principal, get_principal_async
 from .priority import (
     create_individual_priority,
     create_standard_priority,
@@ -126,6 +128,7 @@ from .task import (
     get_appeal_tasks,
     get_task,
     get_tasks,
+    get_tasks_paginated,
     get_user_tasks,
     update_task,
 )
@@ -137,6 +140,8 @@ from .user import (
 )
 
 __all__ = [
+    "get_principal",
+    "get_principal_async",
     "create_user",
     "update_user",
     "get_user_by_email",
@@ -210,6 +215,7 @@ __all__ = [
     "create_comment_async",
     "get_comment_async",
     "get_appeal_comments_async",
+    "get_appeal_comments_paginated_async",
     "get_comment_file_async",
     "update_comment_async",
     "delete_comment_async",
@@ -242,6 +248,7 @@ __all__ = [
     "create_task",
     "get_task",
     "get_tasks",
+    "get_tasks_paginated",
     "get_appeal_tasks",
     "get_user_tasks",
     "update_task",
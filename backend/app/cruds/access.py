@@ -0,0 +1,106 @@
+from typing import Any
+from uuid import UUID
+
+from fastapi import HTTPException
+from sqlalchemy import ColumnElement, exists, false, func, or_, true, union_all
+from sqlalchemy.orm import aliased
+from sqlmodel import Session, col, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.principal import Principal
+from app.models.appeal import Appeal
+from app.models.representative import Representative
+from app.models.specialist import Specialist, SpecialistOrganization
+
+# Представитель-автор обращения; алиас, чтобы не путать с представителем,
+# через которого определяются организации самого пользователя
+_Author = aliased(Representative, name="author")
+
+
+def _visible_organization_ids(principal: Principal) -> Any:
+    """Подзапрос организаций, обращения которых видит пользователь"""
+    parts = []
+    if principal.is_representative:
+        parts.append(
+            select(Representative.organization_id).where(
+                Representative.user_id == principal.id
+            )
+        )
+    if principal.controlled_organization_ids:
+        parts.append(
+            select(SpecialistOrganization.organization_id)
+            .join(
+                Specialist, col(Specialist.id) == SpecialistOrganization.specialist_id
+            )
+            .where(Specialist.user_id == principal.id)
+        )
+    if not parts:
+        return None
+    return parts[0] if len(parts) == 1 else union_all(*parts)
+
+
+def appeal_scope(principal: Principal) -> ColumnElement[bool]:
+    """
+    Условие WHERE для обращений, доступных пользователю
+
+    - суперпользователь видит все обращения
+    - автор и ответственный видят свои обращения
+    - представитель видит обращения своей организации
+    - специалист видит обращения закрепленных за ним организаций
+
+    Организации вычисляются подзапросом в той же SQL-команде, поэтому
+    проверка не зависит от того, сколько организаций у пользователя.
+    """
+    if principal.is_superuser:
+        return true()
+    conditions: list[ColumnElement[bool]] = [
+        col(Appeal.user_id) == principal.id,
+        col(Appeal.responsible_user_id) == principal.id,
+    ]
+    organization_ids = _visible_organization_ids(principal)
+    if organization_ids is not None:
+        conditions.append(
+            exists().where(
+                col(_Author.user_id) == Appeal.user_id,
+                col(_Author.organization_id).in_(organization_ids),
+            )
+        )
+    return or_(*conditions)
+
+
+def appeal_child_scope(
+    appeal_id_column: Any, principal: Principal
+) -> ColumnElement[bool]:
+    """Условие WHERE для записей, привязанных к обращению (комментарии, задачи)"""
+    if principal.is_superuser:
+        return true()
+    return exists().where(Appeal.id == appeal_id_column, appeal_scope(principal))
+
+
+def _access_statement(principal: Principal, appeal_id: UUID) -> Any:
+    # Сравнение с NULL (например, без ответственного) дает NULL, а не false
+    allowed = func.coalesce(appeal_scope(principal), false())
+    return select(allowed).where(Appeal.id == appeal_id)
+
+
+def _raise_for_access(allowed: bool | None) -> None:
+    if allowed is None:
+        raise HTTPException(status_code=404, detail="Appeal not found")
+    if not allowed:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+
+
+def check_appeal_access(
+    *, session: Session, principal: Principal, appeal_id: UUID
+) -> None:
+    """Проверка доступа к обращению одним запросом: 404 или 403 при отказе"""
+    allowed = session.exec(_access_statement(principal, appeal_id)).first()
+    _raise_for_access(allowed)
+
+
+async def check_appeal_access_async(
+    *, session: AsyncSession, principal: Principal, appeal_id: UUID
+) -> None:
+    """Асинхронная проверка доступа к обращению"""
+    result = await session.exec(_access_statement(principal, appeal_id))
+    _raise_for_access(result.first())
@@ -1,17 +1,68 @@
 from datetime import UTC, datetime
+from typing import Any
 from uuid import UUID
 
 from fastapi import HTTPException, UploadFile
-from sqlmodel import Session, select
+from sqlalchemy import delete, update
+from sqlmodel import Session, col, select
 from sqlmodel.ext.asyncio.session import AsyncSession
-
-from app.core.files import save_upload_file
-from app.models.appeal import Appeal, AppealBase
+from sqlmodel.sql.expression import SelectOfScalar
+
+from app.core.config import settings
+from app.core.pagination import (
+    CursorParams,
+    PaginatedResponse,
+    PaginationParams,
+    SortKey,
+    paginate_keyset_async,
+    paginate_query_async,
+)
+from app.core.principal import Principal
+from app.cruds.access import appeal_scope
+from app.cruds.file_blob import (
+    purge_released_files,
+    purge_released_files_async,
+    release_files,
+    release_files_async,
+    save_upload_file,
+    save_upload_files_async,
+)
+from app.cruds.loaders import loader_options
+from app.cruds.notification_fanout import (
+    AppealNotice,
+    enqueue_appeal_fanout,
+    enqueue_appeal_fanout_async,
+)
+from app.cruds.notification_outbox import enqueue_appeal_notifications
+from app.cruds.priority_catalog import (
+    get_priority_catalog,
+    get_priority_catalog_async,
+    resolve_appeal_priority,
+)
+from app.cruds.representative import get_representative_by_user_id
+from app.cruds.sla import refresh_appeals_sla, refresh_appeals_sla_async
+from app.models.appeal import (
+    Appeal,
+    AppealBase,
+    AppealBulkStatusResult,
+    AppealUpdate,
+)
 from app.models.appeal_file import AppealFile
 from app.models.appeal_status import AppealStatus
+from app.models.appeal_stop_interval import AppealStopInterval
+from app.models.comment import Comment
+from app.models.comment_file import CommentFile
+from app.models.notification_outbox import NotificationOutbox
 from app.models.representative import Representative
+from app.models.task import Task
 from app.models.user import User
 
+# Новые обращения первыми; id делает ключ уникальным при совпадении dt
+APPEAL_SORT_KEYS = (
+    SortKey(Appeal.dt, descending=True),
+    SortKey(Appeal.id, descending=True),
+)
+
 
 def create_appeal(
     *,
@@ -21,7 +72,8 @@ def create_appeal(
     files: list[UploadFile] | None = None,
 ) -> Appeal:
     """Создание обращения"""
-    if not user.representative or not user.representative.organization:
+    representative = get_representative_by_user_id(session=session, user_id=user.id)
+    if not representative or not representative.organization:
         raise HTTPException(
             status_code=400,
             detail="User must be a representative with an organization to create appeals",
@@ -41,19 +93,29 @@ def create_appeal(
     db_appeal = Appeal(
         **appeal_data,
         user_id=user.id,
-        region_id=user.representative.organization.region_id,
+        region_id=representative.organization.region_id,
         status_id=initial_status.id,  # Используем ID найденного статуса
     )
+    resolve_appeal_priority(
+        get_priority_catalog(
+            session=session, organization_id=representative.organization_id
+        ),
+        db_appeal,
+    )
 
     session.add(db_appeal)
+    # Уведомления фиксируются той же транзакцией, что и обращение
+    enqueue_appeal_notifications(session=session, event="created", appeal=db_appeal)
+    refresh_appeals_sla(session=session, appeal_ids=[db_appeal.id])
     session.commit()
     session.refresh(db_appeal)
 
     # Сохраняем файлы, если они есть
     if files:
         for file in files:
-            # Сохраняем файл и получаем путь
-            file_path = save_upload_file(
+            # Сохраняем файл и получаем ссылку на его содержимое
+            stored = save_upload_file(
+                session=session,
                 file=file,
                 folder="appeal",
                 entity_id=db_appeal.id,
@@ -62,7 +124,8 @@ def create_appeal(
             # Создаем запись в БД
             appeal_file = AppealFile(
                 appeal_id=db_appeal.id,
-                file=file_path,
+                file=stored.path,
+                blob_sha256=stored.sha256,
             )
             session.add(appeal_file)
 
@@ -73,34 +136,14 @@ def create_appeal(
 
 def get_appeal(*, session: Session, appeal_id: UUID) -> Appeal | None:
     """Получение обращения по ID"""
-    return session.get(Appeal, appeal_id)
+    return session.get(Appeal, appeal_id, options=loader_options("appeal_detail"))
 
 
 def get_appeals(
-    *, session: Session, user: User, skip: int = 0, limit: int = 100
+    *, session: Session, principal: Principal, skip: int = 0, limit: int = 100
 ) -> list[Appeal]:
     """Получение списка обращений с учетом прав пользователя"""
-    query = select(Appeal)
-
-    if not user.is_superuser:
-        if hasattr(user, "representative"):
-            # Для представителя организации
-            query = query.where(Appeal.user_id == user.id)
-        elif hasattr(user, "specialist"):
-            # Для специалиста
-            controlled_orgs = user.specialist.controlled_organizations
-            query = query.where(
-                Appeal.user_id.in_(
-                    select(User.id)
-                    .join(User.representative)
-                    .where(
-                        Representative.organization_id.in_(
-                            [org.id for org in controlled_orgs]
-                        )
-                    )
-                )
-            )
-
+    query = _scoped_appeals_query(principal)
     appeals = session.exec(query.offset(skip).limit(limit)).all()
     return appeals
 
@@ -115,6 +158,7 @@ def update_appeal(
     **kwargs,
 ) -> Appeal:
     """Обновление обращения"""
+    old_status_id = db_appeal.status_id
     update_data = {k: v for k, v in kwargs.items() if v is not None}
 
     if status_id is not None:
@@ -130,43 +174,120 @@ def update_appeal(
 
     db_appeal.sqlmodel_update(update_data)
     session.add(db_appeal)
+    if _enqueue_status_change(session, db_appeal, old_status_id):
+        refresh_appeals_sla(session=session, appeal_ids=[db_appeal.id])
     session.commit()
     session.refresh(db_appeal)
     return db_appeal
 
 
+def _enqueue_status_change(
+    session: Session | AsyncSession, appeal: Appeal, old_status_id: UUID
+) -> bool:
+    """Уведомления о смене статуса; True, если статус изменился"""
+    if appeal.status_id == old_status_id:
+        return False
+    enqueue_appeal_notifications(
+        session=session,
+        event="status_changed",
+        appeal=appeal,
+        old_status_id=str(old_status_id),
+        new_status_id=str(appeal.status_id),
+    )
+    return True
+
+
+def _bulk_status_statement(appeal_ids: list[UUID], status_id: UUID) -> Any:
+    # Обращения, уже находящиеся в этом статусе, не меняются и не уведомляются
+    return (
+        update(Appeal)
+        .where(col(Appeal.id).in_(appeal_ids), col(Appeal.status_id) != status_id)
+        .values(status_id=status_id)
+        .returning(col(Appeal.id))
+    )
+
+
+def _bulk_status_notice(status: AppealStatus) -> AppealNotice:
+    return AppealNotice(
+        subject=f"{settings.PROJECT_NAME} - Изменен статус обращений",
+        title="Изменен статус обращений",
+        message=f"Новый статус: {status.name}",
+    )
+
+
+def _enqueue_bulk_bot_updates(
+    session: Session | AsyncSession, appeal_ids: list[UUID]
+) -> None:
+    # Сообщения бота привязаны к обращению, поэтому по записи на каждое
+    session.add_all(
+        NotificationOutbox(kind="bot.appeal_updated", payload={"appeal_id": str(id_)})
+        for id_ in appeal_ids
+    )
+
+
+def update_appeals_status(
+    *, session: Session, appeal_ids: list[UUID], status: AppealStatus
+) -> AppealBulkStatusResult:
+    """
+    Массовая смена статуса обращений
+
+    Статус меняется одним UPDATE, уведомления (одно письмо на получателя со
+    всеми его обращениями) ставятся в outbox в той же транзакции.
+    """
+    updated = list(
+        session.exec(_bulk_status_statement(appeal_ids, status.id)).scalars()
+    )
+    notifications = enqueue_appeal_fanout(
+        session=session, appeal_ids=updated, notice=_bulk_status_notice(status)
+    )
+    _enqueue_bulk_bot_updates(session, updated)
+    refresh_appeals_sla(session=session, appeal_ids=updated)
+    session.commit()
+    return AppealBulkStatusResult(updated=updated, notifications=notifications)
+
+
+def _appeal_files_statements(appeal_id: UUID) -> tuple[Any, Any]:
+    comment_ids = select(Comment.id).where(Comment.appeal_id == appeal_id)
+    return (
+        select(AppealFile).where(AppealFile.appeal_id == appeal_id),
+        select(CommentFile).where(col(CommentFile.comment_id).in_(comment_ids)),
+    )
+
+
+def _appeal_delete_statements(appeal_id: UUID) -> list[Any]:
+    # Зависимые записи удаляются раньше обращения: каскадов в схеме нет
+    comment_ids = select(Comment.id).where(Comment.appeal_id == appeal_id)
+    return [
+        delete(CommentFile).where(col(CommentFile.comment_id).in_(comment_ids)),
+        delete(AppealFile).where(col(AppealFile.appeal_id) == appeal_id),
+        delete(Comment).where(col(Comment.appeal_id) == appeal_id),
+        delete(Task).where(col(Task.appeal_id) == appeal_id),
+        delete(AppealStopInterval).where(
+            col(AppealStopInterval.appeal_id) == appeal_id
+        ),
+        delete(Appeal).where(col(Appeal.id) == appeal_id),
+    ]
+
+
 def delete_appeal(*, session: Session, appeal_id: UUID) -> None:
-    """Удаление обращения"""
+    """
+    Удаление обращения вместе с комментариями, задачами и файлами
+
+    Содержимое файлов удаляется из хранилища, только если на него больше
+    не ссылаются другие обращения и комментарии.
+    """
     appeal = session.get(Appeal, appeal_id)
     if appeal:
-        session.delete(appeal)
+        files = [
+            file
+            for statement in _appeal_files_statements(appeal_id)
+            for file in session.exec(statement).all()
+        ]
+        for statement in _appeal_delete_statements(appeal_id):
+            session.exec(statement)
+        released = release_files(session=session, files=files)
         session.commit()
-
-
-# def get_appeals_paginated(
-#     *, session: Session, user: User, pagination: PaginationParams
-# ) -> PaginatedResponse[Appeal]:
-#     """Получение списка обращений с пагинацией"""
-#     query = select(Appeal)
-
-#     if not user.is_superuser:
-#         if hasattr(user, "representative"):
-#             query = query.where(Appeal.user_id == user.id)
-#         elif hasattr(user, "specialist"):
-#             controlled_orgs = user.specialist.controlled_organizations
-#             query = query.where(
-#                 Appeal.user_id.in_(
-#                     select(User.id)
-#                     .join(User.representative)
-#                     .where(
-#                         Representative.organization_id.in_(
-#                             [org.id for org in controlled_orgs]
-#                         )
-#                     )
-#                 )
-#             )
-
-#     return paginate_query(session, query, pagination)
+        purge_released_files(session=session, released=released)
 
 
 # Асинхронные версии функций
@@ -195,24 +316,38 @@ async def create_appeal_async(
         created_at=datetime.now(UTC),
         status_id=initial_status.id,  # Добавляем status_id
     )
+    organization_id = (
+        await session.exec(
+            select(Representative.organization_id).where(
+                Representative.user_id == user.id
+            )
+        )
+    ).first()
+    if organization_id is not None:
+        resolve_appeal_priority(
+            await get_priority_catalog_async(
+                session=session, organization_id=organization_id
+            ),
+            db_appeal,
+        )
     session.add(db_appeal)
+    # Уведомления фиксируются той же транзакцией, что и обращение
+    enqueue_appeal_notifications(session=session, event="created", appeal=db_appeal)
+    await refresh_appeals_sla_async(session=session, appeal_ids=[db_appeal.id])
     await session.commit()
     await session.refresh(db_appeal)
 
     # Сохраняем файлы, если они есть
     if files:
-        for file in files:
-            # Сохраняем файл и получаем путь
-            file_path = save_upload_file(
-                file=file,
-                folder="appeal",
-                entity_id=db_appeal.id,
-            )
-
+        stored_files = await save_upload_files_async(
+            session=session, files=files, folder="appeal", entity_id=db_appeal.id
+        )
+        for stored in stored_files:
             # Создаем запись в БД
             appeal_file = AppealFile(
                 appeal_id=db_appeal.id,
-                file=file_path,
+                file=stored.path,
+                blob_sha256=stored.sha256,
             )
             session.add(appeal_file)
 
@@ -228,54 +363,100 @@ async def get_appeal_async(
     appeal_id: UUID,
 ) -> Appeal | None:
     """Асинхронное получение обращения по ID"""
-    return await session.get(Appeal, appeal_id)
+    return await session.get(Appeal, appeal_id, options=loader_options("appeal_detail"))
 
 
 async def get_appeals_async(
     *,
     session: AsyncSession,
-    user: User,
+    principal: Principal,
     skip: int = 0,
     limit: int = 100,
 ) -> list[Appeal]:
     """Асинхронное получение списка обращений"""
-    query = select(Appeal)
-
-    if not user.is_superuser:
-        if hasattr(user, "representative"):
-            query = query.where(
-                Appeal.organization_id == user.representative.organization_id
-            )
-        else:
-            query = query.where(Appeal.user_id == user.id)
-
-    query = query.offset(skip).limit(limit)
+    query = _scoped_appeals_query(principal).offset(skip).limit(limit)
     result = await session.exec(query)
     return result.all()
 
 
+async def get_appeals_paginated_async(
+    *,
+    session: AsyncSession,
+    principal: Principal,
+    params: CursorParams,
+) -> PaginatedResponse[Appeal]:
+    """Асинхронное получение страницы обращений по курсору"""
+    return await paginate_keyset_async(
+        session, _scoped_appeals_query(principal), APPEAL_SORT_KEYS, params
+    )
+
+
+async def get_appeals_page_async(
+    *,
+    session: AsyncSession,
+    principal: Principal,
+    params: PaginationParams,
+) -> PaginatedResponse[Appeal]:
+    """
+    Асинхронное получение страницы обращений по номеру
+
+    total считается выбранной в params стратегией; по умолчанию это оценка
+    планировщика, без полного подсчета обращений под фильтром доступа.
+    """
+    return await paginate_query_async(
+        session, _scoped_appeals_query(principal), params, APPEAL_SORT_KEYS
+    )
+
+
+def _scoped_appeals_query(principal: Principal) -> SelectOfScalar[Appeal]:
+    return (
+        select(Appeal)
+        .where(appeal_scope(principal))
+        .options(*loader_options("appeal_list"))
+    )
+
+
 async def update_appeal_async(
     *,
     session: AsyncSession,
     db_appeal: Appeal,
-    appeal_in: AppealBase,
+    appeal_in: AppealUpdate,
 ) -> Appeal:
     """Асинхронное обновление обращения"""
+    old_status_id = db_appeal.status_id
     update_data = appeal_in.model_dump(exclude_unset=True)
     db_appeal.sqlmodel_update(update_data)
 
     session.add(db_appeal)
+    if _enqueue_status_change(session, db_appeal, old_status_id):
+        await refresh_appeals_sla_async(session=session, appeal_ids=[db_appeal.id])
     await session.commit()
     await session.refresh(db_appeal)
     return db_appeal
 
 
+async def update_appeals_status_async(
+    *, session: AsyncSession, appeal_ids: list[UUID], status: AppealStatus
+) -> AppealBulkStatusResult:
+    """Асинхронная массовая смена статуса обращений"""
+    updated = list(
+        (await session.exec(_bulk_status_statement(appeal_ids, status.id))).scalars()
+    )
+    notifications = await enqueue_appeal_fanout_async(
+        session=session, appeal_ids=updated, notice=_bulk_status_notice(status)
+    )
+    _enqueue_bulk_bot_updates(session, updated)
+    await refresh_appeals_sla_async(session=session, appeal_ids=updated)
+    await session.commit()
+    return AppealBulkStatusResult(updated=updated, notifications=notifications)
+
+
 async def delete_appeal_async(
     *,
     session: AsyncSession,
     appeal_id: UUID,
 ) -> None:
-    """Асинхронное удаление обращения"""
+    """Асинхронное удаление обращения вместе с комментариями, задачами и файлами"""
     appeal = await session.get(Appeal, appeal_id)
     if not appeal:
         raise HTTPException(
@@ -283,5 +464,11 @@ async def delete_appeal_async(
             detail="Appeal not found",
         )
 
-    await session.delete(appeal)
+    files = []
+    for statement in _appeal_files_statements(appeal_id):
+        files.extend((await session.exec(statement)).all())
+    for statement in _appeal_delete_statements(appeal_id):
+        await session.exec(statement)
+    released = await release_files_async(session=session, files=files)
     await session.commit()
+    await purge_released_files_async(session=session, released=released)
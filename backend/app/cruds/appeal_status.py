@@ -3,7 +3,9 @@ from uuid import UUID
 from fastapi import HTTPException
 from sqlmodel import Session, select
 
+from app.models.appeal import Appeal
 from app.models.appeal_status import AppealStatus, AppealStatusBase
+from app.models.organization import Organization
 
 
 def create_appeal_status(
@@ -89,14 +91,18 @@ def delete_appeal_status(
         )
 
     # Проверяем, есть ли обращения с этим статусом
-    if appeal_status.appeals:
+    statement = select(Appeal.id).where(Appeal.status_id == appeal_status_id)
+    if session.exec(statement.limit(1)).first():
         raise HTTPException(
             status_code=400,
             detail="Cannot delete status that is used by appeals",
         )
 
     # Проверяем, используется ли статус в организациях
-    if appeal_status.organizations:
+    statement = select(Organization.id).where(
+        Organization.custom_appeal_completion_status_id == appeal_status_id
+    )
+    if session.exec(statement.limit(1)).first():
         raise HTTPException(
             status_code=400,
             detail="Cannot delete status that is used by organizations",
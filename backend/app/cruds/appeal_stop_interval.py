@@ -1,16 +1,57 @@
-from datetime import datetime
+from collections.abc import Sequence
+from datetime import UTC, datetime
+from typing import Any
 from uuid import UUID
 
 from fastapi import HTTPException
-from sqlmodel import Session, select
+from sqlalchemy import DateTime, func, literal
+from sqlmodel import Session, col, select
 from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlmodel.sql.expression import SelectOfScalar
 
+from app.core.config import settings
+from app.cruds.notification_fanout import (
+    AppealNotice,
+    enqueue_appeal_fanout,
+    enqueue_appeal_fanout_async,
+)
+from app.cruds.sla import refresh_appeals_sla, refresh_appeals_sla_async
 from app.models.appeal_stop_interval import (
     AppealStopInterval,
     AppealStopIntervalCreate,
     AppealStopIntervalUpdate,
+    stop_period,
 )
 
+
+def _stop_notice(
+    interval: AppealStopInterval, *, resumed: bool = False
+) -> AppealNotice:
+    if resumed and interval.end_dt is not None:
+        title = "Обработка обращения возобновляется"
+        message = f"Обработка возобновляется {interval.end_dt:%d.%m.%Y %H:%M}"
+    else:
+        title = "Обработка обращения приостановлена"
+        message = f"Обработка остановлена с {interval.start_dt:%d.%m.%Y %H:%M}"
+        if interval.end_dt is not None:
+            message += f" до {interval.end_dt:%d.%m.%Y %H:%M}"
+    return AppealNotice(
+        subject=f"{settings.PROJECT_NAME} - {title}",
+        title=title,
+        message=message,
+    )
+
+
+def _opens_or_closes(
+    db_interval: AppealStopInterval, update_data: dict[str, Any]
+) -> bool:
+    # Интервал открывается или закрывается, когда появляется или
+    # снимается дата окончания
+    return "end_dt" in update_data and (update_data["end_dt"] is None) != (
+        db_interval.end_dt is None
+    )
+
+
 # Синхронные версии функций
 
 
@@ -19,9 +60,15 @@ def create_appeal_stop_interval(
     session: Session,
     interval_in: AppealStopIntervalCreate,
 ) -> AppealStopInterval:
-    """Создание интервала остановки обработки обращений"""
-    # Проверяем, что дата начала меньше даты окончания
-    if interval_in.start_dt >= interval_in.end_dt:
+    """
+    Создание интервала остановки обработки обращений
+
+    Организация и представители автора обращения получают уведомление
+    через outbox.
+    """
+    # Проверяем, что дата начала меньше даты окончания; без окончания
+    # интервал открыт, пока его не закроют
+    if interval_in.end_dt is not None and interval_in.start_dt >= interval_in.end_dt:
         raise HTTPException(
             status_code=400,
             detail="Start date must be before end date",
@@ -29,6 +76,12 @@ def create_appeal_stop_interval(
 
     db_interval = AppealStopInterval.model_validate(interval_in)
     session.add(db_interval)
+    refresh_appeals_sla(session=session, appeal_ids=[db_interval.appeal_id])
+    enqueue_appeal_fanout(
+        session=session,
+        appeal_ids=[db_interval.appeal_id],
+        notice=_stop_notice(db_interval),
+    )
     session.commit()
     session.refresh(db_interval)
     return db_interval
@@ -54,18 +107,89 @@ def get_appeal_stop_intervals(
     return session.exec(statement).all()
 
 
+def _at(value: datetime | None) -> Any:
+    # Момент времени как timestamptz; время без пояса считается UTC
+    value = value or datetime.now(UTC)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=UTC)
+    return literal(value, DateTime(timezone=True))
+
+
+def _active_statement(
+    current_dt: datetime | None,
+) -> SelectOfScalar[AppealStopInterval]:
+    return select(AppealStopInterval).where(stop_period().contains(_at(current_dt)))
+
+
+def _paused_statement(
+    appeal_ids: Sequence[UUID], current_dt: datetime | None
+) -> SelectOfScalar[UUID]:
+    return (
+        select(AppealStopInterval.appeal_id)
+        .where(
+            col(AppealStopInterval.appeal_id).in_(appeal_ids),
+            stop_period().contains(_at(current_dt)),
+        )
+        .distinct()
+    )
+
+
+def _overlapping_statement(
+    appeal_ids: Sequence[UUID], start_dt: datetime, end_dt: datetime | None
+) -> SelectOfScalar[AppealStopInterval]:
+    period = func.tstzrange(_at(start_dt), _at(end_dt) if end_dt else None, "[)")
+    return (
+        select(AppealStopInterval)
+        .where(
+            col(AppealStopInterval.appeal_id).in_(appeal_ids),
+            stop_period().overlaps(period),
+        )
+        .order_by(col(AppealStopInterval.appeal_id), col(AppealStopInterval.start_dt))
+    )
+
+
 def get_active_appeal_stop_intervals(
     *,
     session: Session,
-    current_dt: datetime = None,
+    current_dt: datetime | None = None,
 ) -> list[AppealStopInterval]:
-    """Получение активных интервалов на указанную дату"""
-    current_dt = current_dt or datetime.now()
-    statement = select(AppealStopInterval).where(
-        AppealStopInterval.start_dt <= current_dt,
-        AppealStopInterval.end_dt >= current_dt,
+    """Интервалы, действующие в указанный момент, включая незакрытые"""
+    return list(session.exec(_active_statement(current_dt)).all())
+
+
+def get_paused_appeal_ids(
+    *,
+    session: Session,
+    appeal_ids: Sequence[UUID],
+    current_dt: datetime | None = None,
+) -> set[UUID]:
+    """
+    Какие из обращений остановлены в указанный момент (по умолчанию сейчас)
+
+    Один запрос по GiST-индексу периода на любое количество обращений.
+    """
+    if not appeal_ids:
+        return set()
+    return set(session.exec(_paused_statement(appeal_ids, current_dt)).all())
+
+
+def get_overlapping_stop_intervals(
+    *,
+    session: Session,
+    appeal_ids: Sequence[UUID],
+    start_dt: datetime,
+    end_dt: datetime | None = None,
+) -> list[AppealStopInterval]:
+    """
+    Остановки обращений, пересекающие период [start_dt, end_dt)
+
+    Без end_dt период не ограничен сверху.
+    """
+    if not appeal_ids:
+        return []
+    return list(
+        session.exec(_overlapping_statement(appeal_ids, start_dt, end_dt)).all()
     )
-    return session.exec(statement).all()
 
 
 def update_appeal_stop_interval(
@@ -74,21 +198,34 @@ def update_appeal_stop_interval(
     db_interval: AppealStopInterval,
     interval_in: AppealStopIntervalUpdate,
 ) -> AppealStopInterval:
-    """Обновление интервала"""
+    """
+    Обновление интервала
+
+    Если интервал закрывается (появляется дата окончания) или снова
+    открывается, получатели обращения уведомляются через outbox.
+    """
     update_data = interval_in.model_dump(exclude_unset=True)
 
     # Проверяем даты, если они обновляются
     start_dt = update_data.get("start_dt") or db_interval.start_dt
     end_dt = update_data.get("end_dt") or db_interval.end_dt
 
-    if start_dt >= end_dt:
+    if end_dt is not None and start_dt >= end_dt:
         raise HTTPException(
             status_code=400,
             detail="Start date must be before end date",
         )
 
+    notify = _opens_or_closes(db_interval, update_data)
     db_interval.sqlmodel_update(update_data)
     session.add(db_interval)
+    refresh_appeals_sla(session=session, appeal_ids=[db_interval.appeal_id])
+    if notify:
+        enqueue_appeal_fanout(
+            session=session,
+            appeal_ids=[db_interval.appeal_id],
+            notice=_stop_notice(db_interval, resumed=True),
+        )
     session.commit()
     session.refresh(db_interval)
     return db_interval
@@ -108,6 +245,7 @@ def delete_appeal_stop_interval(
         )
 
     session.delete(interval)
+    refresh_appeals_sla(session=session, appeal_ids=[interval.appeal_id])
     session.commit()
 
 
@@ -120,8 +258,9 @@ async def create_appeal_stop_interval_async(
     interval_in: AppealStopIntervalCreate,
 ) -> AppealStopInterval:
     """Асинхронное создание интервала остановки обработки обращений"""
-    # Проверяем, что дата начала меньше даты окончания
-    if interval_in.start_dt >= interval_in.end_dt:
+    # Проверяем, что дата начала меньше даты окончания; без окончания
+    # интервал открыт, пока его не закроют
+    if interval_in.end_dt is not None and interval_in.start_dt >= interval_in.end_dt:
         raise HTTPException(
             status_code=400,
             detail="Start date must be before end date",
@@ -129,6 +268,12 @@ async def create_appeal_stop_interval_async(
 
     db_interval = AppealStopInterval.model_validate(interval_in)
     session.add(db_interval)
+    await refresh_appeals_sla_async(session=session, appeal_ids=[db_interval.appeal_id])
+    await enqueue_appeal_fanout_async(
+        session=session,
+        appeal_ids=[db_interval.appeal_id],
+        notice=_stop_notice(db_interval),
+    )
     await session.commit()
     await session.refresh(db_interval)
     return db_interval
@@ -158,15 +303,37 @@ async def get_appeal_stop_intervals_async(
 async def get_active_appeal_stop_intervals_async(
     *,
     session: AsyncSession,
-    current_dt: datetime = None,
+    current_dt: datetime | None = None,
 ) -> list[AppealStopInterval]:
-    """Асинхронное получение активных интервалов на указанную дату"""
-    current_dt = current_dt or datetime.now()
-    statement = select(AppealStopInterval).where(
-        AppealStopInterval.start_dt <= current_dt,
-        AppealStopInterval.end_dt >= current_dt,
-    )
-    result = await session.exec(statement)
+    """Асинхронное получение интервалов, действующих в указанный момент"""
+    result = await session.exec(_active_statement(current_dt))
+    return list(result.all())
+
+
+async def get_paused_appeal_ids_async(
+    *,
+    session: AsyncSession,
+    appeal_ids: Sequence[UUID],
+    current_dt: datetime | None = None,
+) -> set[UUID]:
+    """Асинхронно: какие из обращений остановлены в указанный момент"""
+    if not appeal_ids:
+        return set()
+    result = await session.exec(_paused_statement(appeal_ids, current_dt))
+    return set(result.all())
+
+
+async def get_overlapping_stop_intervals_async(
+    *,
+    session: AsyncSession,
+    appeal_ids: Sequence[UUID],
+    start_dt: datetime,
+    end_dt: datetime | None = None,
+) -> list[AppealStopInterval]:
+    """Асинхронный поиск остановок, пересекающих период [start_dt, end_dt)"""
+    if not appeal_ids:
+        return []
+    result = await session.exec(_overlapping_statement(appeal_ids, start_dt, end_dt))
     return result.all()
 
 
@@ -183,14 +350,22 @@ async def update_appeal_stop_interval_async(
     start_dt = update_data.get("start_dt") or db_interval.start_dt
     end_dt = update_data.get("end_dt") or db_interval.end_dt
 
-    if start_dt >= end_dt:
+    if end_dt is not None and start_dt >= end_dt:
         raise HTTPException(
             status_code=400,
             detail="Start date must be before end date",
         )
 
+    notify = _opens_or_closes(db_interval, update_data)
     db_interval.sqlmodel_update(update_data)
     session.add(db_interval)
+    await refresh_appeals_sla_async(session=session, appeal_ids=[db_interval.appeal_id])
+    if notify:
+        await enqueue_appeal_fanout_async(
+            session=session,
+            appeal_ids=[db_interval.appeal_id],
+            notice=_stop_notice(db_interval, resumed=True),
+        )
     await session.commit()
     await session.refresh(db_interval)
     return db_interval
@@ -210,4 +385,5 @@ async def delete_appeal_stop_interval_async(
         )
 
     await session.delete(interval)
+    await refresh_appeals_sla_async(session=session, appeal_ids=[interval.appeal_id])
     await session.commit()
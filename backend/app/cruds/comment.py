@@ -5,10 +5,30 @@ from fastapi import HTTPException, UploadFile
 from sqlmodel import Session, select
 from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.core.files import save_upload_file
+from app.core.pagination import (
+    CursorParams,
+    PaginatedResponse,
+    SortKey,
+    paginate_keyset_async,
+)
+from app.cruds.file_blob import (
+    purge_released_files,
+    purge_released_files_async,
+    release_files,
+    release_files_async,
+    save_upload_file,
+    save_upload_files_async,
+)
+from app.cruds.loaders import loader_options
 from app.models.comment import Comment, CommentBase
 from app.models.comment_file import CommentFile
 
+# Новые комментарии первыми; id делает ключ уникальным при совпадении времени
+COMMENT_SORT_KEYS = (
+    SortKey(Comment.created_at, descending=True),
+    SortKey(Comment.id, descending=True),
+)
+
 
 def create_comment(
     *,
@@ -32,8 +52,9 @@ def create_comment(
     # Сохраняем файлы, если они есть
     if files:
         for file in files:
-            # Сохраняем файл и получаем путь
-            file_path = save_upload_file(
+            # Сохраняем файл и получаем ссылку на его содержимое
+            stored = save_upload_file(
+                session=session,
                 file=file,
                 folder="comment",
                 entity_id=db_comment.id,
@@ -42,7 +63,8 @@ def create_comment(
             # Создаем запись в БД
             comment_file = CommentFile(
                 comment_id=db_comment.id,
-                file=file_path,
+                file=stored.path,
+                blob_sha256=stored.sha256,
             )
             session.add(comment_file)
 
@@ -99,7 +121,7 @@ def delete_comment(
     comment_id: UUID,
 ) -> None:
     """Удаление комментария"""
-    comment = session.get(Comment, comment_id)
+    comment = session.get(Comment, comment_id, options=loader_options("comment_detail"))
     if not comment:
         raise HTTPException(
             status_code=404,
@@ -109,9 +131,11 @@ def delete_comment(
     # Удаляем файлы комментария
     for comment_file in comment.comment_files:
         session.delete(comment_file)
+    released = release_files(session=session, files=comment.comment_files)
 
     session.delete(comment)
     session.commit()
+    purge_released_files(session=session, released=released)
 
 
 def get_comment_file(
@@ -144,8 +168,9 @@ def add_comment_files(
 
     # Сохраняем новые файлы
     for file in files:
-        # Сохраняем файл и получаем путь
-        file_path = save_upload_file(
+        # Сохраняем файл и получаем ссылку на его содержимое
+        stored = save_upload_file(
+            session=session,
             file=file,
             folder="comment",
             entity_id=comment.id,
@@ -154,7 +179,8 @@ def add_comment_files(
         # Создаем запись в БД
         comment_file = CommentFile(
             comment_id=comment.id,
-            file=file_path,
+            file=stored.path,
+            blob_sha256=stored.sha256,
         )
         session.add(comment_file)
 
@@ -184,18 +210,15 @@ async def create_comment_async(
 
     # Сохраняем файлы, если они есть
     if files:
-        for file in files:
-            # Сохраняем файл и получаем путь
-            file_path = await save_upload_file_async(
-                file=file,
-                folder="comment",
-                entity_id=db_comment.id,
-            )
-
+        stored_files = await save_upload_files_async(
+            session=session, files=files, folder="comment", entity_id=db_comment.id
+        )
+        for stored in stored_files:
             # Создаем запись в БД
             comment_file = CommentFile(
                 comment_id=db_comment.id,
-                file=file_path,
+                file=stored.path,
+                blob_sha256=stored.sha256,
             )
             session.add(comment_file)
 
@@ -233,6 +256,17 @@ async def get_appeal_comments_async(
     return result.all()
 
 
+async def get_appeal_comments_paginated_async(
+    *,
+    session: AsyncSession,
+    appeal_id: UUID,
+    params: CursorParams,
+) -> PaginatedResponse[Comment]:
+    """Асинхронное получение страницы комментариев обращения по курсору"""
+    statement = select(Comment).where(Comment.appeal_id == appeal_id)
+    return await paginate_keyset_async(session, statement, COMMENT_SORT_KEYS, params)
+
+
 async def update_comment_async(
     *,
     session: AsyncSession,
@@ -253,7 +287,9 @@ async def delete_comment_async(
     comment_id: UUID,
 ) -> None:
     """Асинхронное удаление комментария"""
-    comment = await session.get(Comment, comment_id)
+    comment = await session.get(
+        Comment, comment_id, options=loader_options("comment_detail")
+    )
     if not comment:
         raise HTTPException(
             status_code=404,
@@ -263,9 +299,11 @@ async def delete_comment_async(
     # Удаляем файлы комментария
     for comment_file in comment.comment_files:
         await session.delete(comment_file)
+    released = await release_files_async(session=session, files=comment.comment_files)
 
     await session.delete(comment)
     await session.commit()
+    await purge_released_files_async(session=session, released=released)
 
 
 async def get_comment_file_async(
@@ -298,33 +336,18 @@ async def add_comment_files_async(
         )
 
     # Сохраняем новые файлы
-    for file in files:
-        # Сохраняем файл и получаем путь
-        file_path = await save_upload_file_async(
-            file=file,
-            folder="comment",
-            entity_id=comment.id,
-        )
-
+    stored_files = await save_upload_files_async(
+        session=session, files=files, folder="comment", entity_id=comment.id
+    )
+    for stored in stored_files:
         # Создаем запись в БД
         comment_file = CommentFile(
             comment_id=comment.id,
-            file=file_path,
+            file=stored.path,
+            blob_sha256=stored.sha256,
         )
         session.add(comment_file)
 
     await session.commit()
     await session.refresh(comment)
     return comment
-
-
-async def save_upload_file_async(
-    *,
-    file: UploadFile,
-    folder: str,
-    entity_id: UUID,
-) -> str:
-    """Асинхронное сохранение загруженного файла"""
-    # Здесь должна быть асинхронная реализация сохранения файла
-    # Для простоты используем синхронную версию
-    return save_upload_file(file=file, folder=folder, entity_id=entity_id)
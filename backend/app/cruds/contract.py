@@ -1,10 +1,117 @@
-from uuid import UUID
+from collections.abc import Mapping, Sequence
+from typing import Any
+from uuid import UUID, uuid4
 
 from fastapi import HTTPException
-from sqlmodel import Session, select
+from sqlalchemy import delete, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlmodel import Session, col, select
 
-from app.models.contract import Contract, ContractCreate, ContractUpdate
-from app.models.priority import ContractStandardPriority
+from app.core.priority_catalog import invalidate_priority_catalog
+from app.cruds.loaders import loader_options
+from app.cruds.sla import get_priority_appeal_ids, refresh_appeals_sla
+from app.models.appeal import Appeal
+from app.models.contract import (
+    BulkItemResult,
+    Contract,
+    ContractBulkItem,
+    ContractBulkRequest,
+    ContractBulkResult,
+    ContractCreate,
+    ContractUpdate,
+)
+from app.models.organization import Organization
+from app.models.priority import (
+    BasePriorityBase,
+    ContractStandardPriority,
+    IndividualPriority,
+    StandardPriority,
+)
+
+
+def _replace_standard_priority_links(
+    session: Session, links: Mapping[UUID, Sequence[UUID]]
+) -> None:
+    """
+    Заменяет связи договоров со стандартными приоритетами
+
+    Два запроса на все договоры: удаление связей, которых нет в новом наборе
+    (DELETE ... NOT IN), и вставка недостающих (INSERT ... ON CONFLICT).
+    """
+    if not links:
+        return
+    pairs = list(
+        dict.fromkeys(
+            (contract_id, priority_id)
+            for contract_id, priority_ids in links.items()
+            for priority_id in priority_ids
+        )
+    )
+    stale = delete(ContractStandardPriority).where(
+        col(ContractStandardPriority.contract_id).in_(list(links))
+    )
+    if pairs:
+        stale = stale.where(
+            tuple_(
+                col(ContractStandardPriority.contract_id),
+                col(ContractStandardPriority.priority_id),
+            ).not_in(pairs)
+        )
+    session.execute(stale)
+    if pairs:
+        session.execute(
+            pg_insert(ContractStandardPriority)
+            .values(
+                [
+                    {"contract_id": contract_id, "priority_id": priority_id}
+                    for contract_id, priority_id in pairs
+                ]
+            )
+            .on_conflict_do_nothing(index_elements=["contract_id", "priority_id"])
+        )
+
+
+def _replace_individual_priorities(
+    session: Session, priorities: Mapping[UUID, Sequence[BasePriorityBase]]
+) -> None:
+    """
+    Заменяет индивидуальные приоритеты договоров
+
+    Приоритеты сопоставляются по названию: существующие обновляются на месте
+    (ссылки обращений на них сохраняются, сроки обращений пересчитываются),
+    отсутствующие в наборе удаляются.
+    """
+    if not priorities:
+        return
+    rows = [
+        {"id": uuid4(), "contract_id": contract_id, **priority.model_dump()}
+        for contract_id, items in priorities.items()
+        for priority in items
+    ]
+    stale = delete(IndividualPriority).where(
+        col(IndividualPriority.contract_id).in_(list(priorities))
+    )
+    if rows:
+        stale = stale.where(
+            tuple_(
+                col(IndividualPriority.contract_id), col(IndividualPriority.name)
+            ).not_in([(row["contract_id"], row["name"]) for row in rows])
+        )
+    session.execute(stale)
+    if rows:
+        statement = pg_insert(IndividualPriority).values(rows)
+        upsert = statement.on_conflict_do_update(
+            index_elements=["contract_id", "name"],
+            set_={
+                "hours": statement.excluded.hours,
+                "description": statement.excluded.description,
+            },
+        ).returning(col(IndividualPriority.id))
+        priority_ids = session.execute(upsert).scalars().all()
+        appeal_ids = get_priority_appeal_ids(
+            session=session, individual_ids=priority_ids
+        )
+        refresh_appeals_sla(session=session, appeal_ids=appeal_ids)
 
 
 def create_contract(
@@ -23,20 +130,16 @@ def create_contract(
 
     db_contract = Contract.model_validate(contract_in)
     session.add(db_contract)
+    # Договор и связи с приоритетами фиксируются одной транзакцией
+    session.flush()
+    if standard_priority_ids:
+        _replace_standard_priority_links(
+            session, {db_contract.id: standard_priority_ids}
+        )
     session.commit()
     session.refresh(db_contract)
 
-    # Добавляем стандартные приоритеты
-    if standard_priority_ids:
-        for priority_id in standard_priority_ids:
-            contract_priority = ContractStandardPriority(
-                contract_id=db_contract.id,
-                priority_id=priority_id,
-            )
-            session.add(contract_priority)
-        session.commit()
-        session.refresh(db_contract)
-
+    invalidate_priority_catalog(db_contract.organization_id)
     return db_contract
 
 
@@ -46,7 +149,7 @@ def get_contract(
     contract_id: UUID,
 ) -> Contract | None:
     """Получение контракта по ID"""
-    return session.get(Contract, contract_id)
+    return session.get(Contract, contract_id, options=loader_options("contract_detail"))
 
 
 def get_contracts(
@@ -116,25 +219,14 @@ def update_contract(
 
     # Обновляем стандартные приоритеты
     if standard_priority_ids is not None:
-        # Удаляем старые связи
-        statement = select(ContractStandardPriority).where(
-            ContractStandardPriority.contract_id == db_contract.id
-        )
-        existing_links = session.exec(statement).all()
-        for link in existing_links:
-            session.delete(link)
-
-        # Добавляем новые связи
-        for priority_id in standard_priority_ids:
-            contract_priority = ContractStandardPriority(
-                contract_id=db_contract.id,
-                priority_id=priority_id,
-            )
-            session.add(contract_priority)
+        _replace_standard_priority_links(
+            session, {db_contract.id: standard_priority_ids}
+        )
 
     session.add(db_contract)
     session.commit()
     session.refresh(db_contract)
+    invalidate_priority_catalog(db_contract.organization_id)
     return db_contract
 
 
@@ -152,19 +244,238 @@ def delete_contract(
         )
 
     # Проверяем, есть ли индивидуальные приоритеты
-    if contract.individual_priorities:
+    statement = select(IndividualPriority.id).where(
+        IndividualPriority.contract_id == contract_id
+    )
+    if session.exec(statement.limit(1)).first():
         raise HTTPException(
             status_code=400,
             detail="Cannot delete contract with individual priorities",
         )
 
     # Удаляем связи со стандартными приоритетами
-    statement = select(ContractStandardPriority).where(
-        ContractStandardPriority.contract_id == contract_id
-    )
-    links = session.exec(statement).all()
+    links = session.exec(
+        select(ContractStandardPriority).where(
+            ContractStandardPriority.contract_id == contract_id
+        )
+    ).all()
     for link in links:
         session.delete(link)
 
+    organization_id = contract.organization_id
     session.delete(contract)
     session.commit()
+    invalidate_priority_catalog(organization_id)
+
+
+def _upsert_standard_priorities(
+    session: Session, items: Sequence[BasePriorityBase]
+) -> tuple[list[BulkItemResult], dict[str, UUID]]:
+    """
+    Создает или обновляет стандартные приоритеты по названию одним запросом
+
+    Сроки открытых обращений с этими приоритетами пересчитываются.
+    """
+    results: list[BulkItemResult] = []
+    indexes: dict[str, int] = {}
+    for index, item in enumerate(items):
+        if item.name in indexes:
+            results.append(
+                BulkItemResult(
+                    index=index, status="failed", detail="Duplicate priority name"
+                )
+            )
+        else:
+            indexes[item.name] = index
+    if not indexes:
+        return results, {}
+
+    existing = set(
+        session.exec(
+            select(StandardPriority.name).where(
+                col(StandardPriority.name).in_(list(indexes))
+            )
+        ).all()
+    )
+    statement = pg_insert(StandardPriority).values(
+        [{"id": uuid4(), **items[index].model_dump()} for index in indexes.values()]
+    )
+    upsert = statement.on_conflict_do_update(
+        index_elements=["name"],
+        set_={
+            "hours": statement.excluded.hours,
+            "description": statement.excluded.description,
+        },
+    ).returning(col(StandardPriority.name), col(StandardPriority.id))
+    priority_ids = dict(session.execute(upsert).tuples().all())
+    appeal_ids = get_priority_appeal_ids(
+        session=session, standard_ids=priority_ids.values(), names=priority_ids.keys()
+    )
+    refresh_appeals_sla(session=session, appeal_ids=appeal_ids)
+    results.extend(
+        BulkItemResult(
+            index=index,
+            id=priority_ids[name],
+            status="updated" if name in existing else "created",
+        )
+        for name, index in indexes.items()
+    )
+    return results, priority_ids
+
+
+def _bulk_contract_error(
+    item: ContractBulkItem,
+    *,
+    contracts: Mapping[UUID, UUID],
+    organization_ids: set[UUID],
+    priority_ids: Mapping[str, UUID],
+    used_priorities: Mapping[UUID, set[str]],
+) -> str | None:
+    if item.start_dt >= item.end_dt:
+        return "Start date must be before end date"
+    if item.id is not None and item.id not in contracts:
+        return "Contract not found"
+    if item.organization_id not in organization_ids:
+        return "Organization not found"
+    if item.standard_priorities is not None:
+        unknown = sorted(set(item.standard_priorities) - priority_ids.keys())
+        if unknown:
+            return f"Unknown standard priorities: {', '.join(unknown)}"
+    if item.individual_priorities is not None:
+        names = [priority.name for priority in item.individual_priorities]
+        if len(names) != len(set(names)):
+            return "Duplicate individual priority name"
+        # Приоритет, на который ссылаются обращения, удалить нельзя
+        used = used_priorities.get(item.id, set()) if item.id is not None else set()
+        in_use = sorted(used - set(names))
+        if in_use:
+            return f"Individual priorities are used by appeals: {', '.join(in_use)}"
+    return None
+
+
+def apply_contracts_bulk(
+    *,
+    session: Session,
+    bulk_in: ContractBulkRequest,
+) -> ContractBulkResult:
+    """
+    Массовое создание и обновление стандартных приоритетов и договоров
+
+    Для всей пачки - несколько запросов: проверки, вставки с ON CONFLICT
+    и удаления с NOT IN, одна транзакция. Ошибочные элементы пропускаются
+    и отмечаются в результате, остальные применяются.
+    """
+    priority_results, priority_ids = _upsert_standard_priorities(
+        session, bulk_in.standard_priorities
+    )
+
+    items = bulk_in.contracts
+    contract_ids = {item.id for item in items if item.id is not None}
+    contracts = dict(
+        session.exec(
+            select(Contract.id, Contract.organization_id).where(
+                col(Contract.id).in_(list(contract_ids))
+            )
+        ).all()
+        if contract_ids
+        else []
+    )
+    organization_ids = set(
+        session.exec(
+            select(Organization.id).where(
+                col(Organization.id).in_([item.organization_id for item in items])
+            )
+        ).all()
+        if items
+        else []
+    )
+    names = {
+        name
+        for item in items
+        for name in item.standard_priorities or ()
+        if name not in priority_ids
+    }
+    if names:
+        priority_ids |= dict(
+            session.exec(
+                select(StandardPriority.name, StandardPriority.id).where(
+                    col(StandardPriority.name).in_(list(names))
+                )
+            ).all()
+        )
+    used_priorities: dict[UUID, set[str]] = {}
+    if contracts:
+        used = session.exec(
+            select(IndividualPriority.contract_id, IndividualPriority.name)
+            .join(Appeal, col(Appeal.individual_priority_id) == IndividualPriority.id)
+            .where(col(IndividualPriority.contract_id).in_(list(contracts)))
+            .distinct()
+        ).all()
+        for contract_id, name in used:
+            used_priorities.setdefault(contract_id, set()).add(name)
+
+    results: list[BulkItemResult] = []
+    rows: list[dict[str, Any]] = []
+    links: dict[UUID, list[UUID]] = {}
+    individual: dict[UUID, list[BasePriorityBase]] = {}
+    seen: set[UUID] = set()
+    for index, item in enumerate(items):
+        detail = _bulk_contract_error(
+            item,
+            contracts=contracts,
+            organization_ids=organization_ids,
+            priority_ids=priority_ids,
+            used_priorities=used_priorities,
+        )
+        if detail is None and item.id in seen:
+            detail = "Duplicate contract"
+        if detail is not None:
+            results.append(BulkItemResult(index=index, status="failed", detail=detail))
+            continue
+        contract_id = item.id or uuid4()
+        seen.add(contract_id)
+        rows.append(
+            {
+                "id": contract_id,
+                **item.model_dump(include=set(ContractCreate.model_fields)),
+            }
+        )
+        if item.standard_priorities is not None:
+            links[contract_id] = [priority_ids[n] for n in item.standard_priorities]
+        if item.individual_priorities is not None:
+            individual[contract_id] = item.individual_priorities
+        results.append(
+            BulkItemResult(
+                index=index,
+                id=contract_id,
+                status="updated" if item.id is not None else "created",
+            )
+        )
+
+    if rows:
+        statement = pg_insert(Contract).values(rows)
+        session.execute(
+            statement.on_conflict_do_update(
+                index_elements=["id"],
+                set_={
+                    field: statement.excluded[field]
+                    for field in ContractCreate.model_fields
+                },
+            )
+        )
+        _replace_standard_priority_links(session, links)
+        _replace_individual_priorities(session, individual)
+    session.commit()
+
+    # Стандартный приоритет мог входить в договоры любых организаций
+    if any(result.status == "updated" for result in priority_results):
+        invalidate_priority_catalog()
+    else:
+        for row in rows:
+            invalidate_priority_catalog(row["organization_id"])
+            if row["id"] in contracts:
+                invalidate_priority_catalog(contracts[row["id"]])
+    return ContractBulkResult(
+        standard_priorities=sorted(priority_results, key=lambda r: r.index),
+        contracts=results,
+    )
@@ -4,6 +4,7 @@ from fastapi import HTTPException
 from sqlmodel import Session, select
 
 from app.models.department import Department, DepartmentCreate, DepartmentUpdate
+from app.models.specialist import Specialist
 
 
 def create_department(
@@ -124,7 +125,8 @@ def delete_department(
         )
 
     # Проверяем, есть ли специалисты в отделе
-    if department.specialists:
+    statement = select(Specialist.id).where(Specialist.department_id == department_id)
+    if session.exec(statement.limit(1)).first():
         raise HTTPException(
             status_code=400,
             detail="Cannot delete department with specialists",
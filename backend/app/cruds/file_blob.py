@@ -0,0 +1,351 @@
+import asyncio
+from collections import Counter
+from collections.abc import Sequence
+from dataclasses import dataclass
+from pathlib import PurePosixPath
+from typing import Any
+from uuid import UUID
+
+from fastapi import HTTPException, Request, UploadFile
+from fastapi.responses import Response
+from sqlalchemy import delete, func, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlmodel import Session, col, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from app.core.archive import ArchiveEntry, unique_name
+from app.core.files import (
+    blob_key,
+    delete_blob,
+    delete_upload_file,
+    get_file_response,
+    hash_upload,
+    sniff_content_type,
+    store_blob,
+    upload_path,
+)
+from app.core.previews import ensure_variant_async, schedule_variants
+from app.models.appeal_file import AppealFile
+from app.models.comment import Comment
+from app.models.comment_file import CommentFile
+from app.models.file_blob import FileBlob, FileVariant
+
+
+@dataclass(frozen=True)
+class StoredFile:
+    """Сохраненный файл: логическое имя и ссылка на содержимое"""
+
+    path: str
+    sha256: str
+    size: int
+    content_type: str
+
+
+@dataclass(frozen=True)
+class ReleasedFiles:
+    """Содержимое, на которое после удаления файлов не осталось ссылок"""
+
+    blobs: list[str]
+    legacy: list[str]
+
+
+def _lock_blob(sha256: str, *, shared: bool) -> Any:
+    # Блокировка по хэшу до конца транзакции: загрузки берут ее совместно,
+    # удаление содержимого - монопольно
+    lock = func.pg_advisory_xact_lock_shared if shared else func.pg_advisory_xact_lock
+    return select(lock(func.hashtextextended(sha256, 0)))
+
+
+def _insert_blob(sha256: str, size: int, content_type: str) -> Any:
+    return (
+        pg_insert(FileBlob)
+        .values(sha256=sha256, size=size, content_type=content_type, ref_count=1)
+        .on_conflict_do_nothing(index_elements=["sha256"])
+        .returning(col(FileBlob.sha256))
+    )
+
+
+def _add_refs(sha256: str, count: int) -> Any:
+    return (
+        update(FileBlob)
+        .where(col(FileBlob.sha256) == sha256)
+        .values(ref_count=FileBlob.ref_count + count)
+    )
+
+
+def _blob_exists(sha256: str) -> Any:
+    return select(FileBlob.sha256).where(FileBlob.sha256 == sha256)
+
+
+def _delete_unreferenced(digests: Sequence[str]) -> Any:
+    return (
+        delete(FileBlob)
+        .where(col(FileBlob.sha256).in_(digests), col(FileBlob.ref_count) <= 0)
+        .returning(col(FileBlob.sha256))
+    )
+
+
+def acquire_blob(
+    *, session: Session, sha256: str, size: int, content_type: str
+) -> bool:
+    """
+    Добавляет ссылку на блоб
+
+    Возвращает True, если блоба не было и содержимое нужно записать
+    в хранилище.
+    """
+    session.exec(_lock_blob(sha256, shared=True))
+    if session.exec(_insert_blob(sha256, size, content_type)).first() is not None:
+        return True
+    session.exec(_add_refs(sha256, 1))
+    return False
+
+
+async def acquire_blob_async(
+    *, session: AsyncSession, sha256: str, size: int, content_type: str
+) -> bool:
+    """Асинхронное добавление ссылки на блоб"""
+    await session.exec(_lock_blob(sha256, shared=True))
+    inserted = await session.exec(_insert_blob(sha256, size, content_type))
+    if inserted.first() is not None:
+        return True
+    await session.exec(_add_refs(sha256, 1))
+    return False
+
+
+def save_upload_file(
+    *,
+    session: Session,
+    file: UploadFile,
+    folder: str,
+    entity_id: UUID,
+) -> StoredFile:
+    """
+    Сохраняет загруженный файл с дедупликацией по содержимому
+
+    Ссылка на блоб берется до записи содержимого под блокировкой по хэшу:
+    удаление содержимого того же блоба дождется нашего коммита и увидит
+    новую ссылку. Коммит остается за вызывающим кодом.
+    Миниатюры нового блоба строятся в фоне в пуле процессов.
+    """
+    path = upload_path(filename=file.filename, folder=folder, entity_id=entity_id)
+    sha256, size, content_type = hash_upload(file)
+    created = acquire_blob(
+        session=session, sha256=sha256, size=size, content_type=content_type
+    )
+    store_blob(file=file, sha256=sha256, force=created)
+    if created:
+        schedule_variants(sha256=sha256, content_type=content_type)
+    return StoredFile(path=path, sha256=sha256, size=size, content_type=content_type)
+
+
+async def save_upload_files_async(
+    *,
+    session: AsyncSession,
+    files: list[UploadFile],
+    folder: str,
+    entity_id: UUID,
+) -> list[StoredFile]:
+    """
+    Асинхронно сохраняет файлы одного запроса
+
+    Хэши считаются и содержимое пишется параллельно в пуле потоков;
+    ссылки на блобы берутся последовательно в сессии запроса. Миниатюры
+    новых блобов строятся в фоне.
+    """
+    paths = [
+        upload_path(filename=file.filename, folder=folder, entity_id=entity_id)
+        for file in files
+    ]
+    hashes = await asyncio.gather(
+        *(run_in_threadpool(hash_upload, file) for file in files)
+    )
+    created = [
+        await acquire_blob_async(
+            session=session, sha256=sha256, size=size, content_type=content_type
+        )
+        for sha256, size, content_type in hashes
+    ]
+    # Одинаковые файлы в одном запросе записываются один раз
+    pending: dict[str, tuple[UploadFile, bool]] = {}
+    for file, (sha256, _, _), force in zip(files, hashes, created, strict=True):
+        pending.setdefault(sha256, (file, force))
+    await asyncio.gather(
+        *(
+            run_in_threadpool(store_blob, file=file, sha256=sha256, force=force)
+            for sha256, (file, force) in pending.items()
+        )
+    )
+    content_types = {sha256: content_type for sha256, _, content_type in hashes}
+    for sha256, (_, force) in pending.items():
+        if force:
+            schedule_variants(sha256=sha256, content_type=content_types[sha256])
+    return [
+        StoredFile(path=path, sha256=sha256, size=size, content_type=content_type)
+        for path, (sha256, size, content_type) in zip(paths, hashes, strict=True)
+    ]
+
+
+def _release_statements(
+    files: Sequence[AppealFile | CommentFile],
+) -> tuple[list[Any], list[str], list[str]]:
+    counts = Counter(file.blob_sha256 for file in files if file.blob_sha256)
+    # Фиксированный порядок блокировок строк, чтобы не было взаимоблокировок
+    digests = sorted(counts)
+    updates = [_add_refs(sha256, -counts[sha256]) for sha256 in digests]
+    legacy = [file.file for file in files if not file.blob_sha256]
+    return updates, digests, legacy
+
+
+def release_files(
+    *, session: Session, files: Sequence[AppealFile | CommentFile]
+) -> ReleasedFiles:
+    """
+    Снимает ссылки удаляемых файлов на блобы
+
+    Блобы без ссылок удаляются из БД. Возвращает содержимое, которое нужно
+    удалить из хранилища через purge_released_files после коммита: при
+    откате транзакции содержимое должно остаться на месте. Файлы без блоба
+    (загруженные до дедупликации) возвращаются по пути.
+    """
+    # Строки файлов должны быть удалены раньше строк блобов
+    session.flush()
+    updates, digests, legacy = _release_statements(files)
+    for statement in updates:
+        session.exec(statement)
+    orphaned = (
+        session.exec(_delete_unreferenced(digests)).scalars().all() if digests else []
+    )
+    return ReleasedFiles(blobs=sorted(orphaned), legacy=legacy)
+
+
+async def release_files_async(
+    *, session: AsyncSession, files: Sequence[AppealFile | CommentFile]
+) -> ReleasedFiles:
+    """Асинхронно снимает ссылки удаляемых файлов на блобы"""
+    await session.flush()
+    updates, digests, legacy = _release_statements(files)
+    for statement in updates:
+        await session.exec(statement)
+    orphaned = []
+    if digests:
+        orphaned = (await session.exec(_delete_unreferenced(digests))).scalars().all()
+    return ReleasedFiles(blobs=sorted(orphaned), legacy=legacy)
+
+
+def purge_released_files(*, session: Session, released: ReleasedFiles) -> None:
+    """
+    Удаляет из хранилища содержимое, освобожденное release_files
+
+    Вызывается после коммита удаления. Каждый блоб проверяется в отдельной
+    транзакции под монопольной блокировкой по хэшу: если параллельная
+    загрузка уже создала блоб заново, его содержимое не удаляется.
+    """
+    for sha256 in released.blobs:
+        session.exec(_lock_blob(sha256, shared=False))
+        if session.exec(_blob_exists(sha256)).first() is None:
+            delete_blob(sha256=sha256)
+        session.commit()
+    for file_path in released.legacy:
+        delete_upload_file(file_path=file_path)
+
+
+async def purge_released_files_async(
+    *, session: AsyncSession, released: ReleasedFiles
+) -> None:
+    """Асинхронно удаляет содержимое, освобожденное release_files_async"""
+    for sha256 in released.blobs:
+        await session.exec(_lock_blob(sha256, shared=False))
+        if (await session.exec(_blob_exists(sha256))).first() is None:
+            await run_in_threadpool(delete_blob, sha256=sha256)
+        await session.commit()
+
+    def delete_legacy() -> None:
+        for file_path in released.legacy:
+            delete_upload_file(file_path=file_path)
+
+    await run_in_threadpool(delete_legacy)
+
+
+async def file_response_async(
+    *,
+    session: AsyncSession,
+    request: Request,
+    file: AppealFile | CommentFile,
+    variant: FileVariant | None = None,
+) -> Response:
+    """
+    Ответ для скачивания файла обращения или комментария
+
+    variant - производный файл вместо оригинала; 404, если для файла
+    такого типа его не бывает.
+    """
+    blob = await session.get(FileBlob, file.blob_sha256) if file.blob_sha256 else None
+    if variant is not None and (
+        blob is None
+        or not await ensure_variant_async(
+            sha256=blob.sha256, content_type=blob.content_type, variant=variant
+        )
+    ):
+        raise HTTPException(status_code=404, detail="Preview not available")
+    return await get_file_response(
+        request=request,
+        file_path=file.file,
+        blob_sha256=file.blob_sha256,
+        content_type=blob.content_type if blob else None,
+        variant=variant,
+    )
+
+
+async def get_appeal_archive_entries_async(
+    *, session: AsyncSession, appeal_id: UUID
+) -> list[ArchiveEntry]:
+    """
+    Файлы обращения и его комментариев для архива
+
+    Файлы обращения лежат в корне архива, файлы комментариев - в папках
+    comments/<время комментария>.
+    """
+    appeal_files = await session.exec(
+        select(AppealFile, FileBlob)
+        .outerjoin(FileBlob, col(FileBlob.sha256) == AppealFile.blob_sha256)
+        .where(AppealFile.appeal_id == appeal_id)
+        .order_by(col(AppealFile.id))
+    )
+    comment_files = await session.exec(
+        select(CommentFile, FileBlob, Comment.created_at)
+        .join(Comment, col(Comment.id) == CommentFile.comment_id)
+        .outerjoin(FileBlob, col(FileBlob.sha256) == CommentFile.blob_sha256)
+        .where(Comment.appeal_id == appeal_id)
+        .order_by(col(Comment.created_at), col(CommentFile.id))
+    )
+    rows = [(file, blob, "") for file, blob in appeal_files.all()] + [
+        (file, blob, f"comments/{created_at:%Y-%m-%d %H-%M-%S}/")
+        for file, blob, created_at in comment_files.all()
+    ]
+
+    used: set[str] = set()
+    entries = []
+    for file, blob, folder in rows:
+        name = unique_name(folder + PurePosixPath(file.file).name, used)
+        if blob is None:
+            # Файл до дедупликации: размер и время берутся из хранилища
+            entries.append(
+                ArchiveEntry(
+                    name=name,
+                    key=file.file,
+                    content_type=sniff_content_type(b"", file.file),
+                )
+            )
+        else:
+            entries.append(
+                ArchiveEntry(
+                    name=name,
+                    key=blob_key(blob.sha256),
+                    content_type=blob.content_type,
+                    size=blob.size,
+                    modified=blob.created_at,
+                )
+            )
+    return entries
@@ -0,0 +1,75 @@
+from typing import Any, cast
+
+from sqlalchemy.orm import QueryableAttribute, joinedload, raiseload, selectinload
+from sqlalchemy.orm.interfaces import ORMOption
+
+from app.models.appeal import Appeal
+from app.models.comment import Comment
+from app.models.contract import Contract
+from app.models.organization import Organization
+from app.models.priority import ContractStandardPriority
+from app.models.representative import Representative
+from app.models.specialist import Specialist
+from app.models.user import User
+
+
+def _rel(attribute: Any) -> QueryableAttribute[Any]:
+    # SQLModel типизирует связь значением (User, list[File]), а опциям
+    # загрузки нужен атрибут ORM
+    return cast(QueryableAttribute[Any], attribute)
+
+
+# Все связи моделей по умолчанию lazy="raise": обращение к незагруженной связи
+# падает сразу, а не делает скрытый запрос. Что именно подгружать, решает
+# crud-функция, явно применяя один из профилей ниже.
+LOADER_PROFILES: dict[str, tuple[ORMOption, ...]] = {
+    # Текущий пользователь: представитель и организации специалиста
+    "auth_user": (
+        joinedload(_rel(User.representative)),
+        joinedload(_rel(User.specialist)).selectinload(
+            _rel(Specialist.organization_links)
+        ),
+    ),
+    # Списки обращений отдают только колонки самих обращений
+    "appeal_list": (raiseload("*"),),
+    # Карточка обращения: статус, файлы, автор с организацией
+    "appeal_detail": (
+        joinedload(_rel(Appeal.status)),
+        joinedload(_rel(Appeal.responsible_user)),
+        joinedload(_rel(Appeal.user))
+        .joinedload(_rel(User.representative))
+        .joinedload(_rel(Representative.organization))
+        .joinedload(_rel(Organization.custom_appeal_completion_status)),
+        selectinload(_rel(Appeal.files)),
+    ),
+    # Строка отчета по обращениям организации
+    "report_row": (
+        joinedload(_rel(Appeal.status)),
+        joinedload(_rel(Appeal.responsible_user)),
+        joinedload(_rel(Appeal.user))
+        .joinedload(_rel(User.representative))
+        .joinedload(_rel(Representative.organization)),
+    ),
+    # Уведомление об обращении: организация автора
+    "appeal_notification": (
+        joinedload(_rel(Appeal.user))
+        .joinedload(_rel(User.representative))
+        .joinedload(_rel(Representative.organization)),
+    ),
+    "comment_detail": (selectinload(_rel(Comment.comment_files)),),
+    "contract_detail": (
+        selectinload(_rel(Contract.standard_priority_links)).joinedload(
+            _rel(ContractStandardPriority.priority)
+        ),
+        selectinload(_rel(Contract.individual_priorities)),
+    ),
+    "representative_detail": (joinedload(_rel(Representative.organization)),),
+}
+
+
+def loader_options(profile: str) -> tuple[ORMOption, ...]:
+    """Возвращает опции загрузки связей для именованного профиля"""
+    try:
+        return LOADER_PROFILES[profile]
+    except KeyError:
+        raise ValueError(f"Unknown loader profile: {profile}")
@@ -0,0 +1,148 @@
+from collections import defaultdict
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass
+from typing import Any
+from uuid import UUID
+
+from sqlalchemy import union
+from sqlalchemy.orm import aliased
+from sqlmodel import Session, col, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import settings
+from app.core.templates import get_email_templates
+from app.models.appeal import Appeal
+from app.models.notification_outbox import NotificationOutbox
+from app.models.organization import Organization
+from app.models.representative import Representative
+from app.models.user import User
+
+FANOUT_TEMPLATE = "appeals_notice.html"
+# Сколько получателей в одной записи outbox: запись отправляется и
+# повторяется целиком, поэтому группы не делаются слишком большими
+FANOUT_RECIPIENTS_PER_NOTIFICATION = 50
+
+# Автор обращения определяет организацию, остальные представители этой
+# организации - получатели
+_Author = aliased(Representative, name="author")
+_Member = aliased(Representative, name="member")
+
+
+@dataclass(frozen=True)
+class AppealNotice:
+    """Одно событие, о котором уведомляются все затронутые организации"""
+
+    subject: str
+    title: str
+    message: str
+
+
+def _recipients_statement(appeal_ids: Sequence[UUID]) -> Any:
+    """
+    Получатели по всем обращениям одним запросом: email организации-автора
+    и активные представители этой организации, без повторов пар
+    (адрес, обращение)
+    """
+
+    def by_appeal(email: Any) -> Any:
+        return (
+            select(
+                email.label("email"),
+                col(Organization.name).label("organization"),
+                col(Appeal.id).label("appeal_id"),
+                col(Appeal.subject).label("appeal_subject"),
+            )
+            .select_from(Appeal)
+            .join(_Author, col(_Author.user_id) == Appeal.user_id)
+            .join(Organization, col(Organization.id) == _Author.organization_id)
+            .where(col(Appeal.id).in_(appeal_ids))
+        )
+
+    organizations = by_appeal(Organization.email).where(Organization.email != "")
+    representatives = (
+        by_appeal(User.email)
+        .join(_Member, _Member.organization_id == Organization.id)
+        .join(User, User.id == _Member.user_id)
+        .where(User.is_active)
+    )
+    return union(organizations, representatives)
+
+
+def _fanout_notifications(
+    rows: Iterable[Any], notice: AppealNotice
+) -> list[NotificationOutbox]:
+    # Один адрес - одно письмо со всеми его обращениями
+    addresses: dict[str, str] = {}
+    organizations: dict[str, set[str]] = defaultdict(set)
+    appeals: dict[str, dict[UUID, str]] = defaultdict(dict)
+    for email, organization, appeal_id, appeal_subject in rows:
+        key = email.strip().lower()
+        addresses.setdefault(key, email.strip())
+        organizations[key].add(organization)
+        appeals[key][appeal_id] = appeal_subject
+
+    # Получатели с одинаковым содержимым письма - одна группа, письмо
+    # группы рендерится один раз
+    groups: dict[tuple[Any, ...], list[str]] = defaultdict(list)
+    for key, address in addresses.items():
+        content = (
+            tuple(sorted(organizations[key])),
+            tuple(sorted(appeals[key].items(), key=lambda item: str(item[0]))),
+        )
+        groups[content].append(address)
+
+    templates = get_email_templates()
+    notifications = []
+    for (organization_names, appeal_items), recipients in groups.items():
+        html = templates.render(
+            FANOUT_TEMPLATE,
+            {
+                "title": notice.title,
+                "message": notice.message,
+                "organizations": organization_names,
+                "appeals": [
+                    {"id": str(appeal_id), "subject": subject}
+                    for appeal_id, subject in appeal_items
+                ],
+            },
+        )
+        for start in range(0, len(recipients), FANOUT_RECIPIENTS_PER_NOTIFICATION):
+            chunk = recipients[start : start + FANOUT_RECIPIENTS_PER_NOTIFICATION]
+            notifications.append(
+                NotificationOutbox(
+                    kind="email.message",
+                    payload={"to": chunk, "subject": notice.subject, "html": html},
+                )
+            )
+    return notifications
+
+
+def enqueue_appeal_fanout(
+    *, session: Session, appeal_ids: Sequence[UUID], notice: AppealNotice
+) -> int:
+    """
+    Уведомляет организации и представителей по множеству обращений
+
+    Получатели вычисляются одним запросом, каждый получает одно письмо со
+    списком своих обращений; одинаковые письма рендерятся один раз, записи
+    outbox добавляются одной пачкой. Коммит остается за вызывающим кодом.
+    Возвращает количество записей outbox.
+    """
+    if not appeal_ids or not settings.emails_enabled:
+        return 0
+    rows = session.exec(_recipients_statement(appeal_ids)).all()
+    notifications = _fanout_notifications(rows, notice)
+    session.add_all(notifications)
+    return len(notifications)
+
+
+async def enqueue_appeal_fanout_async(
+    *, session: AsyncSession, appeal_ids: Sequence[UUID], notice: AppealNotice
+) -> int:
+    """Асинхронная рассылка уведомления по множеству обращений"""
+    if not appeal_ids or not settings.emails_enabled:
+        return 0
+    rows = (await session.exec(_recipients_statement(appeal_ids))).all()
+    notifications = _fanout_notifications(rows, notice)
+    session.add_all(notifications)
+    return len(notifications)
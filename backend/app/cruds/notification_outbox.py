@@ -0,0 +1,48 @@
+from typing import Any, Literal
+
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models.appeal import Appeal
+from app.models.notification_outbox import NotificationOutbox
+
+AppealEvent = Literal[
+    "created", "status_changed", "closed", "sla_warning", "sla_breached"
+]
+
+# Какие уведомления отправляются при событии обращения; каждое - отдельная
+# запись outbox, поэтому сбой одного канала не повторяет отправку в другой
+APPEAL_NOTIFICATIONS: dict[AppealEvent, tuple[str, ...]] = {
+    "created": ("email.appeal_created", "bot.appeal_created"),
+    "status_changed": ("email.appeal_status_changed", "bot.appeal_updated"),
+    "closed": ("email.appeal_closed",),
+    "sla_warning": ("email.appeal_sla_warning",),
+    "sla_breached": ("email.appeal_sla_breached",),
+}
+
+
+def enqueue_notification(
+    *, session: Session | AsyncSession, kind: str, payload: dict[str, Any]
+) -> NotificationOutbox:
+    """
+    Добавляет уведомление в outbox текущей транзакции
+
+    Запись попадает в БД вместе с коммитом вызывающего кода; payload
+    должен сериализоваться в JSON.
+    """
+    notification = NotificationOutbox(kind=kind, payload=payload)
+    session.add(notification)
+    return notification
+
+
+def enqueue_appeal_notifications(
+    *,
+    session: Session | AsyncSession,
+    event: AppealEvent,
+    appeal: Appeal,
+    **extra: Any,
+) -> None:
+    """Уведомления о событии обращения; extra дополняет payload"""
+    payload = {"appeal_id": str(appeal.id), **extra}
+    for kind in APPEAL_NOTIFICATIONS[event]:
+        enqueue_notification(session=session, kind=kind, payload=payload)
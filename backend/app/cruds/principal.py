@@ -0,0 +1,74 @@
+from typing import Any
+from uuid import UUID
+
+from sqlmodel import Session, col, func, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.principal import Principal, principal_cache
+from app.models.representative import Representative
+from app.models.specialist import Specialist, SpecialistOrganization
+from app.models.user import User
+
+
+def _principal_statement(user_id: UUID) -> Any:
+    """Один запрос: флаги пользователя, его организация и организации специалиста"""
+    organization_id = col(SpecialistOrganization.organization_id)
+    controlled_organization_ids = func.array_agg(organization_id).filter(
+        organization_id.is_not(None)
+    )
+    return (
+        select(
+            User.id,
+            User.is_active,
+            User.is_superuser,
+            Representative.organization_id,
+        )
+        .add_columns(controlled_organization_ids)
+        .select_from(User)
+        .outerjoin(Representative, col(Representative.user_id) == User.id)
+        .outerjoin(Specialist, col(Specialist.user_id) == User.id)
+        .outerjoin(
+            SpecialistOrganization,
+            col(SpecialistOrganization.specialist_id) == Specialist.id,
+        )
+        .where(col(User.id) == user_id)
+        .group_by(col(User.id), col(Representative.organization_id))
+    )
+
+
+def _build_principal(row: Any) -> Principal:
+    user_id, is_active, is_superuser, organization_id, controlled_ids = row
+    return Principal(
+        id=user_id,
+        is_active=is_active,
+        is_superuser=is_superuser,
+        organization_id=organization_id,
+        controlled_organization_ids=controlled_ids or (),
+    )
+
+
+def get_principal(*, session: Session, user_id: UUID) -> Principal | None:
+    """Получение принципала пользователя (из кэша или одним запросом)"""
+    principal = principal_cache.get(user_id)
+    if principal is None:
+        row = session.exec(_principal_statement(user_id)).first()
+        if row is None:
+            return None
+        principal = _build_principal(row)
+        principal_cache.set(user_id, principal)
+    return principal
+
+
+async def get_principal_async(
+    *, session: AsyncSession, user_id: UUID
+) -> Principal | None:
+    """Асинхронное получение принципала пользователя"""
+    principal = principal_cache.get(user_id)
+    if principal is None:
+        result = await session.exec(_principal_statement(user_id))
+        row = result.first()
+        if row is None:
+            return None
+        principal = _build_principal(row)
+        principal_cache.set(user_id, principal)
+    return principal
@@ -3,6 +3,9 @@ from uuid import UUID
 from fastapi import HTTPException
 from sqlmodel import Session, select
 
+from app.core.priority_catalog import invalidate_priority_catalog
+from app.cruds.sla import get_priority_appeal_ids, refresh_appeals_sla
+from app.models.contract import Contract
 from app.models.priority import (
     BasePriorityBase,
     ContractStandardPriority,
@@ -11,6 +14,15 @@ from app.models.priority import (
 )
 
 
+def _invalidate_contract_catalog(session: Session, contract_id: UUID) -> None:
+    """Сбрасывает каталог приоритетов организации договора"""
+    organization_id = session.exec(
+        select(Contract.organization_id).where(Contract.id == contract_id)
+    ).first()
+    if organization_id is not None:
+        invalidate_priority_catalog(organization_id)
+
+
 def create_standard_priority(
     *,
     session: Session,
@@ -58,6 +70,7 @@ def create_individual_priority(
     session.add(db_priority)
     session.commit()
     session.refresh(db_priority)
+    _invalidate_contract_catalog(session, contract_id)
     return db_priority
 
 
@@ -148,11 +161,19 @@ def update_standard_priority(
                 detail="Priority with this name already exists",
             )
 
+    # Обращения без ссылки ищут норматив по названию: старому и новому
+    names = {db_priority.name, priority_in.name}
     update_data = priority_in.model_dump(exclude_unset=True)
     db_priority.sqlmodel_update(update_data)
     session.add(db_priority)
+    # Норматив хранится в обращениях, сроки пересчитываются той же транзакцией
+    appeal_ids = get_priority_appeal_ids(
+        session=session, standard_ids=[db_priority.id], names=names
+    )
+    refresh_appeals_sla(session=session, appeal_ids=appeal_ids)
     session.commit()
     session.refresh(db_priority)
+    invalidate_priority_catalog()
     return db_priority
 
 
@@ -178,8 +199,14 @@ def update_individual_priority(
     update_data = priority_in.model_dump(exclude_unset=True)
     db_priority.sqlmodel_update(update_data)
     session.add(db_priority)
+    # Норматив хранится в обращениях, сроки пересчитываются той же транзакцией
+    appeal_ids = get_priority_appeal_ids(
+        session=session, individual_ids=[db_priority.id]
+    )
+    refresh_appeals_sla(session=session, appeal_ids=appeal_ids)
     session.commit()
     session.refresh(db_priority)
+    _invalidate_contract_catalog(session, db_priority.contract_id)
     return db_priority
 
 
@@ -206,6 +233,7 @@ def delete_standard_priority(
 
     session.delete(priority)
     session.commit()
+    invalidate_priority_catalog()
 
 
 def delete_individual_priority(
@@ -221,5 +249,7 @@ def delete_individual_priority(
             detail="Priority not found",
         )
 
+    contract_id = priority.contract_id
     session.delete(priority)
     session.commit()
+    _invalidate_contract_catalog(session, contract_id)
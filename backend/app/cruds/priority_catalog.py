@@ -0,0 +1,115 @@
+from collections.abc import Iterable
+from types import MappingProxyType
+from typing import Any
+from uuid import UUID
+
+from sqlalchemy import literal, union_all
+from sqlmodel import Session, col, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.priority_catalog import (
+    PriorityCatalog,
+    ResolvedPriority,
+    priority_catalog_cache,
+)
+from app.models.appeal import Appeal
+from app.models.contract import Contract
+from app.models.priority import (
+    ContractStandardPriority,
+    IndividualPriority,
+    StandardPriority,
+)
+
+
+def _catalog_statement(organization_id: UUID) -> Any:
+    """
+    Один запрос: стандартные и индивидуальные приоритеты актуального договора
+
+    Актуальный договор выбирается так же, как в
+    get_actual_organization_contract: с самой поздней датой окончания.
+    """
+    contract_id = (
+        select(Contract.id)
+        .where(
+            Contract.organization_id == organization_id,
+            Contract.is_actual == True,  # noqa: E712
+        )
+        .order_by(col(Contract.end_dt).desc())
+        .limit(1)
+        .scalar_subquery()
+    )
+    standard = (
+        select(
+            StandardPriority.name,
+            StandardPriority.hours,
+            StandardPriority.id,
+            literal(False).label("individual"),
+        )
+        .join(
+            ContractStandardPriority,
+            col(ContractStandardPriority.priority_id) == StandardPriority.id,
+        )
+        .where(ContractStandardPriority.contract_id == contract_id)
+    )
+    individual = select(
+        IndividualPriority.name,
+        IndividualPriority.hours,
+        IndividualPriority.id,
+        literal(True).label("individual"),
+    ).where(IndividualPriority.contract_id == contract_id)
+    return union_all(standard, individual)
+
+
+def _build_catalog(rows: Iterable[Any]) -> PriorityCatalog:
+    catalog: dict[str, ResolvedPriority] = {}
+    # Индивидуальные приоритеты разбираются последними и перекрывают
+    # стандартные с тем же названием
+    for name, hours, priority_id, individual in sorted(rows, key=lambda r: r[3]):
+        if individual:
+            catalog[name] = ResolvedPriority(
+                name=name, hours=hours, individual_priority_id=priority_id
+            )
+        else:
+            catalog[name] = ResolvedPriority(
+                name=name, hours=hours, standard_priority_id=priority_id
+            )
+    return MappingProxyType(catalog)
+
+
+def get_priority_catalog(*, session: Session, organization_id: UUID) -> PriorityCatalog:
+    """
+    Каталог приоритетов организации (из кэша или одним запросом)
+
+    Пустой каталог - у организации нет актуального договора с приоритетами.
+    """
+    catalog = priority_catalog_cache.get(organization_id)
+    if catalog is None:
+        rows = session.exec(_catalog_statement(organization_id)).all()
+        catalog = _build_catalog(rows)
+        priority_catalog_cache.set(organization_id, catalog)
+    return catalog
+
+
+async def get_priority_catalog_async(
+    *, session: AsyncSession, organization_id: UUID
+) -> PriorityCatalog:
+    """Асинхронное получение каталога приоритетов организации"""
+    catalog = priority_catalog_cache.get(organization_id)
+    if catalog is None:
+        result = await session.exec(_catalog_statement(organization_id))
+        catalog = _build_catalog(result.all())
+        priority_catalog_cache.set(organization_id, catalog)
+    return catalog
+
+
+def resolve_appeal_priority(catalog: PriorityCatalog, appeal: Appeal) -> None:
+    """
+    Привязывает обращение к действующему приоритету по его названию
+
+    Норматив срока решения (app.cruds.sla) берется по этим ссылкам; названия,
+    которых нет в каталоге, остаются без ссылок.
+    """
+    resolved = catalog.get(appeal.priority)
+    if resolved is not None:
+        appeal.standard_priority_id = resolved.standard_priority_id
+        appeal.individual_priority_id = resolved.individual_priority_id
@@ -4,6 +4,7 @@ from fastapi import HTTPException
 from sqlmodel import Session, select
 from sqlmodel.ext.asyncio.session import AsyncSession
 
+from app.models.organization import Organization
 from app.models.region import Region, RegionCreate, RegionUpdate
 
 
@@ -107,7 +108,8 @@ def delete_region(
         )
 
     # Проверяем, есть ли связанные организации
-    if region.organizations:
+    statement = select(Organization.id).where(Organization.region_id == region_id)
+    if session.exec(statement.limit(1)).first():
         raise HTTPException(
             status_code=400,
             detail="Cannot delete region with linked organizations",
@@ -245,7 +247,9 @@ async def delete_region_async(
         )
 
     # Проверяем, есть ли связанные организации
-    if region.organizations:
+    statement = select(Organization.id).where(Organization.region_id == region_id)
+    result = await session.exec(statement.limit(1))
+    if result.first():
         raise HTTPException(
             status_code=400,
             detail="Cannot delete region with linked organizations",
@@ -3,6 +3,8 @@ from uuid import UUID
 from fastapi import HTTPException
 from sqlmodel import Session, select
 
+from app.core.principal import invalidate_principal
+from app.cruds.loaders import loader_options
 from app.models.representative import Representative, RepresentativeBase
 
 
@@ -23,6 +25,7 @@ def create_representative(
     )
     session.add(db_representative)
     session.commit()
+    invalidate_principal(user_id)
     session.refresh(db_representative)
     return db_representative
 
@@ -42,7 +45,11 @@ def get_representative_by_user_id(
     user_id: UUID,
 ) -> Representative | None:
     """Получение представителя по ID пользователя"""
-    statement = select(Representative).where(Representative.user_id == user_id)
+    statement = (
+        select(Representative)
+        .where(Representative.user_id == user_id)
+        .options(*loader_options("representative_detail"))
+    )
     return session.exec(statement).first()
 
 
@@ -79,6 +86,7 @@ def update_representative(
     db_representative.sqlmodel_update(representative_data)
     session.add(db_representative)
     session.commit()
+    invalidate_principal(db_representative.user_id)
     session.refresh(db_representative)
     return db_representative
 
@@ -97,7 +105,10 @@ def delete_representative(
         )
 
     # Проверяем, есть ли подчиненные представители
-    if representative.representatives:
+    statement = select(Representative.id).where(
+        Representative.main_representative_id == representative_id
+    )
+    if session.exec(statement.limit(1)).first():
         raise HTTPException(
             status_code=400,
             detail="Cannot delete representative with subordinate representatives",
@@ -105,6 +116,7 @@ def delete_representative(
 
     session.delete(representative)
     session.commit()
+    invalidate_principal(representative.user_id)
 
 
 def get_organization_representatives(
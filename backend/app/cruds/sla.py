@@ -0,0 +1,253 @@
+from collections import defaultdict
+from collections.abc import Collection, Sequence
+from datetime import UTC, datetime, timedelta
+from typing import Any
+from uuid import UUID
+
+from sqlalchemy import ColumnElement, and_, func, or_, update
+from sqlalchemy.orm import aliased
+from sqlmodel import Session, col, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlmodel.sql.expression import SelectOfScalar
+
+from app.core.sla import Interval, compute_sla, naive_utc
+from app.models.appeal import Appeal
+from app.models.appeal_status import AppealStatus
+from app.models.appeal_stop_interval import AppealStopInterval
+from app.models.priority import IndividualPriority, StandardPriority
+
+# Сколько обращений пересчитывается за один проход заполнения
+SLA_BACKFILL_BATCH_SIZE = 1000
+# Канал LISTEN/NOTIFY: id обращений, у которых пересчитан срок; слушает
+# app.utils.breach_watch. Полезная нагрузка NOTIFY ограничена 8000 байт
+SLA_CHANNEL = "appeal_sla"
+SLA_NOTIFY_CHUNK_SIZE = 200
+
+_Standard = aliased(StandardPriority, name="standard")
+_ByName = aliased(StandardPriority, name="by_name")
+
+
+def _sla_hours() -> Any:
+    # Индивидуальный приоритет договора важнее стандартного; обращения без
+    # ссылки на приоритет ищут стандартный по названию
+    by_name = (
+        select(_ByName.hours)
+        .where(_ByName.name == Appeal.priority)
+        .limit(1)
+        .scalar_subquery()
+    )
+    return func.coalesce(IndividualPriority.hours, _Standard.hours, by_name)
+
+
+def _appeals_statement(appeal_ids: Sequence[UUID]) -> Any:
+    return (
+        select(
+            col(Appeal.id),
+            col(Appeal.dt),
+            col(Appeal.actual_date),
+            col(AppealStatus.is_final),
+        )
+        .add_columns(_sla_hours().label("hours"))
+        .outerjoin(AppealStatus, col(AppealStatus.id) == Appeal.status_id)
+        .outerjoin(
+            IndividualPriority,
+            col(IndividualPriority.id) == Appeal.individual_priority_id,
+        )
+        .outerjoin(_Standard, col(_Standard.id) == Appeal.standard_priority_id)
+        .where(col(Appeal.id).in_(appeal_ids))
+    )
+
+
+def _intervals_statement(appeal_ids: Sequence[UUID]) -> Any:
+    return select(
+        AppealStopInterval.appeal_id,
+        AppealStopInterval.start_dt,
+        AppealStopInterval.end_dt,
+    ).where(col(AppealStopInterval.appeal_id).in_(appeal_ids))
+
+
+def _sla_updates(
+    appeals: Sequence[Any], intervals: Sequence[Any]
+) -> list[dict[str, Any]]:
+    by_appeal: dict[UUID, list[Interval]] = defaultdict(list)
+    for appeal_id, start_dt, end_dt in intervals:
+        by_appeal[appeal_id].append((start_dt, end_dt))
+    updates = []
+    for appeal_id, dt, actual_date, is_final, hours in appeals:
+        state = compute_sla(
+            opened_at=dt,
+            hours=hours,
+            intervals=by_appeal[appeal_id],
+            resolved=actual_date is not None or bool(is_final),
+        )
+        updates.append(
+            {
+                "id": appeal_id,
+                "sla_hours": state.hours,
+                "sla_paused_seconds": state.paused_seconds,
+                "sla_paused_since": state.paused_since,
+                "sla_deadline": state.deadline,
+            }
+        )
+    return updates
+
+
+def _sla_notify_statements(appeal_ids: Sequence[UUID]) -> list[Any]:
+    # NOTIFY доставляется слушателям при коммите транзакции, откат его отменяет
+    return [
+        select(
+            func.pg_notify(
+                SLA_CHANNEL,
+                ",".join(
+                    str(id_)
+                    for id_ in appeal_ids[start : start + SLA_NOTIFY_CHUNK_SIZE]
+                ),
+            )
+        )
+        for start in range(0, len(appeal_ids), SLA_NOTIFY_CHUNK_SIZE)
+    ]
+
+
+def refresh_appeals_sla(*, session: Session, appeal_ids: Sequence[UUID]) -> int:
+    """
+    Пересчитывает сроки решения обращений
+
+    Два запроса на всю пачку (обращения с нормативом, их остановки) и одно
+    обновление по первичному ключу; после коммита контроль сроков получает
+    id обращений через NOTIFY. Изменения пользователя в сессии сбрасываются
+    в БД заранее; коммит остается за вызывающим кодом.
+    Возвращает количество пересчитанных обращений.
+    """
+    if not appeal_ids:
+        return 0
+    appeals = session.exec(_appeals_statement(appeal_ids)).all()
+    intervals = session.exec(_intervals_statement(appeal_ids)).all()
+    updates = _sla_updates(appeals, intervals)
+    if updates:
+        session.execute(update(Appeal), updates)
+    for statement in _sla_notify_statements(appeal_ids):
+        session.exec(statement)
+    return len(updates)
+
+
+async def refresh_appeals_sla_async(
+    *, session: AsyncSession, appeal_ids: Sequence[UUID]
+) -> int:
+    """Асинхронный пересчет сроков решения обращений"""
+    if not appeal_ids:
+        return 0
+    appeals = (await session.exec(_appeals_statement(appeal_ids))).all()
+    intervals = (await session.exec(_intervals_statement(appeal_ids))).all()
+    updates = _sla_updates(appeals, intervals)
+    if updates:
+        await session.execute(update(Appeal), updates)
+    for statement in _sla_notify_statements(appeal_ids):
+        await session.exec(statement)
+    return len(updates)
+
+
+def backfill_appeals_sla(
+    *, session: Session, batch_size: int = SLA_BACKFILL_BATCH_SIZE
+) -> int:
+    """
+    Заполняет сроки открытых обращений, у которых они еще не посчитаны
+
+    Обращения перебираются по id порциями, каждая фиксируется отдельно.
+    Возвращает количество пересчитанных обращений.
+    """
+    total = 0
+    last_id: UUID | None = None
+    while True:
+        statement = (
+            select(Appeal.id)
+            .where(col(Appeal.actual_date).is_(None), col(Appeal.sla_hours).is_(None))
+            .order_by(col(Appeal.id))
+            .limit(batch_size)
+        )
+        if last_id is not None:
+            statement = statement.where(Appeal.id > last_id)
+        appeal_ids = session.exec(statement).all()
+        if not appeal_ids:
+            return total
+        total += refresh_appeals_sla(session=session, appeal_ids=appeal_ids)
+        session.commit()
+        last_id = appeal_ids[-1]
+
+
+def get_priority_appeal_ids(
+    *,
+    session: Session,
+    standard_ids: Collection[UUID] = (),
+    individual_ids: Collection[UUID] = (),
+    names: Collection[str] = (),
+) -> list[UUID]:
+    """
+    Открытые обращения, норматив которых берется из указанных приоритетов
+
+    names - названия стандартных приоритетов: по ним норматив ищут обращения
+    без ссылки на приоритет. После изменения приоритетов сроки этих обращений
+    нужно пересчитать (refresh_appeals_sla) в той же транзакции.
+    """
+    conditions: list[ColumnElement[bool]] = []
+    if standard_ids:
+        conditions.append(col(Appeal.standard_priority_id).in_(list(standard_ids)))
+    if individual_ids:
+        conditions.append(col(Appeal.individual_priority_id).in_(list(individual_ids)))
+    if names:
+        conditions.append(
+            and_(
+                col(Appeal.standard_priority_id).is_(None),
+                col(Appeal.individual_priority_id).is_(None),
+                col(Appeal.priority).in_(list(names)),
+            )
+        )
+    if not conditions:
+        return []
+    statement = select(Appeal.id).where(
+        col(Appeal.actual_date).is_(None), or_(*conditions)
+    )
+    return list(session.exec(statement).all())
+
+
+def _breaching_statement(*, until: datetime, limit: int) -> SelectOfScalar[Appeal]:
+    # Частичный индекс ix_appeal_open_sla_deadline: диапазон по сроку
+    # среди открытых обращений, без вычислений по каждому обращению
+    return (
+        select(Appeal)
+        .where(
+            col(Appeal.actual_date).is_(None),
+            col(Appeal.sla_deadline).is_not(None),
+            col(Appeal.sla_deadline) <= until,
+        )
+        .order_by(col(Appeal.sla_deadline))
+        .limit(limit)
+    )
+
+
+def get_breaching_appeals(
+    *,
+    session: Session,
+    within: timedelta = timedelta(),
+    now: datetime | None = None,
+    limit: int = 100,
+) -> list[Appeal]:
+    """
+    Открытые обращения, срок которых истек или истечет в течение within
+
+    Ближайшие к нарушению первыми.
+    """
+    until = naive_utc(now or datetime.now(UTC)) + within
+    return list(session.exec(_breaching_statement(until=until, limit=limit)).all())
+
+
+async def get_breaching_appeals_async(
+    *,
+    session: AsyncSession,
+    within: timedelta = timedelta(),
+    now: datetime | None = None,
+    limit: int = 100,
+) -> list[Appeal]:
+    """Асинхронный поиск обращений, срок которых истекает"""
+    until = naive_utc(now or datetime.now(UTC)) + within
+    result = await session.exec(_breaching_statement(until=until, limit=limit))
+    return list(result.all())
@@ -3,6 +3,8 @@ from uuid import UUID
 from fastapi import HTTPException
 from sqlmodel import Session, select
 
+from app.core.principal import invalidate_principal
+from app.models.appeal import Appeal
 from app.models.specialist import (
     Specialist,
     SpecialistBase,
@@ -52,6 +54,7 @@ def create_specialist(
         session.commit()
         session.refresh(db_specialist)
 
+    invalidate_principal(db_specialist.user_id)
     return db_specialist
 
 
@@ -134,6 +137,7 @@ def update_specialist(
 
     session.add(db_specialist)
     session.commit()
+    invalidate_principal(db_specialist.user_id)
     session.refresh(db_specialist)
     return db_specialist
 
@@ -152,7 +156,10 @@ def delete_specialist(
         )
 
     # Проверяем, есть ли обращения, где специалист является ответственным
-    if specialist.responsible_appeals:
+    responsible = select(Appeal.id).where(
+        Appeal.responsible_user_id == specialist.user_id
+    )
+    if session.exec(responsible.limit(1)).first():
         raise HTTPException(
             status_code=400,
             detail="Cannot delete specialist who is responsible for appeals",
@@ -168,3 +175,4 @@ def delete_specialist(
 
     session.delete(specialist)
     session.commit()
+    invalidate_principal(specialist.user_id)
@@ -3,8 +3,19 @@ from uuid import UUID
 from fastapi import HTTPException
 from sqlmodel import Session, select
 
+from app.core.pagination import (
+    CursorParams,
+    PaginatedResponse,
+    SortKey,
+    paginate_keyset,
+)
+from app.core.principal import Principal
+from app.cruds.access import appeal_child_scope
 from app.models.task import Task, TaskBase
 
+# У задач нет времени создания, поэтому порядок стабилен только по id
+TASK_SORT_KEYS = (SortKey(Task.id),)
+
 
 def create_task(
     *,
@@ -47,6 +58,17 @@ def get_tasks(
     return session.exec(statement).all()
 
 
+def get_tasks_paginated(
+    *,
+    session: Session,
+    principal: Principal,
+    params: CursorParams,
+) -> PaginatedResponse[Task]:
+    """Получение страницы задач доступных пользователю обращений по курсору"""
+    statement = select(Task).where(appeal_child_scope(Task.appeal_id, principal))
+    return paginate_keyset(session, statement, TASK_SORT_KEYS, params)
+
+
 def get_appeal_tasks(
     *,
     session: Session,
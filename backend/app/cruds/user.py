@@ -3,6 +3,7 @@ from typing import Any
 from sqlmodel import Session, select
 from sqlmodel.ext.asyncio.session import AsyncSession
 
+from app.core.principal import invalidate_principal
 from app.core.security import get_password_hash, verify_password
 from app.models.user import User, UserCreate, UserUpdate
 
@@ -27,6 +28,7 @@ def update_user(*, session: Session, db_user: User, user_in: UserUpdate) -> Any:
     db_user.sqlmodel_update(user_data, update=extra_data)
     session.add(db_user)
     session.commit()
+    invalidate_principal(db_user.id)
     session.refresh(db_user)
     return db_user
 
@@ -70,7 +72,10 @@ async def update_user_async(
     db_user.sqlmodel_update(user_data, update=extra_data)
     session.add(db_user)
     await session.commit()
+    # После коммита атрибуты просрочены: id читается после refresh, иначе
+    # ленивая загрузка вне await
     await session.refresh(db_user)
+    invalidate_principal(db_user.id)
     return db_user
 
 
@@ -3,6 +3,7 @@ import logging
 from sqlmodel import Session
 
 from app.core.db import engine, init_db
+from app.cruds.sla import backfill_appeals_sla
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -11,6 +12,10 @@ logger = logging.getLogger(__name__)
 def init() -> None:
     with Session(engine) as session:
         init_db(session)
+        logger.info(
+            "SLA deadlines computed for %d appeals",
+            backfill_appeals_sla(session=session),
+        )
 
 
 def main() -> None:
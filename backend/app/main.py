@@ -1,3 +1,6 @@
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
 import sentry_sdk
 from fastapi import FastAPI
 from fastapi.routing import APIRoute
@@ -5,6 +8,9 @@ from starlette.middleware.cors import CORSMiddleware
 
 from app.api.v1.main import api_router
 from app.core.config import settings
+from app.core.db import async_engine
+from app.core.templates import get_email_templates
+from app.core.workers import shutdown_process_pool
 
 
 def custom_generate_unique_id(route: APIRoute) -> str:
@@ -15,10 +21,23 @@ def custom_generate_unique_id(route: APIRoute) -> str:
 if settings.SENTRY_DSN and settings.ENVIRONMENT != "local":
     sentry_sdk.init(dsn=str(settings.SENTRY_DSN), enable_tracing=True)
 
+
+@asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+    # Шаблоны писем компилируются до первого запроса
+    get_email_templates().load_all()
+    yield
+    shutdown_process_pool()
+    # Соединения asyncpg привязаны к циклу событий: закрываем их, пока он
+    # работает, а не оставляем пулу
+    await async_engine.dispose()
+
+
 app = FastAPI(
     title=settings.PROJECT_NAME,
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
     generate_unique_id_function=custom_generate_unique_id,
+    lifespan=lifespan,
 )
 
 # Set all CORS enabled origins
@@ -10,6 +10,7 @@ from app.models.comment_file import CommentFile, CommentFileBase
 from app.models.common import (
     ErrorResponse,
     Message,
+    PoolStats,
     UniversalPaginatedResponse,
     UniversalPaginationParams,
 )
@@ -27,6 +28,8 @@ from app.models.department import (
     DepartmentRead,
     DepartmentUpdate,
 )
+from app.models.file_blob import FileBlob
+from app.models.notification_outbox import NotificationOutbox
 from app.models.organization import (
     Organization,
     OrganizationBase,
@@ -42,6 +45,7 @@ from app.models.priority import (
 )
 from app.models.project import OrganizationProject, Project, ProjectBase
 from app.models.region import Region, RegionBase, RegionCreate, RegionRead, RegionUpdate
+from app.models.report import ReportJobCreate, ReportJobPublic
 from app.models.representative import Representative, RepresentativeBase
 from app.models.specialist import Specialist, SpecialistBase, SpecialistOrganization
 from app.models.task import Task, TaskBase
@@ -66,6 +70,7 @@ __all__ = [
     # Common
     "Message",
     "ErrorResponse",
+    "PoolStats",
     "UniversalPaginationParams",
     "UniversalPaginatedResponse",
     # Appeal
@@ -98,6 +103,9 @@ __all__ = [
     "Project",
     "ProjectBase",
     "OrganizationProject",
+    # Report
+    "ReportJobCreate",
+    "ReportJobPublic",
     # Representative
     "Representative",
     "RepresentativeBase",
@@ -133,6 +141,10 @@ __all__ = [
     # CommentFile
     "CommentFile",
     "CommentFileBase",
+    # FileBlob
+    "FileBlob",
+    # NotificationOutbox
+    "NotificationOutbox",
     # AppealStopInterval
     "AppealStopInterval",
     "AppealStopIntervalBase",
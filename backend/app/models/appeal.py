@@ -2,8 +2,11 @@ from datetime import datetime
 from typing import TYPE_CHECKING
 from uuid import UUID, uuid4
 
+from sqlalchemy import Index, text
 from sqlmodel import Field, Relationship, SQLModel
 
+from app.core.sla import SlaState
+
 if TYPE_CHECKING:
     from .appeal_file import AppealFile
     from .appeal_status import AppealStatus
@@ -28,7 +31,47 @@ class AppealBase(SQLModel):
     solving: str = Field(default="")
 
 
+class AppealUpdate(SQLModel):
+    status_id: UUID | None = None
+    responsible_user_id: UUID | None = None
+    solving: str | None = None
+
+
+class AppealBulkStatusUpdate(SQLModel):
+    appeal_ids: list[UUID] = Field(min_length=1, max_length=1000)
+    status_id: UUID
+
+
+class AppealBulkStatusResult(SQLModel):
+    # Обращения, у которых статус действительно изменился
+    updated: list[UUID]
+    notifications: int
+
+
 class Appeal(AppealBase, table=True):
+    __table_args__ = (
+        # Списки и отчеты: обращения автора/ответственного по времени
+        Index("ix_appeal_user_id_dt_id", "user_id", "dt", "id"),
+        Index("ix_appeal_responsible_user_id_dt_id", "responsible_user_id", "dt", "id"),
+        # Keyset-пагинация всех обращений (суперпользователь)
+        Index("ix_appeal_dt_id", "dt", "id"),
+        Index("ix_appeal_status_id", "status_id"),
+        Index("ix_appeal_region_id", "region_id"),
+        # Открытые обращения: actual_date заполняется при закрытии
+        Index(
+            "ix_appeal_open_responsible_user_id_dt",
+            "responsible_user_id",
+            "dt",
+            postgresql_where=text("actual_date IS NULL"),
+        ),
+        # Обращения, у которых истекает срок решения
+        Index(
+            "ix_appeal_open_sla_deadline",
+            "sla_deadline",
+            postgresql_where=text("actual_date IS NULL AND sla_deadline IS NOT NULL"),
+        ),
+    )
+
     id: UUID = Field(default_factory=uuid4, primary_key=True)
     dt: datetime = Field(default_factory=datetime.utcnow)
     actual_date: datetime | None = None
@@ -41,28 +84,56 @@ class Appeal(AppealBase, table=True):
     standard_priority_id: UUID | None = Field(foreign_key="standardpriority.id")
     individual_priority_id: UUID | None = Field(foreign_key="individualpriority.id")
 
+    # Срок решения (SLA), пересчитывается при смене статуса и остановок;
+    # см. app.core.sla.compute_sla
+    sla_hours: int | None = None
+    sla_paused_seconds: int = Field(default=0)
+    sla_paused_since: datetime | None = None
+    sla_deadline: datetime | None = None
+    # Для какого срока уже отправлены предупреждение и уведомление о
+    # нарушении (app.utils.breach_watch); при переносе срока шлются заново
+    sla_warned_deadline: datetime | None = None
+    sla_breached_deadline: datetime | None = None
+
     # Relationships
     user: "User" = Relationship(
         back_populates="appeals",
         sa_relationship_kwargs={
-            "lazy": "selectin",
+            "lazy": "raise",
             "foreign_keys": "[Appeal.user_id]",
         },
     )
     responsible_user: "User" = Relationship(
         back_populates="responsible_appeals",
         sa_relationship_kwargs={
-            "lazy": "selectin",
+            "lazy": "raise",
             "foreign_keys": "[Appeal.responsible_user_id]",
         },
     )
     region: "Region" = Relationship(
-        back_populates="appeals", sa_relationship_kwargs={"lazy": "selectin"}
+        back_populates="appeals", sa_relationship_kwargs={"lazy": "raise"}
     )
     status: "AppealStatus" = Relationship(
-        back_populates="appeals", sa_relationship_kwargs={"lazy": "selectin"}
+        back_populates="appeals", sa_relationship_kwargs={"lazy": "raise"}
+    )
+    tasks: list["Task"] = Relationship(
+        back_populates="appeal", sa_relationship_kwargs={"lazy": "raise"}
+    )
+    comments: list["Comment"] = Relationship(
+        back_populates="appeal", sa_relationship_kwargs={"lazy": "raise"}
     )
-    tasks: list["Task"] = Relationship(back_populates="appeal")
-    comments: list["Comment"] = Relationship(back_populates="appeal")
-    files: list["AppealFile"] = Relationship(back_populates="appeal")
-    stop_intervals: list["AppealStopInterval"] = Relationship(back_populates="appeal")
+    files: list["AppealFile"] = Relationship(
+        back_populates="appeal", sa_relationship_kwargs={"lazy": "raise"}
+    )
+    stop_intervals: list["AppealStopInterval"] = Relationship(
+        back_populates="appeal", sa_relationship_kwargs={"lazy": "raise"}
+    )
+
+    def get_sla_state(self) -> SlaState:
+        return SlaState(
+            opened_at=self.dt,
+            hours=self.sla_hours,
+            paused_seconds=self.sla_paused_seconds,
+            paused_since=self.sla_paused_since,
+            deadline=self.sla_deadline,
+        )
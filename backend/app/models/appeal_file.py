@@ -1,6 +1,7 @@
 from typing import TYPE_CHECKING
 from uuid import UUID, uuid4
 
+from sqlalchemy import Index
 from sqlmodel import Field, Relationship, SQLModel
 
 if TYPE_CHECKING:
@@ -12,11 +13,23 @@ class AppealFileBase(SQLModel):
 
 
 class AppealFile(AppealFileBase, table=True):
+    __table_args__ = (
+        Index("ix_appealfile_appeal_id", "appeal_id"),
+        Index("ix_appealfile_blob_sha256", "blob_sha256"),
+    )
+
     id: UUID = Field(default_factory=uuid4, primary_key=True)
     appeal_id: UUID | None = Field(foreign_key="appeal.id", default=None)
+    # Содержимое файла; у файлов, загруженных до дедупликации, пусто,
+    # и они лежат в хранилище по пути из file
+    blob_sha256: str | None = Field(
+        default=None, foreign_key="fileblob.sha256", max_length=64
+    )
 
     # Relationships
-    appeal: "Appeal" = Relationship(back_populates="files")
+    appeal: "Appeal" = Relationship(
+        back_populates="files", sa_relationship_kwargs={"lazy": "raise"}
+    )
 
     def get_absolute_file_url(self) -> str:
         return f"/uploads/appeal/{self.file}"
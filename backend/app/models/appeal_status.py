@@ -1,6 +1,7 @@
 from typing import TYPE_CHECKING
 from uuid import UUID, uuid4
 
+from sqlalchemy import Index
 from sqlmodel import Field, Relationship, SQLModel
 
 if TYPE_CHECKING:
@@ -18,14 +19,15 @@ class AppealStatusBase(SQLModel):
 
 class AppealStatus(AppealStatusBase, table=True):
     __tablename__ = "appealstatus"  # Явно указываем имя таблицы
+    __table_args__ = (Index("ix_appealstatus_name", "name"),)
 
     id: UUID = Field(default_factory=uuid4, primary_key=True)
 
     # Relationships
     appeals: list["Appeal"] = Relationship(
-        back_populates="status", sa_relationship_kwargs={"lazy": "selectin"}
+        back_populates="status", sa_relationship_kwargs={"lazy": "raise"}
     )
     organizations: list["Organization"] = Relationship(
         back_populates="custom_appeal_completion_status",
-        sa_relationship_kwargs={"lazy": "selectin"},
+        sa_relationship_kwargs={"lazy": "raise"},
     )
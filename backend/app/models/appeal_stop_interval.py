@@ -1,13 +1,28 @@
 from datetime import UTC, datetime, timedelta
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Any
 from uuid import UUID, uuid4
 
+from sqlalchemy import Index, column, func, literal_column
+from sqlalchemy.dialects.postgresql import TSTZRANGE
+from sqlalchemy.sql.elements import ColumnElement
 from sqlmodel import Field, Relationship, SQLModel
 
 if TYPE_CHECKING:
     from .appeal import Appeal
 
 
+def _utc(column: Any) -> ColumnElement[datetime]:
+    # Даты хранятся в UTC без часового пояса; константа 'UTC' - литерал, а не
+    # параметр, иначе выражение запроса не совпадет с выражением индекса
+    return func.timezone(literal_column("'UTC'"), column)
+
+
+def _period(start_dt: Any, end_dt: Any) -> ColumnElement[Any]:
+    return func.tstzrange(
+        _utc(start_dt), _utc(end_dt), literal_column("'[)'"), type_=TSTZRANGE
+    )
+
+
 class AppealStopIntervalBase(SQLModel):
     start_dt: datetime = Field(default_factory=lambda: datetime.now(UTC))
     end_dt: datetime | None = None
@@ -15,7 +30,7 @@ class AppealStopIntervalBase(SQLModel):
 
 
 class AppealStopIntervalCreate(AppealStopIntervalBase):
-    pass
+    appeal_id: UUID
 
 
 class AppealStopIntervalUpdate(SQLModel):
@@ -25,16 +40,45 @@ class AppealStopIntervalUpdate(SQLModel):
 
 
 class AppealStopInterval(AppealStopIntervalBase, table=True):
+    __table_args__ = (
+        Index(
+            "ix_appealstopinterval_appeal_id_start_dt",
+            "appeal_id",
+            "start_dt",
+            "end_dt",
+        ),
+        # Остановки, действующие в момент времени или пересекающие период
+        # (см. stop_period)
+        Index(
+            "ix_appealstopinterval_period",
+            _period(column("start_dt"), column("end_dt")),
+            postgresql_using="gist",
+        ),
+    )
+
     id: UUID = Field(default_factory=uuid4, primary_key=True)
     appeal_id: UUID = Field(foreign_key="appeal.id")
 
     # Relationships
-    appeal: "Appeal" = Relationship(back_populates="stop_intervals")
+    appeal: "Appeal" = Relationship(
+        back_populates="stop_intervals", sa_relationship_kwargs={"lazy": "raise"}
+    )
 
     def __str__(self) -> str:
-        return f"{self.appeal}: {self.start_dt} - {self.end_dt or '...'}"
+        return f"{self.appeal_id}: {self.start_dt} - {self.end_dt or '...'}"
 
     def get_duration(self) -> timedelta:
         if self.end_dt:
             return self.end_dt - self.start_dt
         return timedelta()
+
+
+def stop_period() -> ColumnElement[Any]:
+    """
+    Интервал остановки как tstzrange [start_dt, end_dt)
+
+    Без end_dt верхняя граница бесконечна: открытая остановка действует,
+    пока ее не закроют. Запросы по периоду используют это выражение, чтобы
+    планировщик выбрал GiST-индекс ix_appealstopinterval_period.
+    """
+    return _period(AppealStopInterval.start_dt, AppealStopInterval.end_dt)
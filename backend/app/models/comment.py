@@ -2,6 +2,7 @@ from datetime import datetime
 from typing import TYPE_CHECKING
 from uuid import UUID, uuid4
 
+from sqlalchemy import Index
 from sqlmodel import Field, Relationship, SQLModel
 
 if TYPE_CHECKING:
@@ -15,12 +16,22 @@ class CommentBase(SQLModel):
 
 
 class Comment(CommentBase, table=True):
+    __table_args__ = (
+        Index("ix_comment_appeal_id_created_at_id", "appeal_id", "created_at", "id"),
+    )
+
     id: UUID = Field(default_factory=uuid4, primary_key=True)
     appeal_id: UUID = Field(foreign_key="appeal.id")
     user_id: UUID = Field(foreign_key="user.id")
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
     # Relationships
-    appeal: "Appeal" = Relationship(back_populates="comments")
-    user: "User" = Relationship(back_populates="comments")
-    comment_files: list["CommentFile"] = Relationship(back_populates="comment")
+    appeal: "Appeal" = Relationship(
+        back_populates="comments", sa_relationship_kwargs={"lazy": "raise"}
+    )
+    user: "User" = Relationship(
+        back_populates="comments", sa_relationship_kwargs={"lazy": "raise"}
+    )
+    comment_files: list["CommentFile"] = Relationship(
+        back_populates="comment", sa_relationship_kwargs={"lazy": "raise"}
+    )
@@ -1,6 +1,7 @@
 from typing import TYPE_CHECKING
 from uuid import UUID, uuid4
 
+from sqlalchemy import Index
 from sqlmodel import Field, Relationship, SQLModel
 
 if TYPE_CHECKING:
@@ -12,11 +13,23 @@ class CommentFileBase(SQLModel):
 
 
 class CommentFile(CommentFileBase, table=True):
+    __table_args__ = (
+        Index("ix_commentfile_comment_id", "comment_id"),
+        Index("ix_commentfile_blob_sha256", "blob_sha256"),
+    )
+
     id: UUID = Field(default_factory=uuid4, primary_key=True)
     comment_id: UUID = Field(foreign_key="comment.id")
+    # Содержимое файла; у файлов, загруженных до дедупликации, пусто,
+    # и они лежат в хранилище по пути из file
+    blob_sha256: str | None = Field(
+        default=None, foreign_key="fileblob.sha256", max_length=64
+    )
 
     # Relationships
-    comment: "Comment" = Relationship(back_populates="comment_files")
+    comment: "Comment" = Relationship(
+        back_populates="comment_files", sa_relationship_kwargs={"lazy": "raise"}
+    )
 
     def get_absolute_file_url(self) -> str:
         return f"/uploads/comment/{self.file}"
@@ -1,11 +1,16 @@
-from typing import Generic, TypeVar
-from uuid import UUID
+from typing import Generic, Literal, TypeVar
 
 from pydantic import Field
 from sqlmodel import SQLModel
 
 T = TypeVar("T")
 
+# Как считать total при страничной пагинации:
+# exact - count(*) по запросу, estimated - оценка планировщика Postgres,
+# cached - точный count, закэшированный на несколько секунд по отпечатку
+# запроса, none - без total, has_next определяется выборкой limit + 1
+CountStrategy = Literal["exact", "estimated", "cached", "none"]
+
 
 class UniversalPaginationParams(SQLModel):
     # Параметры страничной пагинации
@@ -15,10 +20,14 @@ class UniversalPaginationParams(SQLModel):
     )
 
     # Параметры курсор-пагинации
-    cursor: UUID | None = Field(
-        default=None, description="ID последнего элемента предыдущей страницы"
+    cursor: str | None = Field(
+        default=None,
+        description="Непрозрачный курсор из next_cursor/prev_cursor предыдущего ответа",
     )
     limit: int | None = None  # Если указан cursor, будет использоваться этот лимит
+    count: CountStrategy = Field(
+        default="estimated", description="Способ подсчета общего количества"
+    )
 
     def get_limit(self) -> int:
         """Возвращает актуальный размер страницы"""
@@ -34,9 +43,12 @@ class UniversalPaginatedResponse(SQLModel, Generic[T]):
     page: int | None = None
     per_page: int | None = None
     total_pages: int | None = None
+    # total получен оценкой планировщика, а не точным подсчетом
+    total_is_estimate: bool | None = None
     has_prev: bool | None = None
     # Поля для курсор-пагинации
-    next_cursor: UUID | None = None
+    next_cursor: str | None = None
+    prev_cursor: str | None = None
     has_next: bool
 
 
@@ -46,3 +58,18 @@ class Message(SQLModel):
 
 class ErrorResponse(SQLModel):
     detail: str
+
+
+class PoolStats(SQLModel):
+    """Метрики пула соединений с БД в текущем воркере"""
+
+    name: str
+    pool_class: str | None = None
+    checkouts: int
+    timeouts: int
+    wait_avg_ms: float
+    wait_max_ms: float
+    size: int | None = None
+    checkedin: int | None = None
+    checkedout: int | None = None
+    overflow: int | None = None
@@ -1,10 +1,10 @@
 from datetime import date
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Literal
 from uuid import UUID, uuid4
 
 from sqlmodel import Field, Relationship, SQLModel
 
-from .priority import ContractStandardPriority
+from .priority import BasePriorityBase, ContractStandardPriority
 
 if TYPE_CHECKING:
     from .organization import Organization
@@ -25,13 +25,13 @@ class Contract(ContractBase, table=True):
 
     # Relationships
     organization: "Organization" = Relationship(
-        back_populates="contracts", sa_relationship_kwargs={"lazy": "selectin"}
+        back_populates="contracts", sa_relationship_kwargs={"lazy": "raise"}
     )
     standard_priority_links: list["ContractStandardPriority"] = Relationship(
-        back_populates="contract", sa_relationship_kwargs={"lazy": "selectin"}
+        back_populates="contract", sa_relationship_kwargs={"lazy": "raise"}
     )
     individual_priorities: list["IndividualPriority"] = Relationship(
-        back_populates="contract", sa_relationship_kwargs={"lazy": "selectin"}
+        back_populates="contract", sa_relationship_kwargs={"lazy": "raise"}
     )
 
 
@@ -49,3 +49,36 @@ class ContractUpdate(SQLModel):
     start_dt: date | None = None
     end_dt: date | None = None
     type_priorities: str | None = None
+
+
+class ContractBulkItem(ContractCreate):
+    # Существующий договор обновляется, без id создается новый
+    id: UUID | None = None
+    # Названия стандартных приоритетов; None - связи не меняются,
+    # список - заменяет связи договора целиком
+    standard_priorities: list[str] | None = None
+    # Индивидуальные приоритеты по названию; None - не меняются, список -
+    # заменяет приоритеты договора (отсутствующие в нем удаляются)
+    individual_priorities: list[BasePriorityBase] | None = None
+
+
+class ContractBulkRequest(SQLModel):
+    # Стандартные приоритеты создаются или обновляются по названию раньше
+    # договоров, договоры могут на них ссылаться
+    standard_priorities: list[BasePriorityBase] = Field(
+        default_factory=list, max_length=1000
+    )
+    contracts: list[ContractBulkItem] = Field(default_factory=list, max_length=1000)
+
+
+class BulkItemResult(SQLModel):
+    # Позиция элемента в запросе
+    index: int
+    id: UUID | None = None
+    status: Literal["created", "updated", "failed"]
+    detail: str | None = None
+
+
+class ContractBulkResult(SQLModel):
+    standard_priorities: list[BulkItemResult]
+    contracts: list[BulkItemResult]
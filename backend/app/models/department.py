@@ -18,10 +18,10 @@ class Department(DepartmentBase, table=True):
 
     # Relationships
     organization: "Organization" = Relationship(
-        back_populates="departments", sa_relationship_kwargs={"lazy": "selectin"}
+        back_populates="departments", sa_relationship_kwargs={"lazy": "raise"}
     )
     specialists: list["Specialist"] = Relationship(
-        back_populates="department", sa_relationship_kwargs={"lazy": "selectin"}
+        back_populates="department", sa_relationship_kwargs={"lazy": "raise"}
     )
 
 
@@ -0,0 +1,23 @@
+from datetime import datetime
+from typing import Literal
+
+from sqlmodel import Field, SQLModel
+
+# Производные файлы: thumb - миниатюра изображения или первой страницы PDF
+FileVariant = Literal["thumb"]
+
+
+class FileBlob(SQLModel, table=True):
+    """
+    Содержимое загруженного файла, общее для всех одинаковых файлов
+
+    Хранится один раз по хэшу содержимого; ref_count - число записей
+    AppealFile/CommentFile, которые на него ссылаются.
+    """
+
+    sha256: str = Field(primary_key=True, max_length=64)
+    size: int
+    # Определяется по содержимому при загрузке
+    content_type: str = Field(default="application/octet-stream", max_length=255)
+    ref_count: int = Field(default=0)
+    created_at: datetime = Field(default_factory=datetime.utcnow)
@@ -0,0 +1,44 @@
+from datetime import datetime
+from typing import Any, Literal
+from uuid import UUID, uuid4
+
+from sqlalchemy import JSON, Column, Index, text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlmodel import Field, SQLModel
+
+# pending - ждет отправки (в том числе повторной), failed - попытки
+# исчерпаны. Отправленные уведомления из таблицы удаляются
+NotificationStatus = Literal["pending", "failed"]
+
+
+class NotificationOutbox(SQLModel, table=True):
+    """
+    Уведомление, ожидающее отправки
+
+    Записывается в той же транзакции, что и изменение, о котором
+    уведомляет, поэтому не теряется и не отправляется для откаченных
+    изменений. Отправляет отдельный процесс (app.utils.outbox).
+    """
+
+    __table_args__ = (
+        # Очередь диспетчера: готовые к отправке по времени
+        Index(
+            "ix_notificationoutbox_pending_available_at",
+            "available_at",
+            postgresql_where=text("status = 'pending'"),
+        ),
+    )
+
+    id: UUID = Field(default_factory=uuid4, primary_key=True)
+    # Обработчик уведомления, например email.appeal_created
+    kind: str = Field(max_length=64)
+    payload: dict[str, Any] = Field(
+        default_factory=dict,
+        sa_column=Column(JSON().with_variant(JSONB, "postgresql"), nullable=False),
+    )
+    status: str = Field(default="pending", max_length=16)
+    attempts: int = Field(default=0)
+    # Не раньше этого времени уведомление берется в отправку
+    available_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    last_error: str | None = None
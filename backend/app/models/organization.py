@@ -32,25 +32,25 @@ class Organization(OrganizationBase, table=True):
 
     # Relationships
     region: "Region" = Relationship(
-        back_populates="organizations", sa_relationship_kwargs={"lazy": "selectin"}
+        back_populates="organizations", sa_relationship_kwargs={"lazy": "raise"}
     )
     departments: list["Department"] = Relationship(
-        back_populates="organization", sa_relationship_kwargs={"lazy": "selectin"}
+        back_populates="organization", sa_relationship_kwargs={"lazy": "raise"}
     )
     representatives: list["Representative"] = Relationship(
-        back_populates="organization", sa_relationship_kwargs={"lazy": "selectin"}
+        back_populates="organization", sa_relationship_kwargs={"lazy": "raise"}
     )
     contracts: list["Contract"] = Relationship(
-        back_populates="organization", sa_relationship_kwargs={"lazy": "selectin"}
+        back_populates="organization", sa_relationship_kwargs={"lazy": "raise"}
     )
     project_links: list["OrganizationProject"] = Relationship(
-        back_populates="organization", sa_relationship_kwargs={"lazy": "selectin"}
+        back_populates="organization", sa_relationship_kwargs={"lazy": "raise"}
     )
     specialists: list["SpecialistOrganization"] = Relationship(
-        back_populates="organization", sa_relationship_kwargs={"lazy": "selectin"}
+        back_populates="organization", sa_relationship_kwargs={"lazy": "raise"}
     )
     custom_appeal_completion_status: "AppealStatus" = Relationship(
-        back_populates="organizations", sa_relationship_kwargs={"lazy": "selectin"}
+        back_populates="organizations", sa_relationship_kwargs={"lazy": "raise"}
     )
 
 
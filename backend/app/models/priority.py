@@ -1,6 +1,7 @@
 from typing import TYPE_CHECKING
 from uuid import UUID, uuid4
 
+from sqlalchemy import Index
 from sqlmodel import Field, Relationship, SQLModel
 
 if TYPE_CHECKING:
@@ -20,28 +21,43 @@ class ContractStandardPriority(SQLModel, table=True):
     # Relationships
     contract: "Contract" = Relationship(
         back_populates="standard_priority_links",
-        sa_relationship_kwargs={"lazy": "selectin"},
+        sa_relationship_kwargs={"lazy": "raise"},
     )
     priority: "StandardPriority" = Relationship(
-        back_populates="contract_links", sa_relationship_kwargs={"lazy": "selectin"}
+        back_populates="contract_links", sa_relationship_kwargs={"lazy": "raise"}
     )
 
 
 class StandardPriority(BasePriorityBase, table=True):
+    # Названия уникальны; на индекс опирается массовая загрузка
+    # (INSERT ... ON CONFLICT (name))
+    __table_args__ = (Index("ix_standardpriority_name", "name", unique=True),)
+
     id: UUID = Field(default_factory=uuid4, primary_key=True)
 
     # Relationships
     contract_links: list["ContractStandardPriority"] = Relationship(
-        back_populates="priority", sa_relationship_kwargs={"lazy": "selectin"}
+        back_populates="priority", sa_relationship_kwargs={"lazy": "raise"}
     )
 
 
 class IndividualPriority(BasePriorityBase, table=True):
+    # Названия уникальны в рамках договора; индекс также служит выборке
+    # приоритетов договора
+    __table_args__ = (
+        Index(
+            "ix_individualpriority_contract_id_name",
+            "contract_id",
+            "name",
+            unique=True,
+        ),
+    )
+
     id: UUID = Field(default_factory=uuid4, primary_key=True)
     contract_id: UUID = Field(foreign_key="contract.id")
 
     # Relationships
     contract: "Contract" = Relationship(
         back_populates="individual_priorities",
-        sa_relationship_kwargs={"lazy": "selectin"},
+        sa_relationship_kwargs={"lazy": "raise"},
     )
@@ -13,10 +13,10 @@ class OrganizationProject(SQLModel, table=True):
 
     # Relationships
     organization: "Organization" = Relationship(
-        back_populates="project_links", sa_relationship_kwargs={"lazy": "selectin"}
+        back_populates="project_links", sa_relationship_kwargs={"lazy": "raise"}
     )
     project: "Project" = Relationship(
-        back_populates="organization_links", sa_relationship_kwargs={"lazy": "selectin"}
+        back_populates="organization_links", sa_relationship_kwargs={"lazy": "raise"}
     )
 
 
@@ -30,5 +30,5 @@ class Project(ProjectBase, table=True):
 
     # Relationships
     organization_links: list[OrganizationProject] = Relationship(
-        back_populates="project", sa_relationship_kwargs={"lazy": "selectin"}
+        back_populates="project", sa_relationship_kwargs={"lazy": "raise"}
     )
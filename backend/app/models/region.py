@@ -18,10 +18,10 @@ class Region(RegionBase, table=True):
 
     # Relationships
     organizations: list["Organization"] = Relationship(
-        back_populates="region", sa_relationship_kwargs={"lazy": "selectin"}
+        back_populates="region", sa_relationship_kwargs={"lazy": "raise"}
     )
     appeals: list["Appeal"] = Relationship(
-        back_populates="region", sa_relationship_kwargs={"lazy": "selectin"}
+        back_populates="region", sa_relationship_kwargs={"lazy": "raise"}
     )
 
 
@@ -0,0 +1,38 @@
+from datetime import date, datetime
+from typing import Literal
+from uuid import UUID
+
+from pydantic import model_validator
+from sqlmodel import Field, SQLModel
+from typing_extensions import Self
+
+ReportFormat = Literal["xlsx", "csv", "parquet"]
+
+# queued - ждет свободного процесса, running - генерируется,
+# done - файл готов к скачиванию, failed - генерация завершилась ошибкой
+ReportJobStatus = Literal["queued", "running", "done", "failed"]
+
+
+class ReportJobCreate(SQLModel):
+    organization_id: UUID
+    date_from: date
+    date_to: date
+    format: ReportFormat = "xlsx"
+
+    @model_validator(mode="after")
+    def _check_period(self) -> Self:
+        if self.date_from > self.date_to:
+            raise ValueError("date_from must not be later than date_to")
+        return self
+
+
+class ReportJobPublic(ReportJobCreate):
+    """Задача генерации отчета; хранится на диске рядом с файлом отчета"""
+
+    id: str
+    status: ReportJobStatus
+    data_version: str
+    created_at: datetime
+    updated_at: datetime
+    error: str | None = None
+    size: int | None = Field(default=None, description="Размер файла в байтах")
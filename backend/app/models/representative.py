@@ -1,6 +1,7 @@
 from typing import TYPE_CHECKING, Optional
 from uuid import UUID, uuid4
 
+from sqlalchemy import Index
 from sqlmodel import Field, Relationship, SQLModel
 
 if TYPE_CHECKING:
@@ -18,6 +19,14 @@ class RepresentativeBase(SQLModel):
 
 
 class Representative(RepresentativeBase, table=True):
+    __table_args__ = (
+        # Принципал и проверка доступа: организация представителя по user_id
+        Index(
+            "ix_representative_user_id_organization_id", "user_id", "organization_id"
+        ),
+        Index("ix_representative_organization_id", "organization_id"),
+    )
+
     id: UUID = Field(default_factory=uuid4, primary_key=True)
     user_id: UUID = Field(foreign_key="user.id")
     organization_id: UUID = Field(foreign_key="organization.id")
@@ -26,12 +35,16 @@ class Representative(RepresentativeBase, table=True):
     )
 
     # Relationships
-    user: "User" = Relationship(back_populates="representative")
-    organization: "Organization" = Relationship(back_populates="representatives")
+    user: "User" = Relationship(
+        back_populates="representative", sa_relationship_kwargs={"lazy": "raise"}
+    )
+    organization: "Organization" = Relationship(
+        back_populates="representatives", sa_relationship_kwargs={"lazy": "raise"}
+    )
     main_representative: Optional["Representative"] = Relationship(
         back_populates="representatives",
-        sa_relationship_kwargs={"remote_side": "Representative.id"},
+        sa_relationship_kwargs={"lazy": "raise", "remote_side": "Representative.id"},
     )
     representatives: list["Representative"] = Relationship(
-        back_populates="main_representative"
+        back_populates="main_representative", sa_relationship_kwargs={"lazy": "raise"}
     )
@@ -1,6 +1,7 @@
 from typing import TYPE_CHECKING
 from uuid import UUID, uuid4
 
+from sqlalchemy import Index
 from sqlmodel import Field, Relationship, SQLModel
 
 if TYPE_CHECKING:
@@ -16,10 +17,10 @@ class SpecialistOrganization(SQLModel, table=True):
 
     # Relationships
     specialist: "Specialist" = Relationship(
-        back_populates="organization_links", sa_relationship_kwargs={"lazy": "selectin"}
+        back_populates="organization_links", sa_relationship_kwargs={"lazy": "raise"}
     )
     organization: "Organization" = Relationship(
-        back_populates="specialists", sa_relationship_kwargs={"lazy": "selectin"}
+        back_populates="specialists", sa_relationship_kwargs={"lazy": "raise"}
     )
 
 
@@ -29,22 +30,24 @@ class SpecialistBase(SQLModel):
 
 
 class Specialist(SpecialistBase, table=True):
+    __table_args__ = (Index("ix_specialist_user_id", "user_id"),)
+
     id: UUID = Field(default_factory=uuid4, primary_key=True)
 
     # Relationships
     user: "User" = Relationship(
-        back_populates="specialist", sa_relationship_kwargs={"lazy": "selectin"}
+        back_populates="specialist", sa_relationship_kwargs={"lazy": "raise"}
     )
     department: "Department" = Relationship(
-        back_populates="specialists", sa_relationship_kwargs={"lazy": "selectin"}
+        back_populates="specialists", sa_relationship_kwargs={"lazy": "raise"}
     )
     responsible_appeals: list["Appeal"] = Relationship(
         sa_relationship_kwargs={
-            "lazy": "selectin",
+            "lazy": "raise",
             "primaryjoin": "foreign(Specialist.user_id) == remote(Appeal.responsible_user_id)",
             "viewonly": True,
         }
     )
     organization_links: list["SpecialistOrganization"] = Relationship(
-        back_populates="specialist", sa_relationship_kwargs={"lazy": "selectin"}
+        back_populates="specialist", sa_relationship_kwargs={"lazy": "raise"}
     )
@@ -1,6 +1,7 @@
 from typing import TYPE_CHECKING
 from uuid import UUID, uuid4
 
+from sqlalchemy import Index
 from sqlmodel import Field, Relationship, SQLModel
 
 if TYPE_CHECKING:
@@ -14,11 +15,20 @@ class TaskBase(SQLModel):
 
 
 class Task(TaskBase, table=True):
+    __table_args__ = (
+        Index("ix_task_appeal_id", "appeal_id"),
+        Index("ix_task_user_id", "user_id"),
+    )
+
     id: UUID = Field(default_factory=uuid4, primary_key=True)
     appeal_id: UUID = Field(foreign_key="appeal.id")
     user_id: UUID = Field(foreign_key="user.id")
     description: str = Field(default="")
 
     # Relationships
-    appeal: "Appeal" = Relationship(back_populates="tasks")
-    user: "User" = Relationship(back_populates="tasks")
+    appeal: "Appeal" = Relationship(
+        back_populates="tasks", sa_relationship_kwargs={"lazy": "raise"}
+    )
+    user: "User" = Relationship(
+        back_populates="tasks", sa_relationship_kwargs={"lazy": "raise"}
+    )
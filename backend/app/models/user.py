@@ -60,27 +60,31 @@ class User(UserBase, table=True):
 
     # Relationships
     tasks: list["Task"] = Relationship(
-        back_populates="user", sa_relationship_kwargs={"lazy": "selectin"}
+        back_populates="user", sa_relationship_kwargs={"lazy": "raise"}
     )
     appeals: list["Appeal"] = Relationship(
         back_populates="user",
         sa_relationship_kwargs={
-            "lazy": "selectin",
+            "lazy": "raise",
             "primaryjoin": "and_(Appeal.user_id == User.id, Appeal.responsible_user_id != User.id)",
         },
     )
     responsible_appeals: list["Appeal"] = Relationship(
         back_populates="responsible_user",
         sa_relationship_kwargs={
-            "lazy": "selectin",
+            "lazy": "raise",
             "primaryjoin": "and_(Appeal.responsible_user_id == User.id, Appeal.user_id != User.id)",
         },
     )
     specialist: "Specialist" = Relationship(
-        back_populates="user", sa_relationship_kwargs={"lazy": "selectin"}
+        back_populates="user", sa_relationship_kwargs={"lazy": "raise"}
+    )
+    representative: Optional["Representative"] = Relationship(
+        back_populates="user", sa_relationship_kwargs={"lazy": "raise"}
+    )
+    comments: list["Comment"] = Relationship(
+        back_populates="user", sa_relationship_kwargs={"lazy": "raise"}
     )
-    representative: Optional["Representative"] = Relationship(back_populates="user")
-    comments: list["Comment"] = Relationship(back_populates="user")
 
 
 # Properties to return via API, id is always required
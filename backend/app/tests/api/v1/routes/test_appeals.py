@@ -0,0 +1,215 @@
+from dataclasses import dataclass
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.models.appeal import Appeal
+from app.models.appeal_status import AppealStatus
+from app.models.comment import Comment
+from app.models.notification_outbox import NotificationOutbox
+from app.models.task import Task
+from app.models.user import User
+from app.tests.utils.appeal import (
+    create_random_appeal,
+    create_random_organization,
+    create_random_representative,
+)
+from app.tests.utils.user import user_authentication_headers
+from app.tests.utils.utils import random_lower_string
+
+
+@dataclass
+class AppealData:
+    author: User
+    headers: dict[str, str]
+    appeal: Appeal
+    comment: Comment
+    task: Task
+
+
+@pytest.fixture(scope="module")
+def appeal_data(client: TestClient, db: Session) -> AppealData:
+    password = random_lower_string()
+    organization = create_random_organization(db)
+    author = create_random_representative(db, organization, password=password)
+    appeal = create_random_appeal(db, author)
+    comment = Comment(appeal_id=appeal.id, user_id=author.id, text="Checked")
+    task = Task(appeal_id=appeal.id, user_id=author.id, status="open")
+    db.add_all([comment, task])
+    db.commit()
+    headers = user_authentication_headers(
+        client=client, email=author.email, password=password
+    )
+    return AppealData(
+        author=author, headers=headers, appeal=appeal, comment=comment, task=task
+    )
+
+
+# Связи моделей lazy="raise": ответы собираются только из того, что загрузил
+# профиль crud-функции (app.cruds.loaders), лишнее обращение к связи - 500
+
+
+def test_read_appeal_detail(
+    client: TestClient,
+    superuser_token_headers: dict[str, str],
+    appeal_data: AppealData,
+) -> None:
+    appeal = appeal_data.appeal
+    r = client.get(
+        f"{settings.API_V1_STR}/appeals/{appeal.id}", headers=superuser_token_headers
+    )
+    assert r.status_code == 200
+    content = r.json()
+    assert content["id"] == str(appeal.id)
+    assert content["subject"] == appeal.subject
+    assert content["status_id"] == str(appeal.status_id)
+
+
+def test_read_appeal_detail_as_representative(
+    client: TestClient, appeal_data: AppealData
+) -> None:
+    appeal = appeal_data.appeal
+    r = client.get(
+        f"{settings.API_V1_STR}/appeals/{appeal.id}", headers=appeal_data.headers
+    )
+    assert r.status_code == 200
+    assert r.json()["user_id"] == str(appeal_data.author.id)
+
+
+def test_read_appeal_detail_forbidden(
+    client: TestClient,
+    normal_user_token_headers: dict[str, str],
+    appeal_data: AppealData,
+) -> None:
+    r = client.get(
+        f"{settings.API_V1_STR}/appeals/{appeal_data.appeal.id}",
+        headers=normal_user_token_headers,
+    )
+    assert r.status_code == 403
+
+
+def test_read_appeals_list(client: TestClient, appeal_data: AppealData) -> None:
+    r = client.get(f"{settings.API_V1_STR}/appeals/", headers=appeal_data.headers)
+    assert r.status_code == 200
+    items = r.json()["items"]
+    assert [item["id"] for item in items] == [str(appeal_data.appeal.id)]
+
+
+def test_read_comment_detail(client: TestClient, appeal_data: AppealData) -> None:
+    comment = appeal_data.comment
+    r = client.get(
+        f"{settings.API_V1_STR}/comments/{comment.id}", headers=appeal_data.headers
+    )
+    assert r.status_code == 200
+    content = r.json()
+    assert content["id"] == str(comment.id)
+    assert content["text"] == "Checked"
+
+
+def test_read_appeal_comments_list(client: TestClient, appeal_data: AppealData) -> None:
+    r = client.get(
+        f"{settings.API_V1_STR}/comments/appeal/{appeal_data.appeal.id}",
+        headers=appeal_data.headers,
+    )
+    assert r.status_code == 200
+    items = r.json()["items"]
+    assert [item["id"] for item in items] == [str(appeal_data.comment.id)]
+
+
+def test_read_tasks_list(client: TestClient, appeal_data: AppealData) -> None:
+    r = client.get(f"{settings.API_V1_STR}/tasks/", headers=appeal_data.headers)
+    assert r.status_code == 200
+    items = r.json()["items"]
+    assert [item["id"] for item in items] == [str(appeal_data.task.id)]
+
+
+@pytest.mark.parametrize("count", ["exact", "estimated", "cached", "none"])
+def test_read_appeals_page(
+    client: TestClient, appeal_data: AppealData, count: str
+) -> None:
+    r = client.get(
+        f"{settings.API_V1_STR}/appeals/pages",
+        headers=appeal_data.headers,
+        params={"page": 1, "per_page": 10, "count": count},
+    )
+    assert r.status_code == 200
+    content = r.json()
+    assert [item["id"] for item in content["items"]] == [str(appeal_data.appeal.id)]
+    assert content["has_next"] is False
+    if count == "none":
+        assert content["total"] is None
+    elif count != "estimated":
+        assert content["total"] == 1
+        assert content["total_is_estimate"] is False
+
+
+@pytest.mark.parametrize("limit", [0, 101])
+def test_read_appeals_page_rejects_cursor_limit_out_of_range(
+    client: TestClient, appeal_data: AppealData, limit: int
+) -> None:
+    r = client.get(
+        f"{settings.API_V1_STR}/appeals/pages",
+        headers=appeal_data.headers,
+        params={"cursor": "x", "limit": limit},
+    )
+    assert r.status_code == 422
+
+
+def test_read_appeals_page_rejects_invalid_cursor(
+    client: TestClient, appeal_data: AppealData
+) -> None:
+    r = client.get(
+        f"{settings.API_V1_STR}/appeals/pages",
+        headers=appeal_data.headers,
+        params={"cursor": "x", "limit": 5},
+    )
+    assert r.status_code == 400
+
+
+def _outbox_kinds(db: Session, appeal: Appeal) -> list[str]:
+    statement = select(NotificationOutbox.kind).where(
+        NotificationOutbox.payload["appeal_id"].as_string() == str(appeal.id)
+    )
+    return sorted(db.exec(statement).all())
+
+
+def test_update_appeal_status_enqueues_notifications(
+    client: TestClient,
+    superuser_token_headers: dict[str, str],
+    db: Session,
+    appeal_data: AppealData,
+) -> None:
+    appeal = create_random_appeal(db, appeal_data.author)
+    status = AppealStatus(name=random_lower_string())
+    db.add(status)
+    db.commit()
+
+    r = client.patch(
+        f"{settings.API_V1_STR}/appeals/{appeal.id}",
+        headers=superuser_token_headers,
+        json={"status_id": str(status.id), "solving": "Перезагрузили сервер"},
+    )
+    assert r.status_code == 200
+    content = r.json()
+    assert content["status_id"] == str(status.id)
+    assert content["solving"] == "Перезагрузили сервер"
+    assert content["priority"] == appeal.priority
+    assert _outbox_kinds(db, appeal) == [
+        "bot.appeal_updated",
+        "email.appeal_status_changed",
+    ]
+
+    # Тот же статус повторно - не смена статуса, уведомлений не добавляется
+    r = client.patch(
+        f"{settings.API_V1_STR}/appeals/{appeal.id}",
+        headers=superuser_token_headers,
+        json={"status_id": str(status.id)},
+    )
+    assert r.status_code == 200
+    assert r.json()["solving"] == "Перезагрузили сервер"
+    assert _outbox_kinds(db, appeal) == [
+        "bot.appeal_updated",
+        "email.appeal_status_changed",
+    ]
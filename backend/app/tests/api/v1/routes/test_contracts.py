@@ -0,0 +1,40 @@
+from datetime import date
+
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.models.contract import Contract
+from app.models.priority import (
+    ContractStandardPriority,
+    IndividualPriority,
+    StandardPriority,
+)
+from app.tests.utils.appeal import create_random_organization
+from app.tests.utils.utils import random_lower_string
+
+
+def test_read_contract_detail(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    organization = create_random_organization(db)
+    priority = StandardPriority(name=random_lower_string(), hours=8)
+    contract = Contract(
+        organization_id=organization.id,
+        start_dt=date(2024, 1, 1),
+        end_dt=date(2025, 1, 1),
+        type_priorities="standard",
+    )
+    db.add_all([priority, contract])
+    db.add(ContractStandardPriority(contract_id=contract.id, priority_id=priority.id))
+    db.add(IndividualPriority(name="urgent", hours=2, contract_id=contract.id))
+    db.commit()
+
+    r = client.get(
+        f"{settings.API_V1_STR}/contracts/{contract.id}",
+        headers=superuser_token_headers,
+    )
+    assert r.status_code == 200
+    content = r.json()
+    assert content["id"] == str(contract.id)
+    assert content["organization_id"] == str(organization.id)
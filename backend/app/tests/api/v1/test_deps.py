@@ -7,8 +7,14 @@ import pytest
 from fastapi import HTTPException
 from sqlmodel import Session
 
-from app.api.v1.deps import get_current_active_superuser, get_current_user
+from app.api.v1.deps import (
+    get_current_active_superuser,
+    get_current_principal,
+    get_current_user,
+    get_token_user_id,
+)
 from app.core.config import settings
+from app.core.principal import Principal, invalidate_principal, principal_cache
 from app.core.security import ALGORITHM, create_access_token
 from app.models.user import User
 
@@ -156,3 +162,58 @@ def test_get_current_active_superuser_not_superuser(active_user):
 
     assert exc_info.value.status_code == 403
     assert exc_info.value.detail == "The user doesn't have enough privileges"
+
+
+def test_get_token_user_id_invalid_subject():
+    # Подготовка
+    token = create_access_token(
+        subject="nonexistent_user_id", expires_delta=timedelta(minutes=15)
+    )
+
+    # Проверка
+    with pytest.raises(HTTPException) as exc_info:
+        get_token_user_id(token)
+
+    assert exc_info.value.status_code == 403
+
+
+def test_get_current_principal_cached(mock_session, active_user):
+    # Подготовка
+    organization_id = uuid4()
+    mock_session.exec.return_value.first.return_value = (
+        active_user.id,
+        True,
+        False,
+        organization_id,
+        None,
+    )
+
+    # Выполнение
+    first = get_current_principal(mock_session, active_user.id)
+    second = get_current_principal(mock_session, active_user.id)
+
+    # Проверка: второй вызов обслуживается из кэша
+    assert first is second
+    assert first.organization_id == organization_id
+    assert first.controlled_organization_ids == frozenset()
+    mock_session.exec.assert_called_once()
+
+    invalidate_principal(active_user.id)
+    get_current_principal(mock_session, active_user.id)
+    assert mock_session.exec.call_count == 2
+    principal_cache.clear()
+
+
+def test_get_current_principal_inactive_user(mock_session):
+    # Подготовка
+    user_id = uuid4()
+    principal_cache.set(
+        user_id, Principal(id=user_id, is_active=False, is_superuser=False)
+    )
+
+    # Проверка
+    with pytest.raises(HTTPException) as exc_info:
+        get_current_principal(mock_session, user_id)
+
+    assert exc_info.value.status_code == 400
+    principal_cache.clear()
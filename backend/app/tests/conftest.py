@@ -4,12 +4,11 @@ from unittest.mock import patch
 import pytest
 from fastapi.testclient import TestClient
 from pydantic_settings import BaseSettings
-from sqlmodel import Session, delete
+from sqlmodel import Session, SQLModel, delete
 
 from app.core.config import settings
 from app.core.db import engine, init_db
 from app.main import app
-from app.models.user import User
 from app.tests.utils.user import authentication_token_from_email
 from app.tests.utils.utils import get_superuser_token_headers
 
@@ -45,11 +44,29 @@ def db() -> Generator[Session, None, None]:
     with Session(engine) as session:
         init_db(session)
         yield session
-        statement = delete(User)
-        session.exec(statement)
+        # Тесты API фиксируют свои данные; удаляем все в порядке зависимостей
+        for table in reversed(SQLModel.metadata.sorted_tables):
+            session.exec(delete(table))
         session.commit()
 
 
+@pytest.fixture
+def session() -> Generator[Session, None, None]:
+    """
+    Сессия в транзакции, которая откатывается после теста
+
+    commit в проверяемом коде фиксирует только точку сохранения, поэтому
+    данные теста не видны другим тестам и не остаются в БД.
+    """
+    with engine.connect() as connection:
+        transaction = connection.begin()
+        with Session(
+            bind=connection, join_transaction_mode="create_savepoint"
+        ) as session:
+            yield session
+        transaction.rollback()
+
+
 @pytest.fixture(scope="module")
 def client() -> Generator[TestClient, None, None]:
     with TestClient(app) as c:
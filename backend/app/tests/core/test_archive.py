@@ -0,0 +1,44 @@
+import io
+import zipfile
+from pathlib import Path
+
+import pytest
+
+from app.core.archive import ArchiveEntry, iter_zip, unique_name
+from app.core.config import settings
+
+
+def test_iter_zip_streams_files_with_per_type_compression(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path))
+    (tmp_path / "photo.jpg").write_bytes(b"\xff\xd8\xff" + b"j" * 1000)
+    (tmp_path / "log.txt").write_bytes(b"line\n" * 1000)
+
+    used: set[str] = set()
+    entries = [
+        ArchiveEntry(
+            name=unique_name("photo.jpg", used),
+            key="photo.jpg",
+            content_type="image/jpeg",
+        ),
+        ArchiveEntry(
+            name=unique_name("log.txt", used), key="log.txt", content_type="text/plain"
+        ),
+        ArchiveEntry(
+            name=unique_name("log.txt", used), key="log.txt", content_type="text/plain"
+        ),
+        # Файла нет в хранилище - пропускается
+        ArchiveEntry(name="lost.txt", key="lost.txt", content_type="text/plain"),
+    ]
+    chunks = list(iter_zip(entries))
+    assert len(chunks) > 1
+
+    with zipfile.ZipFile(io.BytesIO(b"".join(chunks))) as archive:
+        assert archive.testzip() is None
+        infos = {info.filename: info for info in archive.infolist()}
+        assert list(infos) == ["photo.jpg", "log.txt", "log (2).txt"]
+        assert infos["photo.jpg"].compress_type == zipfile.ZIP_STORED
+        assert infos["log.txt"].compress_type == zipfile.ZIP_DEFLATED
+        assert infos["log.txt"].compress_size < infos["log.txt"].file_size
+        assert archive.read("log (2).txt") == b"line\n" * 1000
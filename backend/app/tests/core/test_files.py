@@ -0,0 +1,93 @@
+from pathlib import Path
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.responses import Response
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.core.files import blob_key, get_file_response, sniff_content_type
+
+SHA256 = "ab" * 32
+
+
+@pytest.fixture
+def client(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> TestClient:
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path))
+    path = tmp_path / blob_key(SHA256)
+    path.parent.mkdir(parents=True)
+    path.write_bytes(b"0123456789")
+
+    app = FastAPI()
+
+    @app.get("/file")
+    async def download(request: Request) -> Response:
+        return await get_file_response(
+            request=request,
+            file_path="appeal/1/отчет.txt",
+            blob_sha256=SHA256,
+            content_type="text/plain",
+        )
+
+    return TestClient(app)
+
+
+def test_conditional_and_range_requests(client: TestClient) -> None:
+    response = client.get("/file")
+    assert response.status_code == 200
+    assert response.content == b"0123456789"
+    assert response.headers["etag"] == f'"{SHA256}"'
+    assert response.headers["accept-ranges"] == "bytes"
+    assert response.headers["content-type"].startswith("text/plain")
+
+    cached = client.get("/file", headers={"If-None-Match": f'"{SHA256}"'})
+    assert cached.status_code == 304 and cached.content == b""
+
+    # Зона -0000 тоже означает GMT
+    for zone in ("GMT", "-0000"):
+        unchanged = client.get(
+            "/file", headers={"If-Modified-Since": f"Fri, 01 Jan 2100 00:00:00 {zone}"}
+        )
+        assert unchanged.status_code == 304
+        modified = client.get(
+            "/file", headers={"If-Modified-Since": f"Wed, 21 Oct 2015 07:28:00 {zone}"}
+        )
+        assert modified.status_code == 200
+
+    part = client.get("/file", headers={"Range": "bytes=2-4"})
+    assert part.status_code == 206
+    assert part.content == b"234"
+    assert part.headers["content-range"] == "bytes 2-4/10"
+
+    tail = client.get("/file", headers={"Range": "bytes=-3"})
+    assert tail.content == b"789"
+
+    # If-Range с другим ETag: файл изменился, отдаем целиком
+    stale = client.get("/file", headers={"Range": "bytes=2-4", "If-Range": '"old"'})
+    assert stale.status_code == 200 and stale.content == b"0123456789"
+
+    outside = client.get("/file", headers={"Range": "bytes=20-"})
+    assert outside.status_code == 416
+    assert outside.headers["content-range"] == "bytes */10"
+
+
+def test_accel_redirect_hands_file_to_proxy(
+    client: TestClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(settings, "FILE_SENDFILE_HEADER", "X-Accel-Redirect")
+    response = client.get("/file")
+    assert response.status_code == 200
+    assert response.content == b""
+    assert response.headers["x-accel-redirect"] == (
+        f"/protected-uploads/{blob_key(SHA256)}"
+    )
+
+
+def test_sniff_content_type_prefers_content_over_name() -> None:
+    assert sniff_content_type(b"\x89PNG\r\n\x1a\n...", "photo.jpg") == "image/png"
+    assert sniff_content_type(b"%PDF-1.7", None) == "application/pdf"
+    assert sniff_content_type(b"PK\x03\x04", "report.xlsx") == (
+        "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    )
+    assert sniff_content_type(b"plain", "notes.txt") == "text/plain"
+    assert sniff_content_type(b"\x00\x01", None) == "application/octet-stream"
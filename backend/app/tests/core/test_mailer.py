@@ -0,0 +1,145 @@
+import smtplib
+import socket
+import time
+from collections.abc import Generator
+from email.message import EmailMessage
+from typing import Any
+
+import pytest
+from aiosmtpd.controller import Controller
+
+from app.core.mailer import Mailer, RateLimiter
+
+
+class Sink:
+    def __init__(self) -> None:
+        self.messages: list[Any] = []
+        self.sessions: set[int] = set()
+
+    async def handle_RCPT(
+        self,
+        _server: Any,
+        _session: Any,
+        envelope: Any,
+        address: str,
+        _rcpt_options: list[str],
+    ) -> str:
+        if address.startswith("unknown@"):
+            return "550 No such user"
+        envelope.rcpt_tos.append(address)
+        return "250 OK"
+
+    async def handle_DATA(self, _server: Any, session: Any, envelope: Any) -> str:
+        self.messages.append(envelope)
+        self.sessions.add(id(session))
+        return "250 OK"
+
+
+class PipeliningSink(Sink):
+    """Сервер с PIPELINING: aiosmtpd разбирает команды по порядку из буфера"""
+
+    async def handle_EHLO(
+        self,
+        _server: Any,
+        session: Any,
+        _envelope: Any,
+        hostname: str,
+        responses: list[str],
+    ) -> list[str]:
+        session.host_name = hostname
+        return [responses[0], "250-PIPELINING", *responses[1:]]
+
+
+@pytest.fixture(params=[Sink, PipeliningSink])
+def sink(request: pytest.FixtureRequest) -> Generator[tuple[Sink, int], None, None]:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    handler = request.param()
+    controller = Controller(handler, hostname="127.0.0.1", port=port)
+    controller.start()
+    try:
+        yield handler, port
+    finally:
+        controller.stop()
+
+
+def _message(number: int) -> EmailMessage:
+    message = EmailMessage()
+    message["From"] = "helpdesk@example.com"
+    message["To"] = f"user{number}@example.com"
+    message["Subject"] = f"Message {number}"
+    message.set_content("<p>hello</p>", subtype="html")
+    return message
+
+
+def test_mailer_reuses_pooled_connections(sink: tuple[Sink, int]) -> None:
+    handler, port = sink
+    mailer = Mailer(host="127.0.0.1", port=port, pool_size=2, max_messages=10)
+    futures = [mailer.submit(_message(number)) for number in range(12)]
+    for future in futures:
+        future.result()
+    mailer.close()
+
+    assert len(handler.messages) == 12
+    metrics = mailer.metrics.snapshot()
+    assert metrics["sent"] == 12 and metrics["failed"] == 0
+    # Не больше двух соединений на поток: одно переоткрыто после max_messages
+    assert 2 <= metrics["connections_opened"] <= 4
+    assert len(handler.sessions) == metrics["connections_opened"]
+    expected = 12 if isinstance(handler, PipeliningSink) else 0
+    assert metrics["pipelined"] == expected
+
+
+def test_mailer_delivers_envelope_and_body(sink: tuple[Sink, int]) -> None:
+    handler, port = sink
+    mailer = Mailer(host="127.0.0.1", port=port)
+    message = _message(1)
+    message["Bcc"] = "audit@example.com"
+    message.set_content(".hidden dot\nsecond line", subtype="plain")
+    mailer.send(message)
+    mailer.close()
+
+    [envelope] = handler.messages
+    assert envelope.mail_from == "helpdesk@example.com"
+    assert envelope.rcpt_tos == ["user1@example.com", "audit@example.com"]
+    content = envelope.content.decode()
+    assert "\r\n.hidden dot\r\n" in content
+    assert "Bcc" not in content
+
+
+def test_mailer_keeps_connection_after_refused_recipient(
+    sink: tuple[Sink, int],
+) -> None:
+    handler, port = sink
+    mailer = Mailer(host="127.0.0.1", port=port)
+    refused = _message(0)
+    refused.replace_header("To", "unknown@example.com")
+    with pytest.raises(smtplib.SMTPRecipientsRefused):
+        mailer.send(refused)
+    mailer.send(_message(1))
+    mailer.close()
+
+    assert [envelope.rcpt_tos for envelope in handler.messages] == [
+        ["user1@example.com"]
+    ]
+    metrics = mailer.metrics.snapshot()
+    assert metrics["failed"] == 1 and metrics["connections_opened"] == 1
+
+
+def test_mailer_counts_failures() -> None:
+    # Порт, на котором никто не слушает
+    mailer = Mailer(host="127.0.0.1", port=1, timeout=1)
+    with pytest.raises(OSError):
+        mailer.send(_message(0))
+    mailer.close()
+    assert mailer.metrics.snapshot()["failed"] == 1
+
+
+def test_rate_limiter_spaces_out_sends() -> None:
+    limiter = RateLimiter(rate=50, burst=1)
+    started = time.monotonic()
+    for _ in range(6):
+        limiter.acquire()
+    # Первый токен есть сразу, остальные пять - по 20 мс
+    assert time.monotonic() - started >= 0.09
@@ -0,0 +1,41 @@
+import pytest
+from sqlalchemy import create_engine, exc
+from sqlalchemy.pool import QueuePool
+
+from app.core.pool import POOL_METRICS, instrumented_pool_class
+
+
+def test_instrumented_pool_counts_checkouts_and_timeouts() -> None:
+    engine = create_engine(
+        "sqlite://",
+        poolclass=instrumented_pool_class(QueuePool, "test-checkouts"),
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.01,
+    )
+    metrics = POOL_METRICS["test-checkouts"]
+
+    connection = engine.connect()
+    with pytest.raises(exc.TimeoutError):
+        engine.connect()
+    connection.close()
+
+    stats = metrics.snapshot(engine.pool)
+    assert stats["checkouts"] == 1
+    assert stats["timeouts"] == 1
+    assert stats["pool_class"] == "QueuePool"
+    assert stats["checkedout"] == 0
+
+
+def test_instrumented_pool_metrics_survive_dispose() -> None:
+    engine = create_engine(
+        "sqlite://",
+        poolclass=instrumented_pool_class(QueuePool, "test-dispose"),
+    )
+    with engine.connect():
+        pass
+    engine.dispose()
+    with engine.connect():
+        pass
+
+    assert POOL_METRICS["test-dispose"].checkouts == 2
@@ -0,0 +1,50 @@
+import io
+from pathlib import Path
+
+import pytest
+from PIL import Image
+
+from app.core.config import settings
+from app.core.files import blob_key, delete_blob, variant_key
+from app.core.previews import has_preview, render_variants
+
+SHA256 = "cd" * 32
+
+
+def test_render_variants_stores_bounded_thumbnail(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path))
+    source = io.BytesIO()
+    Image.new("RGB", (2000, 1000), "red").save(source, format="JPEG")
+    path = tmp_path / blob_key(SHA256)
+    path.parent.mkdir(parents=True)
+    path.write_bytes(source.getvalue())
+
+    assert has_preview("image/jpeg")
+    assert not has_preview("text/plain")
+    assert render_variants(SHA256, "image/jpeg")
+
+    thumb_path = tmp_path / variant_key(SHA256, "thumb")
+    with Image.open(thumb_path) as thumb:
+        assert thumb.format == "WEBP"
+        assert max(thumb.size) == settings.THUMBNAIL_SIZE
+        assert thumb.size[0] == 2 * thumb.size[1]
+    assert thumb_path.stat().st_size < path.stat().st_size
+
+    # Производные файлы удаляются вместе с оригиналом
+    delete_blob(sha256=SHA256)
+    assert not path.exists()
+    assert not thumb_path.exists()
+
+
+def test_render_variants_rejects_broken_image(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path))
+    path = tmp_path / blob_key(SHA256)
+    path.parent.mkdir(parents=True)
+    path.write_bytes(b"\x89PNG\r\n\x1a\nnot really a png")
+
+    assert not render_variants(SHA256, "image/png")
+    assert not (tmp_path / variant_key(SHA256, "thumb")).exists()
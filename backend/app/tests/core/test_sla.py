@@ -0,0 +1,92 @@
+from datetime import UTC, datetime, timedelta
+from uuid import uuid4
+
+from app.core.sla import DeadlineHeap, compute_sla, merge_intervals
+
+OPENED = datetime(2025, 3, 3, 9, 0)
+
+
+def at(hours: float) -> datetime:
+    return OPENED + timedelta(hours=hours)
+
+
+def test_merge_intervals_sorts_merges_and_stops_at_open_interval() -> None:
+    merged = merge_intervals(
+        [
+            (at(5), at(6)),
+            (at(1), at(3)),
+            (at(2), at(4)),
+            (at(4), at(4.5)),
+            (at(8), None),
+            (at(9), at(10)),
+        ]
+    )
+    assert merged == [(at(1), at(4.5)), (at(5), at(6)), (at(8), None)]
+
+
+def test_compute_sla_shifts_deadline_by_merged_pauses() -> None:
+    state = compute_sla(
+        opened_at=OPENED,
+        hours=8,
+        intervals=[
+            # До открытия обращения - обрезается
+            (at(-2), at(1)),
+            (at(2), at(3)),
+            (at(2.5), at(4)),
+            # После истечения срока - не учитывается
+            (at(20), at(30)),
+        ],
+    )
+    assert state.paused_seconds == 3 * 3600
+    assert state.deadline == at(11)
+    assert state.remaining(at(10)) == timedelta(hours=1)
+
+
+def test_compute_sla_open_pause_freezes_remaining_time() -> None:
+    state = compute_sla(
+        opened_at=OPENED,
+        hours=8,
+        intervals=[(at(1), at(2)), (at(5).replace(tzinfo=UTC), None)],
+    )
+    assert state.deadline is None
+    assert state.paused_since == at(5)
+    assert state.remaining(at(7)) == state.remaining(at(70)) == timedelta(hours=4)
+
+
+def test_compute_sla_without_priority_or_resolved() -> None:
+    assert compute_sla(opened_at=OPENED, hours=None, intervals=[]).deadline is None
+    resolved = compute_sla(opened_at=OPENED, hours=4, intervals=[], resolved=True)
+    assert resolved.deadline is None and resolved.hours == 4
+
+
+def test_deadline_heap_fires_in_order_and_drops_stale_alarms() -> None:
+    heap = DeadlineHeap(warning=timedelta(hours=1))
+    first, moved, warned = uuid4(), uuid4(), uuid4()
+    heap.schedule(first, at(2))
+    heap.schedule(moved, at(3))
+    heap.schedule(warned, at(4), warned=True)
+    # Перенос срока: старые срабатывания остаются в куче, но не срабатывают
+    heap.schedule(moved, at(10))
+
+    assert heap.next_at() == at(1)
+    assert [(a.appeal_id, a.event) for a in heap.pop_due(at(1.5))] == [
+        (first, "sla_warning")
+    ]
+    assert [(a.appeal_id, a.event) for a in heap.pop_due(at(2.5))] == [
+        (first, "sla_breached")
+    ]
+    assert heap.next_at() == at(4)
+    assert [(a.appeal_id, a.event) for a in heap.pop_due(at(9))] == [
+        (warned, "sla_breached"),
+        (moved, "sla_warning"),
+    ]
+    # Обращение закрыто - больше не отслеживается
+    heap.schedule(moved, None)
+    assert heap.next_at() is None and len(heap) == 0
+
+
+def test_deadline_heap_skips_warning_for_breached_deadline() -> None:
+    heap = DeadlineHeap(warning=timedelta(hours=1))
+    appeal_id = uuid4()
+    heap.schedule(appeal_id, at(2))
+    assert [a.event for a in heap.pop_due(at(5))] == ["sla_breached"]
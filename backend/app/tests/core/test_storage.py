@@ -0,0 +1,58 @@
+import io
+from collections.abc import Iterator
+
+import boto3  # type: ignore[import-untyped]
+import pytest
+from fastapi import HTTPException
+from moto import mock_aws
+
+from app.core.config import settings
+from app.core.storage import S3Storage
+
+MB = 1024 * 1024
+
+
+@pytest.fixture
+def s3_storage(monkeypatch: pytest.MonkeyPatch) -> Iterator[S3Storage]:
+    monkeypatch.setattr(settings, "S3_REGION", "us-east-1")
+    monkeypatch.setattr(settings, "S3_ACCESS_KEY_ID", "test")
+    monkeypatch.setattr(settings, "S3_SECRET_ACCESS_KEY", "test")
+    # Минимальный размер части multipart-загрузки в S3 - 5 МБ
+    monkeypatch.setattr(settings, "S3_MULTIPART_CHUNK_SIZE", 5 * MB)
+    monkeypatch.setattr(settings, "MAX_UPLOAD_SIZE", 8 * MB)
+    with mock_aws():
+        boto3.client("s3", region_name="us-east-1").create_bucket(
+            Bucket=settings.S3_BUCKET
+        )
+        yield S3Storage()
+
+
+def test_s3_storage_multipart_upload_and_presigned_url(
+    s3_storage: S3Storage,
+) -> None:
+    key = "appeal/1/logs.bin"
+    content = b"x" * (6 * MB)
+    s3_storage.save(key=key, source=io.BytesIO(content), filename="logs.bin")
+
+    stored = s3_storage.client.get_object(Bucket=settings.S3_BUCKET, Key=key)
+    # ETag multipart-объекта оканчивается числом частей
+    assert stored["ETag"].strip('"').endswith("-2")
+    assert stored["Body"].read() == content
+
+    stat = s3_storage.stat(key=key)
+    assert stat is not None and stat.size == len(content)
+    url = s3_storage.download_url(
+        key=key, filename="logs.bin", content_type="application/octet-stream"
+    )
+    assert key in url and "response-content-disposition" in url
+
+    s3_storage.delete(key=key)
+    assert not s3_storage.exists(key=key)
+
+
+def test_s3_storage_rejects_oversized_upload(s3_storage: S3Storage) -> None:
+    key = "appeal/1/big.bin"
+    with pytest.raises(HTTPException) as exc_info:
+        s3_storage.save(key=key, source=io.BytesIO(b"x" * (9 * MB)), filename="big.bin")
+    assert exc_info.value.status_code == 413
+    assert not s3_storage.exists(key=key)
@@ -0,0 +1,35 @@
+from pathlib import Path
+
+from app.core.config import settings
+from app.core.templates import EMAIL_TEMPLATES_DIR, TemplateRegistry
+
+
+def test_registry_compiles_once_and_reloads_only_on_request(tmp_path: Path) -> None:
+    templates = tmp_path / "templates"
+    templates.mkdir()
+    (templates / "base.html").write_text(
+        "<h1>{{ project_name }}</h1>{% block body %}{% endblock %}"
+    )
+    (templates / "hello.html").write_text(
+        '{% extends "base.html" %}{% block body %}Hi {{ name }}{% endblock %}'
+    )
+    cache_dir = tmp_path / "bytecode"
+    cache_dir.mkdir()
+
+    registry = TemplateRegistry(templates, bytecode_cache_dir=str(cache_dir))
+    assert registry.load_all() == 2
+    assert any(cache_dir.iterdir())
+    expected = f"<h1>{settings.PROJECT_NAME}</h1>Hi Ann"
+    assert registry.render("hello.html", {"name": "Ann"}) == expected
+
+    # Без auto_reload изменения на диске не перечитываются
+    (templates / "hello.html").write_text("changed {{ name }}")
+    assert registry.render("hello.html", {"name": "Bob"}).endswith("Hi Bob")
+
+    reloading = TemplateRegistry(templates, auto_reload=True)
+    assert reloading.render("hello.html", {"name": "Bob"}) == "changed Bob"
+
+
+def test_build_templates_compile() -> None:
+    registry = TemplateRegistry(EMAIL_TEMPLATES_DIR)
+    assert registry.load_all() == len(list(EMAIL_TEMPLATES_DIR.glob("*.html")))
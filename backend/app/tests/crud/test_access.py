@@ -0,0 +1,78 @@
+from uuid import UUID, uuid4
+
+import pytest
+from fastapi import HTTPException
+from sqlmodel import Session, col, select
+
+from app.core.principal import Principal
+from app.cruds.access import appeal_scope, check_appeal_access
+from app.models.appeal import Appeal
+from app.models.specialist import Specialist, SpecialistOrganization
+from app.tests.utils.appeal import (
+    create_random_appeal,
+    create_random_organization,
+    create_random_representative,
+)
+from app.tests.utils.user import create_random_user
+
+
+def test_appeal_scope(session: Session) -> None:
+    organization_a = create_random_organization(session)
+    organization_b = create_random_organization(session)
+    org_a, org_b = organization_a.id, organization_b.id
+    rep_a = create_random_representative(session, organization_a).id
+    author_a = create_random_representative(session, organization_a)
+    author_b = create_random_representative(session, organization_b)
+    specialist_user, stranger = (create_random_user(session).id for _ in range(2))
+    specialist = Specialist(user_id=specialist_user)
+    session.add(specialist)
+    session.add(
+        SpecialistOrganization(specialist_id=specialist.id, organization_id=org_b)
+    )
+    appeal_a = create_random_appeal(session, author_a, commit=False)
+    appeal_b = create_random_appeal(
+        session, author_b, commit=False, responsible_user_id=stranger
+    )
+    session.commit()
+
+    def visible(principal: Principal) -> set[UUID]:
+        # Другие тесты оставляют в БД свои обращения
+        statement = select(Appeal.id).where(
+            appeal_scope(principal), col(Appeal.id).in_([appeal_a.id, appeal_b.id])
+        )
+        return set(session.exec(statement).all())
+
+    assert visible(
+        Principal(id=rep_a, is_active=True, is_superuser=False, organization_id=org_a)
+    ) == {appeal_a.id}
+    assert visible(
+        Principal(
+            id=specialist_user,
+            is_active=True,
+            is_superuser=False,
+            controlled_organization_ids=[org_b],
+        )
+    ) == {appeal_b.id}
+    assert visible(Principal(id=stranger, is_active=True, is_superuser=False)) == {
+        appeal_b.id
+    }
+    assert visible(Principal(id=uuid4(), is_active=True, is_superuser=True)) == {
+        appeal_a.id,
+        appeal_b.id,
+    }
+
+    with pytest.raises(HTTPException) as exc_info:
+        check_appeal_access(
+            session=session,
+            principal=Principal(id=uuid4(), is_active=True, is_superuser=False),
+            appeal_id=appeal_a.id,
+        )
+    assert exc_info.value.status_code == 403
+
+    with pytest.raises(HTTPException) as exc_info:
+        check_appeal_access(
+            session=session,
+            principal=Principal(id=rep_a, is_active=True, is_superuser=True),
+            appeal_id=uuid4(),
+        )
+    assert exc_info.value.status_code == 404
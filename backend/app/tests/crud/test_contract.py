@@ -0,0 +1,212 @@
+from collections.abc import Generator
+from datetime import date, datetime, timedelta
+from typing import Any
+from uuid import uuid4
+
+import pytest
+from sqlmodel import Session, col, select
+
+from app.core.priority_catalog import priority_catalog_cache
+from app.cruds.contract import apply_contracts_bulk, update_contract
+from app.cruds.priority_catalog import get_priority_catalog
+from app.cruds.sla import refresh_appeals_sla
+from app.models.contract import (
+    Contract,
+    ContractBulkItem,
+    ContractBulkRequest,
+    ContractUpdate,
+)
+from app.models.organization import Organization
+from app.models.priority import (
+    BasePriorityBase,
+    ContractStandardPriority,
+    IndividualPriority,
+    StandardPriority,
+)
+from app.tests.utils.appeal import (
+    create_random_appeal,
+    create_random_organization,
+    create_random_representative,
+)
+from app.tests.utils.utils import random_lower_string
+
+
+@pytest.fixture
+def contract_session(session: Session) -> Generator[Session, None, None]:
+    priority_catalog_cache.clear()
+    yield session
+    priority_catalog_cache.clear()
+
+
+def _item(organization: Organization, **kwargs: Any) -> ContractBulkItem:
+    return ContractBulkItem(
+        organization_id=organization.id,
+        start_dt=kwargs.pop("start_dt", date(2024, 1, 1)),
+        end_dt=date(2025, 1, 1),
+        type_priorities="standard",
+        **kwargs,
+    )
+
+
+def test_apply_contracts_bulk(contract_session: Session) -> None:
+    session = contract_session
+    alpha = create_random_organization(session)
+    beta = create_random_organization(session)
+    # Названия стандартных приоритетов уникальны во всей БД
+    low, high, urgent = (random_lower_string() for _ in range(3))
+    session.add(StandardPriority(name=low, hours=72))
+    session.commit()
+
+    result = apply_contracts_bulk(
+        session=session,
+        bulk_in=ContractBulkRequest(
+            standard_priorities=[
+                BasePriorityBase(name=low, hours=48),
+                BasePriorityBase(name=high, hours=8),
+                BasePriorityBase(name=high, hours=4),
+            ],
+            contracts=[
+                _item(
+                    alpha,
+                    standard_priorities=[low, high],
+                    individual_priorities=[BasePriorityBase(name=high, hours=2)],
+                ),
+                _item(beta, standard_priorities=[low]),
+                _item(beta, start_dt=date(2026, 1, 1)),
+                _item(beta, standard_priorities=[urgent]),
+                _item(alpha, id=uuid4()),
+            ],
+        ),
+    )
+
+    assert [(r.index, r.status) for r in result.standard_priorities] == [
+        (0, "updated"),
+        (1, "created"),
+        (2, "failed"),
+    ]
+    assert [r.status for r in result.contracts] == [
+        "created",
+        "created",
+        "failed",
+        "failed",
+        "failed",
+    ]
+    assert result.contracts[3].detail == f"Unknown standard priorities: {urgent}"
+    assert result.contracts[4].detail == "Contract not found"
+    contracts = session.exec(
+        select(Contract).where(col(Contract.organization_id).in_([alpha.id, beta.id]))
+    )
+    assert len(contracts.all()) == 2
+    catalog = get_priority_catalog(session=session, organization_id=alpha.id)
+    assert {name: p.hours for name, p in catalog.items()} == {low: 48, high: 2}
+
+    # Повторная загрузка заменяет связи и индивидуальные приоритеты договора
+    contract_id = result.contracts[0].id
+    result = apply_contracts_bulk(
+        session=session,
+        bulk_in=ContractBulkRequest(
+            contracts=[
+                _item(
+                    alpha,
+                    id=contract_id,
+                    standard_priorities=[high],
+                    individual_priorities=[],
+                )
+            ]
+        ),
+    )
+    assert result.contracts[0].status == "updated"
+    catalog = get_priority_catalog(session=session, organization_id=alpha.id)
+    assert {name: p.hours for name, p in catalog.items()} == {high: 8}
+    assert not session.exec(
+        select(IndividualPriority).where(IndividualPriority.contract_id == contract_id)
+    ).all()
+
+
+def test_update_contract_replaces_links(contract_session: Session) -> None:
+    session = contract_session
+    organization = create_random_organization(session)
+    low = StandardPriority(name=random_lower_string())
+    high = StandardPriority(name=random_lower_string())
+    session.add_all([low, high])
+    contract = Contract(
+        organization_id=organization.id,
+        start_dt=date(2024, 1, 1),
+        end_dt=date(2025, 1, 1),
+        type_priorities="standard",
+    )
+    session.add(contract)
+    session.add(ContractStandardPriority(contract_id=contract.id, priority_id=low.id))
+    session.commit()
+
+    update_contract(
+        session=session,
+        db_contract=contract,
+        contract_in=ContractUpdate(),
+        standard_priority_ids=[high.id, high.id],
+    )
+
+    links = session.exec(
+        select(ContractStandardPriority).where(
+            ContractStandardPriority.contract_id == contract.id
+        )
+    ).all()
+    assert [(link.contract_id, link.priority_id) for link in links] == [
+        (contract.id, high.id)
+    ]
+
+
+def test_apply_contracts_bulk_refreshes_appeal_sla(contract_session: Session) -> None:
+    session = contract_session
+    organization = create_random_organization(session)
+    author = create_random_representative(session, organization)
+    name = random_lower_string()
+    session.add(StandardPriority(name=name, hours=72))
+    session.commit()
+    result = apply_contracts_bulk(
+        session=session,
+        bulk_in=ContractBulkRequest(
+            contracts=[
+                _item(
+                    organization,
+                    individual_priorities=[BasePriorityBase(name=name, hours=8)],
+                )
+            ]
+        ),
+    )
+    contract_id = result.contracts[0].id
+    individual = session.exec(
+        select(IndividualPriority).where(IndividualPriority.contract_id == contract_id)
+    ).one()
+    opened = datetime(2024, 6, 3, 9, 0)
+    by_name = create_random_appeal(
+        session, author, commit=False, priority=name, dt=opened
+    )
+    by_contract = create_random_appeal(
+        session,
+        author,
+        commit=False,
+        priority=name,
+        dt=opened,
+        individual_priority_id=individual.id,
+    )
+    session.flush()
+    refresh_appeals_sla(session=session, appeal_ids=[by_name.id, by_contract.id])
+    session.commit()
+
+    # Норматив хранится в обращениях: изменение приоритетов пересчитывает сроки
+    apply_contracts_bulk(
+        session=session,
+        bulk_in=ContractBulkRequest(
+            standard_priorities=[BasePriorityBase(name=name, hours=48)],
+            contracts=[
+                _item(
+                    organization,
+                    id=contract_id,
+                    individual_priorities=[BasePriorityBase(name=name, hours=4)],
+                )
+            ],
+        ),
+    )
+    assert by_name.sla_deadline == opened + timedelta(hours=48)
+    assert by_contract.sla_deadline == opened + timedelta(hours=4)
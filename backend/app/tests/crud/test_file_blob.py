@@ -0,0 +1,114 @@
+import io
+from pathlib import Path
+from uuid import uuid4
+
+import pytest
+from fastapi import HTTPException, UploadFile
+from sqlmodel import Session
+
+from app.core import storage
+from app.core.config import settings
+from app.core.files import blob_key
+from app.cruds.file_blob import (
+    purge_released_files,
+    release_files,
+    save_upload_file,
+)
+from app.models.appeal_file import AppealFile
+from app.models.file_blob import FileBlob
+from app.tests.utils.utils import random_lower_string
+
+
+def _upload(name: str, content: bytes) -> UploadFile:
+    return UploadFile(io.BytesIO(content), filename=name)
+
+
+@pytest.fixture
+def upload_dir(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path))
+    return tmp_path
+
+
+def _save(session: Session, name: str, content: bytes) -> AppealFile:
+    entity_id = uuid4()
+    stored = save_upload_file(
+        session=session,
+        file=_upload(name, content),
+        folder="appeal",
+        entity_id=entity_id,
+    )
+    assert stored.path == f"appeal/{entity_id}/{Path(name).name}"
+    file = AppealFile(file=stored.path, blob_sha256=stored.sha256)
+    session.add(file)
+    session.commit()
+    return file
+
+
+def test_identical_uploads_share_one_blob(
+    session: Session, upload_dir: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(settings, "MAX_UPLOAD_SIZE", 64)
+    monkeypatch.setattr(storage, "UPLOAD_CHUNK_SIZE", 4)
+    content = random_lower_string().encode()
+    files = [_save(session, name, content) for name in ("screenshot.png", "../a.png")]
+
+    blob = session.get(FileBlob, files[0].blob_sha256)
+    assert blob and blob.ref_count == 2 and blob.size == len(content)
+    content_path = upload_dir / blob_key(blob.sha256)
+    assert content_path.read_bytes() == content
+    assert [p for p in upload_dir.rglob("*") if p.is_file()] == [content_path]
+
+    # Лимит проверяется при подсчете хэша, до записи в хранилище
+    with pytest.raises(HTTPException) as exc_info:
+        save_upload_file(
+            session=session,
+            file=_upload("big.bin", b"x" * 65),
+            folder="appeal",
+            entity_id=uuid4(),
+        )
+    assert exc_info.value.status_code == 413
+
+    # Содержимое удаляется только вместе с последней ссылкой
+    session.delete(files[0])
+    released = release_files(session=session, files=[files[0]])
+    session.commit()
+    assert released.blobs == []
+    session.refresh(blob)
+    assert blob.ref_count == 1 and content_path.exists()
+
+    session.delete(files[1])
+    released = release_files(session=session, files=[files[1]])
+    session.commit()
+    assert released.blobs == [blob.sha256]
+    assert session.get(FileBlob, blob.sha256, populate_existing=True) is None
+    # До purge_released_files содержимое остается на месте
+    assert content_path.exists()
+    purge_released_files(session=session, released=released)
+    assert not content_path.exists()
+
+
+def test_release_keeps_content_on_rollback(session: Session, upload_dir: Path) -> None:
+    file = _save(session, "report.pdf", random_lower_string().encode())
+    content_path = upload_dir / blob_key(file.blob_sha256 or "")
+
+    session.delete(file)
+    release_files(session=session, files=[file])
+    session.rollback()
+
+    assert session.get(FileBlob, file.blob_sha256) is not None
+    assert content_path.exists()
+
+
+def test_purge_skips_blob_uploaded_again(session: Session, upload_dir: Path) -> None:
+    content = random_lower_string().encode()
+    file = _save(session, "report.pdf", content)
+    content_path = upload_dir / blob_key(file.blob_sha256 or "")
+
+    session.delete(file)
+    released = release_files(session=session, files=[file])
+    session.commit()
+    # Загрузка того же содержимого между коммитом и удалением из хранилища
+    _save(session, "copy.pdf", content)
+
+    purge_released_files(session=session, released=released)
+    assert content_path.read_bytes() == content
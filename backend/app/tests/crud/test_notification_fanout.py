@@ -0,0 +1,175 @@
+from collections.abc import Iterable
+from datetime import datetime
+
+import pytest
+from sqlmodel import Session, col, select
+
+from app.core.config import settings
+from app.cruds.appeal import update_appeals_status
+from app.cruds.appeal_stop_interval import (
+    create_appeal_stop_interval,
+    update_appeal_stop_interval,
+)
+from app.models.appeal import Appeal
+from app.models.appeal_status import AppealStatus
+from app.models.appeal_stop_interval import (
+    AppealStopIntervalCreate,
+    AppealStopIntervalUpdate,
+)
+from app.models.notification_outbox import NotificationOutbox
+from app.models.organization import Organization
+from app.models.region import Region
+from app.models.representative import Representative
+from app.models.user import User
+from app.tests.utils.appeal import create_random_appeal
+from app.tests.utils.utils import random_lower_string
+
+
+@pytest.fixture
+def fanout_session(session: Session, monkeypatch: pytest.MonkeyPatch) -> Session:
+    monkeypatch.setattr(settings, "SMTP_HOST", "smtp.example.com")
+    monkeypatch.setattr(settings, "EMAILS_FROM_EMAIL", "helpdesk@example.com")
+    return session
+
+
+@pytest.fixture
+def domain() -> str:
+    # Адреса теста не пересекаются с письмами, которые оставили другие тесты
+    return f"{random_lower_string()[:12]}.example.com"
+
+
+def _organization(session: Session, name: str, email: str) -> Organization:
+    region = Region(name=random_lower_string())
+    organization = Organization(name=name, email=email, region_id=region.id)
+    session.add_all([region, organization])
+    return organization
+
+
+def _member(
+    session: Session, organization: Organization, email: str, is_active: bool = True
+) -> User:
+    user = User(email=email, hashed_password="", is_active=is_active)
+    session.add(user)
+    session.add(
+        Representative(
+            user_id=user.id, organization_id=organization.id, surname="", name=""
+        )
+    )
+    return user
+
+
+def _emails(session: Session, domain: str) -> list[NotificationOutbox]:
+    emails = session.exec(
+        select(NotificationOutbox).where(NotificationOutbox.kind == "email.message")
+    ).all()
+    return [
+        email
+        for email in emails
+        if any(address.lower().endswith(domain) for address in email.payload["to"])
+    ]
+
+
+def _recipients(emails: Iterable[NotificationOutbox]) -> list[list[str]]:
+    return sorted(
+        sorted(address.lower() for address in email.payload["to"]) for email in emails
+    )
+
+
+def test_bulk_status_fanout_groups_recipients(
+    fanout_session: Session, domain: str
+) -> None:
+    session = fanout_session
+    old = AppealStatus(name=random_lower_string())
+    done = AppealStatus(name=random_lower_string())
+    org_a = _organization(session, "Alpha", f"alpha@{domain}")
+    org_b = _organization(session, "Beta", "")
+    session.add_all([old, done])
+    author_a = _member(session, org_a, f"author-a@{domain}")
+    # Совпадает с адресом организации с точностью до регистра
+    _member(session, org_a, f"Alpha@{domain.upper()}")
+    _member(session, org_a, f"gone@{domain}", is_active=False)
+    author_b = _member(session, org_b, f"author-b@{domain}")
+    first = create_random_appeal(
+        session, author_a, old, commit=False, subject="<b>Printer</b>"
+    )
+    second = create_random_appeal(
+        session, author_a, old, commit=False, subject="Network"
+    )
+    third = create_random_appeal(session, author_b, old, commit=False, subject="Mail")
+    unchanged = create_random_appeal(
+        session, author_b, done, commit=False, subject="Already done"
+    )
+    session.commit()
+    appeal_ids = [first.id, second.id, third.id, unchanged.id]
+
+    result = update_appeals_status(session=session, appeal_ids=appeal_ids, status=done)
+
+    assert set(result.updated) == {first.id, second.id, third.id}
+    statuses = session.exec(
+        select(Appeal.status_id).where(col(Appeal.id).in_(appeal_ids))
+    )
+    assert set(statuses.all()) == {done.id}
+    emails = _emails(session, domain)
+    assert result.notifications == len(emails) == 2
+    # Одно письмо на группу получателей с одинаковыми обращениями
+    assert _recipients(emails) == [
+        [f"alpha@{domain}", f"author-a@{domain}"],
+        [f"author-b@{domain}"],
+    ]
+    html = next(
+        e.payload["html"] for e in emails if f"author-b@{domain}" in e.payload["to"]
+    )
+    assert "Mail" in html and "Network" not in html
+    alpha_html = next(e.payload["html"] for e in emails if len(e.payload["to"]) == 2)
+    assert "&lt;b&gt;Printer&lt;/b&gt;" in alpha_html
+    bot_updates = session.exec(
+        select(NotificationOutbox).where(
+            NotificationOutbox.kind == "bot.appeal_updated",
+            NotificationOutbox.payload["appeal_id"]
+            .as_string()
+            .in_([str(appeal_id) for appeal_id in appeal_ids]),
+        )
+    ).all()
+    assert len(bot_updates) == 3
+
+
+def test_stop_interval_open_and_close_notify_recipients(
+    fanout_session: Session, domain: str
+) -> None:
+    session = fanout_session
+    status = AppealStatus(name=random_lower_string())
+    organization = _organization(session, "Alpha", f"alpha@{domain}")
+    session.add(status)
+    author = _member(session, organization, f"author@{domain}")
+    appeal = create_random_appeal(
+        session, author, status, commit=False, subject="Printer"
+    )
+    session.commit()
+
+    interval = create_appeal_stop_interval(
+        session=session,
+        interval_in=AppealStopIntervalCreate(
+            appeal_id=appeal.id, start_dt=datetime(2024, 3, 1, 9)
+        ),
+    )
+    [opened] = _emails(session, domain)
+    assert _recipients([opened]) == [[f"alpha@{domain}", f"author@{domain}"]]
+    assert "приостановлена" in opened.payload["subject"]
+    assert "01.03.2024 09:00" in opened.payload["html"]
+
+    # Изменение без даты окончания интервал не закрывает
+    update_appeal_stop_interval(
+        session=session,
+        db_interval=interval,
+        interval_in=AppealStopIntervalUpdate(description="Ждем запчасти"),
+    )
+    assert len(_emails(session, domain)) == 1
+
+    update_appeal_stop_interval(
+        session=session,
+        db_interval=interval,
+        interval_in=AppealStopIntervalUpdate(end_dt=datetime(2024, 3, 4, 18)),
+    )
+    [closed] = [e for e in _emails(session, domain) if e.id != opened.id]
+    assert "возобновляется" in closed.payload["subject"]
+    assert "04.03.2024 18:00" in closed.payload["html"]
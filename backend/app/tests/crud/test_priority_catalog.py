@@ -0,0 +1,101 @@
+from collections.abc import Generator
+from datetime import date
+from typing import Any
+from uuid import UUID, uuid4
+
+import pytest
+from sqlmodel import Session
+
+from app.core.priority_catalog import priority_catalog_cache
+from app.cruds.contract import create_contract
+from app.cruds.priority import (
+    create_individual_priority,
+    create_standard_priority,
+    update_standard_priority,
+)
+from app.cruds.priority_catalog import get_priority_catalog
+from app.models.contract import Contract, ContractCreate
+from app.models.organization import Organization
+from app.models.priority import BasePriorityBase
+from app.tests.utils.appeal import create_random_organization
+from app.tests.utils.utils import random_lower_string
+
+
+@pytest.fixture
+def catalog_session(session: Session) -> Generator[Session, None, None]:
+    priority_catalog_cache.clear()
+    yield session
+    priority_catalog_cache.clear()
+
+
+def _contract(
+    session: Session,
+    organization: Organization,
+    priority_ids: list[UUID],
+    **kwargs: Any,
+) -> Contract:
+    return create_contract(
+        session=session,
+        contract_in=ContractCreate(
+            organization_id=organization.id,
+            start_dt=date(2024, 1, 1),
+            end_dt=kwargs.pop("end_dt", date(2025, 1, 1)),
+            type_priorities="standard",
+            **kwargs,
+        ),
+        standard_priority_ids=priority_ids,
+    )
+
+
+def test_priority_catalog_overrides_and_invalidation(catalog_session: Session) -> None:
+    session = catalog_session
+    organization = create_random_organization(session)
+    # Названия стандартных приоритетов уникальны во всей БД
+    low_name, high_name = random_lower_string(), random_lower_string()
+    low = create_standard_priority(
+        session=session, priority_in=BasePriorityBase(name=low_name, hours=72)
+    )
+    high = create_standard_priority(
+        session=session, priority_in=BasePriorityBase(name=high_name, hours=8)
+    )
+    _contract(session, organization, [low.id], end_dt=date(2024, 6, 1))
+    contract = _contract(session, organization, [low.id, high.id])
+
+    catalog = get_priority_catalog(session=session, organization_id=organization.id)
+    assert {name: p.hours for name, p in catalog.items()} == {
+        low_name: 72,
+        high_name: 8,
+    }
+    assert catalog[high_name].standard_priority_id == high.id
+
+    # Индивидуальный приоритет перекрывает стандартный с тем же названием
+    individual = create_individual_priority(
+        session=session,
+        priority_in=BasePriorityBase(name=high_name, hours=4),
+        contract_id=contract.id,
+    )
+    catalog = get_priority_catalog(session=session, organization_id=organization.id)
+    assert catalog[high_name].hours == 4
+    assert catalog[high_name].individual_priority_id == individual.id
+    assert catalog[high_name].standard_priority_id is None
+
+    update_standard_priority(
+        session=session,
+        db_priority=low,
+        priority_in=BasePriorityBase(name=low_name, hours=48),
+    )
+    catalog = get_priority_catalog(session=session, organization_id=organization.id)
+    assert catalog[low_name].hours == 48
+    # Повторное обращение обслуживается кэшем
+    assert (
+        get_priority_catalog(session=session, organization_id=organization.id)
+        is catalog
+    )
+
+
+def test_priority_catalog_without_actual_contract(catalog_session: Session) -> None:
+    organization_id = uuid4()
+    assert (
+        get_priority_catalog(session=catalog_session, organization_id=organization_id)
+        == {}
+    )
@@ -0,0 +1,122 @@
+import json
+from collections.abc import Iterator
+from datetime import datetime
+from typing import Any
+from uuid import uuid4
+
+import pytest
+from sqlmodel import Session, select
+
+from app.core.pagination import CursorParams, _keyset_statement, encode_cursor
+from app.core.principal import Principal
+from app.cruds.access import _access_statement, appeal_child_scope
+from app.cruds.appeal import APPEAL_SORT_KEYS, _scoped_appeals_query
+from app.cruds.appeal_stop_interval import _active_statement, _paused_statement
+from app.cruds.comment import COMMENT_SORT_KEYS
+from app.cruds.principal import _principal_statement
+from app.cruds.task import TASK_SORT_KEYS
+from app.models.appeal_status import AppealStatus
+from app.models.appeal_stop_interval import AppealStopInterval
+from app.models.comment import Comment
+from app.models.representative import Representative
+from app.models.task import Task
+
+USER_ID = uuid4()
+REPRESENTATIVE = Principal(
+    id=USER_ID, is_active=True, is_superuser=False, organization_id=uuid4()
+)
+SPECIALIST = Principal(
+    id=USER_ID,
+    is_active=True,
+    is_superuser=False,
+    controlled_organization_ids=[uuid4()],
+)
+SUPERUSER = Principal(id=USER_ID, is_active=True, is_superuser=True)
+
+
+def _next_page(keys: Any, values: list[Any]) -> CursorParams:
+    return CursorParams(cursor=encode_cursor(keys, values, "next"), limit=20)
+
+
+def _keyset(query: Any, keys: Any, params: CursorParams) -> Any:
+    return _keyset_statement(query, keys, params)[0]
+
+
+# Запросы crud-функций, которые выполняются на каждый просмотр страницы
+HOT_QUERIES = {
+    "principal": _principal_statement(USER_ID),
+    "appeal_access": _access_statement(REPRESENTATIVE, uuid4()),
+    "appeals_superuser_page": _keyset(
+        _scoped_appeals_query(SUPERUSER),
+        APPEAL_SORT_KEYS,
+        _next_page(APPEAL_SORT_KEYS, [datetime(2024, 1, 1), uuid4()]),
+    ),
+    "appeals_representative": _keyset(
+        _scoped_appeals_query(REPRESENTATIVE), APPEAL_SORT_KEYS, CursorParams()
+    ),
+    "appeals_specialist": _keyset(
+        _scoped_appeals_query(SPECIALIST), APPEAL_SORT_KEYS, CursorParams()
+    ),
+    "appeal_comments_page": _keyset(
+        select(Comment).where(Comment.appeal_id == uuid4()),
+        COMMENT_SORT_KEYS,
+        _next_page(COMMENT_SORT_KEYS, [datetime(2024, 1, 1), uuid4()]),
+    ),
+    "tasks_scoped": _keyset(
+        select(Task).where(appeal_child_scope(Task.appeal_id, SPECIALIST)),
+        TASK_SORT_KEYS,
+        CursorParams(),
+    ),
+    "user_tasks": select(Task).where(Task.user_id == USER_ID),
+    "representative_by_user": select(Representative).where(
+        Representative.user_id == USER_ID
+    ),
+    "organization_representatives": select(Representative).where(
+        Representative.organization_id == uuid4()
+    ),
+    "appeal_stop_intervals": select(AppealStopInterval).where(
+        AppealStopInterval.appeal_id == uuid4()
+    ),
+    "appeal_status_by_name": select(AppealStatus).where(AppealStatus.name == "New"),
+    "active_stop_intervals": _active_statement(None),
+    "paused_appeals": _paused_statement([uuid4() for _ in range(50)], None),
+}
+
+
+def _plan_nodes(plan: dict[str, Any]) -> Iterator[dict[str, Any]]:
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from _plan_nodes(child)
+
+
+@pytest.mark.parametrize("name", sorted(HOT_QUERIES))
+def test_hot_query_uses_indexes(db: Session, name: str) -> None:
+    """
+    Запрещаем планировщику последовательное чтение: если подходящего
+    индекса нет, он все равно выберет Seq Scan, и тест это поймает
+    """
+    bind = db.get_bind()
+    if bind.dialect.name != "postgresql":
+        pytest.skip("EXPLAIN checks require PostgreSQL")
+
+    # Списки IN раскрываются в параметры, заглушку POSTCOMPILE драйвер не знает
+    compiled = HOT_QUERIES[name].compile(
+        dialect=bind.dialect, compile_kwargs={"render_postcompile": True}
+    )
+    connection = db.connection()
+    try:
+        connection.exec_driver_sql("SET LOCAL enable_seqscan = off")
+        plan = connection.exec_driver_sql(
+            f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params
+        ).scalar_one()
+    finally:
+        db.rollback()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+
+    seq_scans = [
+        node.get("Relation Name")
+        for node in _plan_nodes(plan[0]["Plan"])
+        if node["Node Type"] == "Seq Scan"
+    ]
+    assert not seq_scans, f"{name}: sequential scan on {seq_scans}"
@@ -0,0 +1,151 @@
+from datetime import date, datetime, timedelta
+
+from sqlmodel import Session
+
+from app.cruds.appeal_stop_interval import (
+    create_appeal_stop_interval,
+    update_appeal_stop_interval,
+)
+from app.cruds.priority import update_individual_priority, update_standard_priority
+from app.cruds.sla import get_breaching_appeals, refresh_appeals_sla
+from app.models.appeal import Appeal
+from app.models.appeal_status import AppealStatus
+from app.models.appeal_stop_interval import (
+    AppealStopIntervalCreate,
+    AppealStopIntervalUpdate,
+)
+from app.models.contract import Contract
+from app.models.priority import (
+    BasePriorityBase,
+    IndividualPriority,
+    StandardPriority,
+)
+from app.tests.utils.appeal import (
+    create_random_organization,
+    create_random_representative,
+)
+from app.tests.utils.utils import random_lower_string
+
+OPENED = datetime(2025, 3, 3, 9, 0)
+
+
+def test_sla_follows_priority_and_stop_intervals(session: Session) -> None:
+    organization = create_random_organization(session)
+    author = create_random_representative(session, organization)
+    status = AppealStatus(name=random_lower_string())
+    name = random_lower_string()
+    high = StandardPriority(name=name, hours=4)
+    contract = Contract(
+        organization_id=organization.id,
+        start_dt=date(2025, 1, 1),
+        end_dt=date(2026, 1, 1),
+        type_priorities="individual",
+    )
+    individual = IndividualPriority(name=name, hours=2, contract_id=contract.id)
+    session.add_all([status, high, contract, individual])
+    by_name = Appeal(user_id=author.id, status_id=status.id, priority=name, dt=OPENED)
+    by_contract = Appeal(
+        user_id=author.id,
+        status_id=status.id,
+        priority=name,
+        dt=OPENED,
+        standard_priority_id=high.id,
+        individual_priority_id=individual.id,
+    )
+    unknown = Appeal(user_id=author.id, status_id=status.id, priority="?", dt=OPENED)
+    session.add_all([by_name, by_contract, unknown])
+    session.flush()
+    refresh_appeals_sla(
+        session=session, appeal_ids=[by_name.id, by_contract.id, unknown.id]
+    )
+    session.commit()
+
+    assert by_name.sla_deadline == OPENED + timedelta(hours=4)
+    assert by_contract.sla_deadline == OPENED + timedelta(hours=2)
+    assert unknown.sla_hours is None and unknown.sla_deadline is None
+
+    # Открытая остановка снимает обращение с контроля срока
+    interval = create_appeal_stop_interval(
+        session=session,
+        interval_in=AppealStopIntervalCreate(
+            appeal_id=by_name.id, start_dt=OPENED + timedelta(hours=1)
+        ),
+    )
+    assert by_name.sla_deadline is None
+    assert by_name.get_sla_state().remaining(datetime.utcnow()) == timedelta(hours=3)
+
+    update_appeal_stop_interval(
+        session=session,
+        db_interval=interval,
+        interval_in=AppealStopIntervalUpdate(end_dt=OPENED + timedelta(hours=2)),
+    )
+    assert by_name.sla_deadline == OPENED + timedelta(hours=5)
+
+    breaching = get_breaching_appeals(
+        session=session, now=OPENED + timedelta(hours=1), within=timedelta(hours=1)
+    )
+    ours = {by_name.id, by_contract.id, unknown.id}
+    assert [appeal.id for appeal in breaching if appeal.id in ours] == [by_contract.id]
+
+
+def test_priority_update_refreshes_open_appeals(session: Session) -> None:
+    organization = create_random_organization(session)
+    author = create_random_representative(session, organization)
+    status = AppealStatus(name=random_lower_string())
+    name = random_lower_string()
+    standard = StandardPriority(name=name, hours=4)
+    contract = Contract(
+        organization_id=organization.id,
+        start_dt=date(2025, 1, 1),
+        end_dt=date(2026, 1, 1),
+        type_priorities="individual",
+    )
+    individual = IndividualPriority(name=name, hours=2, contract_id=contract.id)
+    session.add_all([status, standard, contract, individual])
+    by_name = Appeal(user_id=author.id, status_id=status.id, priority=name, dt=OPENED)
+    by_individual = Appeal(
+        user_id=author.id,
+        status_id=status.id,
+        priority=name,
+        dt=OPENED,
+        individual_priority_id=individual.id,
+    )
+    closed = Appeal(
+        user_id=author.id,
+        status_id=status.id,
+        priority=name,
+        dt=OPENED,
+        actual_date=OPENED + timedelta(hours=1),
+    )
+    session.add_all([by_name, by_individual, closed])
+    session.flush()
+    refresh_appeals_sla(
+        session=session, appeal_ids=[by_name.id, by_individual.id, closed.id]
+    )
+    session.commit()
+    assert by_name.sla_deadline == OPENED + timedelta(hours=4)
+
+    update_standard_priority(
+        session=session,
+        db_priority=standard,
+        priority_in=BasePriorityBase(name=name, hours=8),
+    )
+    assert by_name.sla_hours == 8
+    assert by_name.sla_deadline == OPENED + timedelta(hours=8)
+    # Закрытые обращения не пересчитываются
+    assert closed.sla_hours == 4
+
+    update_individual_priority(
+        session=session,
+        db_priority=individual,
+        priority_in=BasePriorityBase(name=name, hours=1),
+    )
+    assert by_individual.sla_deadline == OPENED + timedelta(hours=1)
+
+    # После переименования обращение больше не находит норматив по названию
+    update_standard_priority(
+        session=session,
+        db_priority=standard,
+        priority_in=BasePriorityBase(name=random_lower_string(), hours=8),
+    )
+    assert by_name.sla_hours is None and by_name.sla_deadline is None
@@ -0,0 +1,72 @@
+from typing import Any
+
+from sqlmodel import Session, select
+
+from app.cruds.user import create_user
+from app.models.appeal import Appeal
+from app.models.appeal_status import AppealStatus
+from app.models.organization import Organization
+from app.models.region import Region
+from app.models.representative import Representative
+from app.models.user import User, UserCreate
+from app.tests.utils.utils import random_email, random_lower_string
+
+
+def get_default_status(db: Session) -> AppealStatus:
+    status = db.exec(select(AppealStatus).where(AppealStatus.name == "New")).one()
+    return status
+
+
+def create_random_organization(db: Session) -> Organization:
+    region = Region(name=random_lower_string())
+    organization = Organization(
+        name=random_lower_string(), email=random_email(), region_id=region.id
+    )
+    db.add_all([region, organization])
+    db.commit()
+    db.refresh(organization)
+    return organization
+
+
+def create_random_representative(
+    db: Session, organization: Organization, password: str | None = None
+) -> User:
+    user = create_user(
+        session=db,
+        user_create=UserCreate(
+            email=random_email(), password=password or random_lower_string()
+        ),
+    )
+    db.add(
+        Representative(
+            user_id=user.id,
+            organization_id=organization.id,
+            surname=random_lower_string(),
+            name=random_lower_string(),
+        )
+    )
+    db.commit()
+    return user
+
+
+def create_random_appeal(
+    db: Session,
+    user: User,
+    status: AppealStatus | None = None,
+    *,
+    commit: bool = True,
+    **kwargs: Any,
+) -> Appeal:
+    fields = {
+        "priority": random_lower_string(),
+        "subject": random_lower_string()[:20],
+        **kwargs,
+    }
+    appeal = Appeal(
+        user_id=user.id, status_id=(status or get_default_status(db)).id, **fields
+    )
+    db.add(appeal)
+    if commit:
+        db.commit()
+        db.refresh(appeal)
+    return appeal
@@ -0,0 +1,87 @@
+from collections.abc import Sequence
+from datetime import datetime, timedelta
+from typing import Any
+
+from sqlmodel import Session, select
+
+from app.core.sla import DeadlineHeap
+from app.models.appeal import Appeal
+from app.models.notification_outbox import NotificationOutbox
+from app.models.user import User
+from app.tests.utils.appeal import (
+    create_random_appeal,
+    create_random_organization,
+    create_random_representative,
+)
+from app.utils.breach_watch import emit_due, load_window, reload_appeals
+
+NOW = datetime(2025, 3, 3, 12, 0)
+# Окно загрузки узкое: сроки обращений других тестов в него не попадают
+SINCE = NOW - timedelta(days=1)
+UNTIL = NOW + timedelta(days=1)
+
+
+def _appeal(
+    session: Session, user: User, deadline: datetime | None, **kwargs: Any
+) -> Appeal:
+    return create_random_appeal(
+        session,
+        user,
+        commit=False,
+        priority="High",
+        sla_hours=4,
+        sla_deadline=deadline,
+        **kwargs,
+    )
+
+
+def _kinds(session: Session, appeals: Sequence[Appeal]) -> list[tuple[str, str]]:
+    statement = select(NotificationOutbox).where(
+        NotificationOutbox.payload["appeal_id"]
+        .as_string()
+        .in_([str(appeal.id) for appeal in appeals])
+    )
+    return sorted(
+        (n.kind, n.payload["appeal_id"]) for n in session.exec(statement).all()
+    )
+
+
+def test_emit_due_notifies_once_per_deadline(session: Session) -> None:
+    user = create_random_representative(session, create_random_organization(session))
+    soon = _appeal(session, user, NOW + timedelta(minutes=30))
+    overdue = _appeal(session, user, NOW - timedelta(minutes=5))
+    closed = _appeal(session, user, NOW - timedelta(minutes=5), actual_date=NOW)
+    later = _appeal(session, user, NOW + timedelta(days=3))
+    session.commit()
+    appeals = [soon, overdue, closed, later]
+
+    heap = DeadlineHeap(warning=timedelta(hours=1))
+    load_window(session=session, heap=heap, since=SINCE, until=UNTIL)
+    assert len(heap) == 2
+
+    assert emit_due(session=session, heap=heap, now=NOW) == 2
+    assert _kinds(session, appeals) == sorted(
+        [
+            ("email.appeal_sla_warning", str(soon.id)),
+            ("email.appeal_sla_breached", str(overdue.id)),
+        ]
+    )
+    assert soon.sla_warned_deadline == soon.sla_deadline
+    assert overdue.sla_breached_deadline == overdue.sla_deadline
+
+    # После перезапуска уже отправленное не повторяется
+    restarted = DeadlineHeap(warning=timedelta(hours=1))
+    load_window(session=session, heap=restarted, since=SINCE, until=UNTIL)
+    assert emit_due(session=session, heap=restarted, now=NOW) == 0
+
+    # Срок перенесли: обращение перечитывается и предупреждается заново
+    soon.sla_deadline = NOW + timedelta(minutes=45)
+    session.commit()
+    reload_appeals(
+        session=session,
+        heap=restarted,
+        appeal_ids=[soon.id, closed.id, later.id],
+        until=UNTIL,
+    )
+    assert emit_due(session=session, heap=restarted, now=NOW) == 1
+    assert len(restarted) == 1
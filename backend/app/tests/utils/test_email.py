@@ -0,0 +1,22 @@
+import smtplib
+from concurrent.futures import Future
+from typing import Any
+
+import pytest
+
+from app.utils import email
+
+
+def test_send_email_logs_delivery_failure(
+    monkeypatch: pytest.MonkeyPatch, caplog: pytest.LogCaptureFixture
+) -> None:
+    def submit_email(**_kwargs: Any) -> Future[None]:
+        future: Future[None] = Future()
+        future.set_exception(smtplib.SMTPServerDisconnected("Connection closed"))
+        return future
+
+    monkeypatch.setattr(email, "submit_email", submit_email)
+
+    # Прямые вызовы не прерываются ошибкой доставки, она попадает в лог
+    email.send_email(email_to="user@example.com", subject="Test")
+    assert "failed to send email to user@example.com" in caplog.text
@@ -0,0 +1,90 @@
+from collections.abc import Generator
+from concurrent.futures import Future
+from datetime import datetime
+from typing import Any
+
+import pytest
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from app.core.config import settings
+from app.cruds.notification_outbox import enqueue_notification
+from app.models.notification_outbox import NotificationOutbox
+from app.utils import outbox
+
+
+@pytest.fixture
+def session() -> Generator[Session, None, None]:
+    engine = create_engine("sqlite://")
+    SQLModel.metadata.create_all(engine, tables=[NotificationOutbox.__table__])  # type: ignore[attr-defined]
+    with Session(engine) as session:
+        yield session
+
+
+def test_dispatch_batch_sends_and_retries_with_backoff(
+    session: Session, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    sent: list[dict[str, Any]] = []
+
+    def flaky(_session: Session, payload: dict[str, Any]) -> None:
+        if payload["fail"]:
+            raise ConnectionError("SMTP is down")
+        sent.append(payload)
+
+    monkeypatch.setitem(outbox.OUTBOX_HANDLERS, "test.flaky", flaky)
+    monkeypatch.setattr(settings, "OUTBOX_MAX_ATTEMPTS", 2)
+    enqueue_notification(session=session, kind="test.flaky", payload={"fail": False})
+    failing = enqueue_notification(
+        session=session, kind="test.flaky", payload={"fail": True}
+    )
+    session.commit()
+
+    assert outbox.dispatch_batch(session=session) == 2
+    # Отправленное удаляется, неудачное откладывается с задержкой
+    assert sent == [{"fail": False}]
+    pending = session.exec(select(NotificationOutbox)).one()
+    assert pending.id == failing.id
+    assert pending.attempts == 1 and pending.status == "pending"
+    assert pending.last_error == "ConnectionError: SMTP is down"
+    assert pending.available_at > datetime.utcnow()
+    assert outbox.dispatch_batch(session=session) == 0
+
+    # После OUTBOX_MAX_ATTEMPTS попыток уведомление больше не берется
+    pending.available_at = datetime.utcnow()
+    session.commit()
+    assert outbox.dispatch_batch(session=session) == 1
+    assert pending.status == "failed" and pending.attempts == 2
+    assert outbox.dispatch_batch(session=session) == 0
+
+
+def test_retry_delay_is_capped(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, "OUTBOX_RETRY_BASE_SECONDS", 10)
+    monkeypatch.setattr(settings, "OUTBOX_RETRY_MAX_SECONDS", 60)
+    assert [outbox.retry_delay(n).seconds for n in (1, 2, 3, 4)] == [10, 20, 40, 60]
+
+
+def test_email_message_retries_only_failed_recipients(
+    session: Session, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    def submit_email(*, email_to: str, **_kwargs: Any) -> Future[None]:
+        future: Future[None] = Future()
+        if email_to == "down@example.com":
+            future.set_exception(ConnectionError("mailbox unavailable"))
+        else:
+            future.set_result(None)
+        return future
+
+    monkeypatch.setattr(outbox, "submit_email", submit_email)
+    notification = enqueue_notification(
+        session=session,
+        kind="email.message",
+        payload={
+            "to": ["ok@example.com", "down@example.com"],
+            "subject": "Subject",
+            "html": "<p>Body</p>",
+        },
+    )
+    session.commit()
+
+    assert outbox.dispatch_batch(session=session) == 1
+    assert notification.attempts == 1
+    assert notification.payload["to"] == ["down@example.com"]
@@ -0,0 +1,89 @@
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any
+
+import pytest
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.models.appeal import Appeal
+from app.models.appeal_status import AppealStatus
+from app.models.organization import Organization
+from app.models.region import Region
+from app.models.report import ReportJobCreate
+from app.models.representative import Representative
+from app.models.user import User
+from app.tests.utils.utils import random_email, random_lower_string
+from app.utils import report_jobs
+from app.utils.report_jobs import (
+    build_report_artifact,
+    read_report_job,
+    report_artifact_path,
+    submit_report_job,
+)
+
+
+class _RecordingPool:
+    def __init__(self) -> None:
+        self.submitted: list[tuple[Any, ...]] = []
+
+    def submit(self, fn: Any, *args: Any) -> None:
+        self.submitted.append((fn, *args))
+
+
+def test_report_job_reuses_artifact_until_data_changes(
+    session: Session, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path))
+    pool = _RecordingPool()
+    monkeypatch.setattr(report_jobs, "get_process_pool", lambda: pool)
+
+    region = Region(name=random_lower_string())
+    organization = Organization(name="ООО Ромашка", region_id=region.id)
+    author = User(email=random_email(), hashed_password="x")
+    status = AppealStatus(name=random_lower_string())
+    session.add_all([region, organization, author, status])
+    session.add(
+        Representative(
+            user_id=author.id,
+            organization_id=organization.id,
+            surname="Иванов",
+            name="Иван",
+        )
+    )
+    appeal = Appeal(
+        user_id=author.id,
+        status_id=status.id,
+        priority="Высокий",
+        description="Обращение",
+        dt=datetime(2024, 1, 10, 12),
+    )
+    session.add(appeal)
+    session.commit()
+
+    job_in = ReportJobCreate(
+        organization_id=organization.id,
+        date_from=date(2024, 1, 1),
+        date_to=date(2024, 1, 31),
+    )
+    job = submit_report_job(session=session, job_in=job_in)
+    assert job.status == "queued"
+    assert len(pool.submitted) == 1
+
+    # Процесс пула: генерируем файл в этом же процессе
+    done = build_report_artifact(session=session, job=job)
+    assert done.status == "done"
+    assert report_artifact_path(done).stat().st_size == done.size
+    assert read_report_job(job.id) == done
+
+    # Повторный запрос по тем же данным отдает готовый файл
+    assert submit_report_job(session=session, job_in=job_in) == done
+    assert len(pool.submitted) == 1
+
+    # Изменение обращения из периода меняет версию данных
+    appeal.solving = "Решено"
+    session.add(appeal)
+    session.commit()
+    changed = submit_report_job(session=session, job_in=job_in)
+    assert changed.id != job.id and changed.status == "queued"
+    assert len(pool.submitted) == 2
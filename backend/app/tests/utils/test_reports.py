@@ -0,0 +1,102 @@
+import csv
+import io
+import zipfile
+from datetime import date, datetime
+from typing import Any
+from uuid import UUID
+
+import pyarrow.parquet as pq  # type: ignore[import-untyped]
+import pytest
+from sqlmodel import Session
+
+from app.models.appeal import Appeal
+from app.models.appeal_status import AppealStatus
+from app.models.organization import Organization
+from app.models.region import Region
+from app.models.representative import Representative
+from app.models.user import User
+from app.tests.utils.utils import random_email, random_lower_string
+from app.utils.reports import (
+    REPORT_ARROW_SCHEMA,
+    REPORT_COLUMNS,
+    generate_organization_report,
+)
+
+
+@pytest.fixture
+def report_data(session: Session) -> tuple[Session, UUID]:
+    """Организация с обращениями 1, 15 и 31 января 2024"""
+    region = Region(name=random_lower_string())
+    organization = Organization(name="ООО Ромашка", region_id=region.id)
+    author = User(email=random_email(), hashed_password="x")
+    status = AppealStatus(name=random_lower_string(), name_rus="Новое")
+    session.add_all([region, organization, author, status])
+    session.add(
+        Representative(
+            user_id=author.id,
+            organization_id=organization.id,
+            surname="Иванов",
+            name="Иван",
+        )
+    )
+    for day in (1, 15, 31):
+        session.add(
+            Appeal(
+                user_id=author.id,
+                status_id=status.id,
+                priority="Высокий",
+                description=f"Обращение {day}",
+                dt=datetime(2024, 1, day, 12),
+            )
+        )
+    session.commit()
+    return session, organization.id
+
+
+def test_generate_organization_report_streams_flat_rows(
+    report_data: tuple[Session, UUID],
+) -> None:
+    session, organization_id = report_data
+    file = generate_organization_report(
+        session=session,
+        organization_id=organization_id,
+        date_from=date(2024, 1, 1),
+        date_to=date(2024, 1, 15),
+    )
+
+    with zipfile.ZipFile(file) as archive:
+        # В режиме constant_memory строки пишутся прямо в лист (inline)
+        sheet = archive.read("xl/worksheets/sheet1.xml").decode()
+
+    # Заголовок и две строки за период, обращение 31 января не попадает
+    assert sheet.count("<row ") == 3
+    assert "Обращение 15" in sheet and "Обращение 31" not in sheet
+    assert "Новое" in sheet and "ООО Ромашка" in sheet
+    assert all(column.title in sheet for column in REPORT_COLUMNS)
+
+
+def test_generate_organization_report_csv_and_parquet(
+    report_data: tuple[Session, UUID],
+) -> None:
+    session, organization_id = report_data
+    period: dict[str, Any] = {
+        "session": session,
+        "organization_id": organization_id,
+        "date_from": date(2024, 1, 1),
+        "date_to": date(2024, 1, 15),
+    }
+
+    with generate_organization_report(**period, format="csv") as file:
+        lines = list(csv.reader(io.TextIOWrapper(file, encoding="utf-8")))
+    assert lines[0] == [column.title for column in REPORT_COLUMNS]
+    assert [line[5] for line in lines[1:]] == ["Обращение 1", "Обращение 15"]
+    assert lines[1][6] == "2024-01-01 12:00:00"
+
+    with generate_organization_report(**period, format="parquet") as file:
+        table = pq.read_table(file)
+    assert table.schema == REPORT_ARROW_SCHEMA
+    assert table.column("Описание обращения").to_pylist() == [
+        "Обращение 1",
+        "Обращение 15",
+    ]
+    assert table.column("Дата создания")[0].as_py() == datetime(2024, 1, 1, 12)
@@ -0,0 +1,226 @@
+"""
+Контроль сроков решения: отдельный процесс, уведомляющий о приближении и
+нарушении сроков обращений
+
+Ближайшие сроки держатся в памяти (DeadlineHeap), процесс спит до ближайшего
+срабатывания. Об изменении сроков (app.cruds.sla.refresh_appeals_sla) он
+узнает через LISTEN/NOTIFY и перечитывает только изменившиеся обращения.
+Уведомления ставятся в outbox, отправляет их app.utils.outbox. LISTEN
+требует прямого соединения с Postgres, не через PgBouncer в режиме
+transaction.
+
+Запуск: python -m app.utils.breach_watch
+"""
+
+import logging
+from collections.abc import Iterable
+from datetime import datetime, timedelta
+from typing import Any
+from uuid import UUID
+
+from sqlmodel import Session, col, select
+
+from app.core.config import settings
+from app.core.db import engine
+from app.core.sla import DeadlineHeap, SlaAlarm
+from app.cruds.notification_outbox import enqueue_appeal_notifications
+from app.cruds.sla import SLA_CHANNEL
+from app.models.appeal import Appeal
+
+logger = logging.getLogger(__name__)
+
+
+def _watch_columns() -> Any:
+    return select(
+        Appeal.id,
+        Appeal.sla_deadline,
+        Appeal.sla_warned_deadline,
+        Appeal.sla_breached_deadline,
+    )
+
+
+def _schedule(heap: DeadlineHeap, rows: Iterable[Any]) -> None:
+    for appeal_id, deadline, warned_deadline, breached_deadline in rows:
+        heap.schedule(
+            appeal_id,
+            deadline,
+            warned=deadline is not None and warned_deadline == deadline,
+            breached=deadline is not None and breached_deadline == deadline,
+        )
+
+
+def load_window(
+    *,
+    session: Session,
+    heap: DeadlineHeap,
+    until: datetime,
+    since: datetime | None = None,
+) -> None:
+    """
+    Добавляет в кучу открытые обращения со сроком до until (после since)
+
+    Диапазон по частичному индексу ix_appeal_open_sla_deadline.
+    """
+    statement = _watch_columns().where(
+        col(Appeal.actual_date).is_(None),
+        col(Appeal.sla_deadline).is_not(None),
+        col(Appeal.sla_deadline) <= until,
+    )
+    if since is not None:
+        statement = statement.where(col(Appeal.sla_deadline) > since)
+    _schedule(heap, session.exec(statement).all())
+
+
+def reload_appeals(
+    *,
+    session: Session,
+    heap: DeadlineHeap,
+    appeal_ids: Iterable[UUID],
+    until: datetime,
+) -> None:
+    """
+    Обновляет в куче сроки изменившихся обращений
+
+    Сроки позже until пока не отслеживаются: их добавит load_window, когда
+    до них дойдет окно.
+    """
+    rows = session.exec(
+        _watch_columns()
+        .add_columns(Appeal.actual_date)
+        .where(col(Appeal.id).in_(list(appeal_ids)))
+    ).all()
+    # Закрытые обращения и сроки за окном из кучи убираются
+    _schedule(
+        heap,
+        (
+            (
+                id_,
+                deadline
+                if actual_date is None and deadline and deadline <= until
+                else None,
+                warned,
+                breached,
+            )
+            for id_, deadline, warned, breached, actual_date in rows
+        ),
+    )
+
+
+def emit_due(*, session: Session, heap: DeadlineHeap, now: datetime) -> int:
+    """
+    Ставит в outbox уведомления по наступившим срабатываниям
+
+    Срок перепроверяется по заблокированной строке обращения: куча могла не
+    успеть узнать о закрытии или переносе срока. Отметка об отправке
+    фиксируется той же транзакцией, что и уведомление, поэтому после
+    перезапуска процесса уведомления не повторяются.
+    Возвращает количество уведомлений.
+    """
+    alarms = heap.pop_due(now)
+    if not alarms:
+        return 0
+    appeals = {
+        appeal.id: appeal
+        for appeal in session.exec(
+            select(Appeal)
+            .where(col(Appeal.id).in_({alarm.appeal_id for alarm in alarms}))
+            .with_for_update()
+        ).all()
+    }
+    emitted = 0
+    for alarm in alarms:
+        appeal = appeals.get(alarm.appeal_id)
+        if appeal is None or not _still_due(appeal, alarm):
+            continue
+        enqueue_appeal_notifications(
+            session=session,
+            event=alarm.event,
+            appeal=appeal,
+            deadline=alarm.deadline.isoformat(),
+        )
+        if alarm.event == "sla_breached":
+            appeal.sla_breached_deadline = alarm.deadline
+        else:
+            appeal.sla_warned_deadline = alarm.deadline
+        session.add(appeal)
+        emitted += 1
+    session.commit()
+    return emitted
+
+
+def _still_due(appeal: Appeal, alarm: SlaAlarm) -> bool:
+    if appeal.actual_date is not None:
+        return False
+    if appeal.sla_deadline != alarm.deadline:
+        return False
+    if alarm.event == "sla_breached":
+        return appeal.sla_breached_deadline != alarm.deadline
+    return appeal.sla_warned_deadline != alarm.deadline
+
+
+def _parse_ids(payload: str) -> set[UUID]:
+    return {UUID(value) for value in payload.split(",") if value}
+
+
+def _wait_for_changes(connection: Any, timeout: float) -> set[UUID]:
+    """Ждет NOTIFY не дольше timeout секунд; возвращает id обращений"""
+    appeal_ids: set[UUID] = set()
+    for notify in connection.notifies(timeout=timeout, stop_after=1):
+        appeal_ids |= _parse_ids(notify.payload)
+    if appeal_ids:
+        # Накопившиеся уведомления забираются без ожидания
+        for notify in connection.notifies(timeout=0):
+            appeal_ids |= _parse_ids(notify.payload)
+    return appeal_ids
+
+
+def run_watcher() -> None:
+    """Цикл контроля сроков; просыпается к ближайшему сроку или по NOTIFY"""
+    heap = DeadlineHeap(warning=timedelta(minutes=settings.SLA_NEAR_BREACH_MINUTES))
+    horizon = timedelta(minutes=settings.SLA_WATCH_HORIZON_MINUTES)
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as listener:
+        # Подписка раньше первой загрузки: изменения между ними не теряются
+        listener.exec_driver_sql(f"LISTEN {SLA_CHANNEL}")
+        notifications = listener.connection.driver_connection
+
+        now = datetime.utcnow()
+        loaded_until = now + horizon
+        with Session(engine) as session:
+            load_window(session=session, heap=heap, until=loaded_until)
+        logger.info("SLA watcher started, %d appeals scheduled", len(heap))
+
+        while True:
+            now = datetime.utcnow()
+            # Окно сдвигается, когда пройдена его половина
+            if loaded_until - now < horizon / 2:
+                with Session(engine) as session:
+                    load_window(
+                        session=session,
+                        heap=heap,
+                        since=loaded_until,
+                        until=now + horizon,
+                    )
+                loaded_until = now + horizon
+            with Session(engine) as session:
+                emitted = emit_due(session=session, heap=heap, now=now)
+            if emitted:
+                logger.info("SLA notifications queued: %d", emitted)
+
+            next_at = heap.next_at()
+            timeout = settings.SLA_WATCH_MAX_SLEEP_SECONDS
+            if next_at is not None:
+                timeout = min(timeout, (next_at - datetime.utcnow()).total_seconds())
+            changed = _wait_for_changes(notifications, max(timeout, 0))
+            if changed:
+                with Session(engine) as session:
+                    reload_appeals(
+                        session=session,
+                        heap=heap,
+                        appeal_ids=changed,
+                        until=loaded_until,
+                    )
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    run_watcher()
@@ -1,13 +1,14 @@
 import logging
+from concurrent.futures import Future
 from dataclasses import dataclass
-from pathlib import Path
+from datetime import datetime
+from email.message import EmailMessage
+from email.utils import formataddr
 from typing import Any
 
-import emails  # type: ignore
-from fastapi import BackgroundTasks
-from jinja2 import Template
-
 from app.core.config import settings
+from app.core.mailer import get_mailer
+from app.core.templates import get_email_templates
 from app.models.appeal import Appeal
 from app.models.organization import Organization
 
@@ -22,36 +23,56 @@ class EmailData:
 
 
 def render_email_template(*, template_name: str, context: dict[str, Any]) -> str:
-    template_str = (
-        Path(__file__).parent.parent / "email-templates" / "build" / template_name
-    ).read_text()
-    html_content = Template(template_str).render(context)
-    return html_content
+    return get_email_templates().render(template_name, context)
 
 
-def send_email(
+def build_email_message(
+    *, email_to: str, subject: str = "", html_content: str = ""
+) -> EmailMessage:
+    message = EmailMessage()
+    message["Subject"] = subject
+    message["From"] = formataddr(
+        (settings.EMAILS_FROM_NAME or "", settings.EMAILS_FROM_EMAIL or "")
+    )
+    message["To"] = email_to
+    message.set_content(html_content, subtype="html")
+    return message
+
+
+def submit_email(
     *,
     email_to: str,
     subject: str = "",
     html_content: str = "",
-) -> None:
+) -> Future[None]:
+    """Ставит письмо в очередь пула SMTP-соединений, не дожидаясь отправки"""
     assert settings.emails_enabled, "no provided configuration for email variables"
-    message = emails.Message(
-        subject=subject,
-        html=html_content,
-        mail_from=(settings.EMAILS_FROM_NAME, settings.EMAILS_FROM_EMAIL),
+    return get_mailer().submit(
+        build_email_message(
+            email_to=email_to, subject=subject, html_content=html_content
+        )
     )
-    smtp_options = {"host": settings.SMTP_HOST, "port": settings.SMTP_PORT}
-    if settings.SMTP_TLS:
-        smtp_options["tls"] = True
-    elif settings.SMTP_SSL:
-        smtp_options["ssl"] = True
-    if settings.SMTP_USER:
-        smtp_options["user"] = settings.SMTP_USER
-    if settings.SMTP_PASSWORD:
-        smtp_options["password"] = settings.SMTP_PASSWORD
-    response = message.send(to=email_to, smtp=smtp_options)
-    logger.info(f"send email result: {response}")
+
+
+def send_email(
+    *,
+    email_to: str,
+    subject: str = "",
+    html_content: str = "",
+) -> None:
+    """
+    Отправляет письмо и ждет результата
+
+    Ошибка доставки только логируется и не прерывает запрос; outbox
+    отправляет через submit_email и получает ошибку для повтора.
+    """
+    future = submit_email(email_to=email_to, subject=subject, html_content=html_content)
+    try:
+        future.result()
+    except Exception:
+        logger.exception(f"failed to send email to {email_to}")
+        return
+    logger.info(f"email sent to {email_to}")
 
 
 def generate_test_email(email_to: str) -> EmailData:
@@ -99,12 +120,41 @@ def generate_new_account_email(
     return EmailData(html_content=html_content, subject=subject)
 
 
-def send_new_appeal_email(*, appeal: Appeal, organization: Organization) -> None:
+def generate_appeal_sla_email(
+    *, appeal: Appeal, breached: bool, deadline: datetime
+) -> EmailData:
+    """Письмо ответственному о приближении или нарушении срока решения"""
+    title = "Нарушен срок решения" if breached else "Истекает срок решения"
+    representative = appeal.user.representative
+    html_content = render_email_template(
+        template_name="appeals_notice.html",
+        context={
+            "title": title,
+            "message": f"Срок решения: {deadline:%d.%m.%Y %H:%M} UTC",
+            "organizations": (
+                [representative.organization.name]
+                if representative and representative.organization
+                else []
+            ),
+            "appeals": [{"id": str(appeal.id), "subject": appeal.subject}],
+        },
+    )
+    return EmailData(
+        html_content=html_content,
+        subject=f"{settings.PROJECT_NAME} - {title} #{appeal.id}",
+    )
+
+
+def send_new_appeal_email(
+    *, appeal: Appeal, organization: Organization
+) -> Future[None] | None:
     """
     Отправка email о новом обращении
+
+    Письмо ставится в очередь пула SMTP; результат отправки - в Future.
     """
     if not settings.emails_enabled:
-        return
+        return None
 
     project_name = settings.PROJECT_NAME
     subject = f"{project_name} - Новое обращение #{appeal.id}"
@@ -113,10 +163,10 @@ def send_new_appeal_email(*, appeal: Appeal, organization: Organization) -> None
     context = {
         "project_name": project_name,
         "appeal_id": appeal.id,
-        "appeal_title": appeal.title,
+        "appeal_title": appeal.subject,
         "appeal_description": appeal.description,
         "organization_name": organization.name,
-        "created_at": appeal.created_at,
+        "created_at": appeal.dt,
         "link": f"{settings.FRONTEND_HOST}/appeals/{appeal.id}",
     }
 
@@ -127,32 +177,29 @@ def send_new_appeal_email(*, appeal: Appeal, organization: Organization) -> None
     )
 
     # Отправляем email
-    if organization.email:
-        send_email(
-            email_to=organization.email,
-            subject=subject,
-            html_content=html_content,
-        )
+    if not organization.email:
+        return None
+    return submit_email(
+        email_to=organization.email,
+        subject=subject,
+        html_content=html_content,
+    )
 
 
-def send_new_status_email(
-    background_tasks: BackgroundTasks,
-    appeal: Appeal,
-    old_status: str,
-    new_status: str,
-) -> None:
+def send_new_status_email(*, appeal: Appeal, old_status: str, new_status: str) -> None:
     """
     Отправляет email об изменении статуса обращения
     """
     if not settings.emails_enabled:
         return
 
-    # Используем background_tasks для асинхронной отправки
-    message = f"[MOCK] Отправка email об изменении статуса обращения {appeal.id} с {old_status} на {new_status}"
-    background_tasks.add_task(print, message)
+    logger.info(
+        f"[MOCK] Отправка email об изменении статуса обращения {appeal.id} "
+        f"с {old_status} на {new_status}"
+    )
 
 
-def send_new_status_appeal_email(appeal: Appeal) -> None:
+def send_new_status_appeal_email(*, appeal: Appeal) -> None:
     """
     Отправляет email об изменении статуса обращения
     """
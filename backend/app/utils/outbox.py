@@ -0,0 +1,333 @@
+"""
+Диспетчер уведомлений: отдельный процесс, разбирающий NotificationOutbox
+
+Запуск: python -m app.utils.outbox
+"""
+
+import logging
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Future
+from datetime import datetime, timedelta
+from typing import Any
+from uuid import UUID
+
+from sqlmodel import Session, col, select
+
+from app.core.config import settings
+from app.core.db import engine
+from app.core.mailer import get_mailer
+from app.core.templates import get_email_templates
+from app.cruds.loaders import loader_options
+from app.models.appeal import Appeal
+from app.models.appeal_status import AppealStatus
+from app.models.notification_outbox import NotificationOutbox
+from app.models.user import User
+from app.utils.bot import send_appeal_updated_message, send_new_appeal_message
+from app.utils.email import (
+    generate_appeal_sla_email,
+    send_new_appeal_email,
+    send_new_status_appeal_email,
+    send_new_status_email,
+    submit_email,
+)
+
+logger = logging.getLogger(__name__)
+
+# Обработчик либо отправляет уведомление сам, либо ставит письмо в пул SMTP
+# и возвращает Future: письма порции отправляются параллельно
+OutboxHandler = Callable[[Session, dict[str, Any]], Future[None] | None]
+
+# Как часто диспетчер пишет в лог метрики отправки писем
+METRICS_LOG_INTERVAL_SECONDS = 60
+
+
+def _appeal_handler(
+    send: Callable[[Session, Appeal, dict[str, Any]], Future[None] | None],
+) -> OutboxHandler:
+    """Обработчик уведомления об обращении из payload["appeal_id"]"""
+
+    def handler(session: Session, payload: dict[str, Any]) -> Future[None] | None:
+        appeal = session.get(
+            Appeal,
+            UUID(payload["appeal_id"]),
+            options=loader_options("appeal_notification"),
+        )
+        # Обращение удалено раньше, чем дошла очередь: уведомлять не о чем
+        if appeal is None:
+            return None
+        return send(session, appeal, payload)
+
+    return handler
+
+
+def _status_name(session: Session, status_id: str) -> str:
+    status = session.get(AppealStatus, UUID(status_id))
+    return status.name if status else status_id
+
+
+@_appeal_handler
+def _email_appeal_created(
+    _session: Session, appeal: Appeal, _payload: dict[str, Any]
+) -> Future[None] | None:
+    representative = appeal.user.representative
+    if not representative or not representative.organization:
+        return None
+    return send_new_appeal_email(
+        appeal=appeal, organization=representative.organization
+    )
+
+
+@_appeal_handler
+def _email_appeal_status_changed(
+    session: Session, appeal: Appeal, payload: dict[str, Any]
+) -> None:
+    send_new_status_email(
+        appeal=appeal,
+        old_status=_status_name(session, payload["old_status_id"]),
+        new_status=_status_name(session, payload["new_status_id"]),
+    )
+
+
+@_appeal_handler
+def _email_appeal_closed(
+    _session: Session, appeal: Appeal, _payload: dict[str, Any]
+) -> None:
+    send_new_status_appeal_email(appeal=appeal)
+
+
+@_appeal_handler
+def _bot_appeal_created(
+    _session: Session, appeal: Appeal, _payload: dict[str, Any]
+) -> None:
+    send_new_appeal_message(appeal)
+
+
+@_appeal_handler
+def _bot_appeal_updated(
+    _session: Session, appeal: Appeal, _payload: dict[str, Any]
+) -> None:
+    send_appeal_updated_message(appeal)
+
+
+class PartialDeliveryError(Exception):
+    """Письмо дошло не до всех получателей; failed - кому отправить снова"""
+
+    def __init__(self, failed: list[str], error: BaseException | None):
+        super().__init__(f"{len(failed)} recipient(s) failed: {error}")
+        self.failed = failed
+
+
+def _gather(futures: dict[str, Future[None]]) -> Future[None]:
+    """Общий Future отправки письма нескольким получателям"""
+    result: Future[None] = Future()
+    remaining = len(futures)
+    lock = threading.Lock()
+
+    def done(_future: Future[None]) -> None:
+        nonlocal remaining
+        with lock:
+            remaining -= 1
+            if remaining:
+                return
+        failed = [email for email, f in futures.items() if f.exception()]
+        if failed:
+            result.set_exception(
+                PartialDeliveryError(failed, futures[failed[0]].exception())
+            )
+        else:
+            result.set_result(None)
+
+    if not futures:
+        result.set_result(None)
+    for future in futures.values():
+        future.add_done_callback(done)
+    return result
+
+
+def _email_message(_session: Session, payload: dict[str, Any]) -> Future[None]:
+    """Готовое письмо (payload: to, subject, html) каждому получателю"""
+    return _gather(
+        {
+            email: submit_email(
+                email_to=email,
+                subject=payload["subject"],
+                html_content=payload["html"],
+            )
+            for email in payload["to"]
+        }
+    )
+
+
+def _sla_recipients(session: Session, appeal: Appeal) -> list[str]:
+    # Ответственный, а пока его нет - суперпользователи
+    if appeal.responsible_user_id:
+        responsible = session.get(User, appeal.responsible_user_id)
+        if responsible and responsible.is_active:
+            return [responsible.email]
+    return list(
+        session.exec(select(User.email).where(User.is_superuser, User.is_active))
+    )
+
+
+def _sla_handler(breached: bool) -> OutboxHandler:
+    @_appeal_handler
+    def handler(
+        session: Session, appeal: Appeal, payload: dict[str, Any]
+    ) -> Future[None] | None:
+        if not settings.emails_enabled:
+            return None
+        email = generate_appeal_sla_email(
+            appeal=appeal,
+            breached=breached,
+            deadline=datetime.fromisoformat(payload["deadline"]),
+        )
+        return _gather(
+            {
+                address: submit_email(
+                    email_to=address,
+                    subject=email.subject,
+                    html_content=email.html_content,
+                )
+                for address in _sla_recipients(session, appeal)
+            }
+        )
+
+    return handler
+
+
+# Обработчики по NotificationOutbox.kind
+OUTBOX_HANDLERS: dict[str, OutboxHandler] = {
+    "email.appeal_created": _email_appeal_created,
+    "email.appeal_status_changed": _email_appeal_status_changed,
+    "email.appeal_closed": _email_appeal_closed,
+    "bot.appeal_created": _bot_appeal_created,
+    "bot.appeal_updated": _bot_appeal_updated,
+    "email.message": _email_message,
+    "email.appeal_sla_warning": _sla_handler(breached=False),
+    "email.appeal_sla_breached": _sla_handler(breached=True),
+}
+
+
+def retry_delay(attempts: int) -> timedelta:
+    """Задержка перед следующей попыткой: экспоненциальная, с потолком"""
+    seconds = settings.OUTBOX_RETRY_BASE_SECONDS * 2 ** (attempts - 1)
+    return timedelta(seconds=min(seconds, settings.OUTBOX_RETRY_MAX_SECONDS))
+
+
+def _claim_statement(now: datetime, limit: int) -> Any:
+    # SKIP LOCKED: несколько диспетчеров берут разные порции, не дожидаясь
+    # друг друга
+    return (
+        select(NotificationOutbox)
+        .where(
+            NotificationOutbox.status == "pending",
+            NotificationOutbox.available_at <= now,
+        )
+        .order_by(col(NotificationOutbox.available_at))
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+
+
+def _mark_failed(notification: NotificationOutbox, error: Exception) -> None:
+    notification.attempts += 1
+    if isinstance(error, PartialDeliveryError):
+        # Повторяется отправка только тем, до кого письмо не дошло
+        notification.payload = {**notification.payload, "to": error.failed}
+    notification.last_error = f"{type(error).__name__}: {error}"
+    if notification.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+        notification.status = "failed"
+        logger.error(
+            "Notification %s (%s) failed: %s",
+            notification.id,
+            notification.kind,
+            notification.last_error,
+        )
+    else:
+        notification.available_at = datetime.utcnow() + retry_delay(
+            notification.attempts
+        )
+        logger.warning(
+            "Notification %s (%s) will be retried: %s",
+            notification.id,
+            notification.kind,
+            notification.last_error,
+        )
+
+
+def _run_handler(
+    session: Session, notification: NotificationOutbox
+) -> Future[None] | None:
+    handler = OUTBOX_HANDLERS.get(notification.kind)
+    if handler is None:
+        raise LookupError(f"No handler for notification {notification.kind}")
+    # Ошибка в обработчике откатывает только его собственные изменения
+    with session.begin_nested():
+        return handler(session, notification.payload)
+
+
+def dispatch_batch(*, session: Session, limit: int | None = None) -> int:
+    """
+    Отправляет одну порцию уведомлений, готовых к отправке
+
+    Сначала выполняются обработчики, затем ожидается отправка поставленных
+    ими в пул SMTP писем. Строки порции заблокированы до коммита. Если
+    процесс упадет посреди порции, транзакция откатится и уведомления будут
+    отправлены снова: доставка "хотя бы один раз", потерь нет.
+
+    Возвращает количество обработанных уведомлений.
+    """
+    notifications = session.exec(
+        _claim_statement(datetime.utcnow(), limit or settings.OUTBOX_BATCH_SIZE)
+    ).all()
+    sending: list[tuple[NotificationOutbox, Future[None]]] = []
+    for notification in notifications:
+        try:
+            future = _run_handler(session, notification)
+        except Exception as e:
+            _mark_failed(notification, e)
+            continue
+        if future is None:
+            session.delete(notification)
+        else:
+            sending.append((notification, future))
+    for notification, future in sending:
+        try:
+            future.result()
+        except Exception as e:
+            _mark_failed(notification, e)
+        else:
+            session.delete(notification)
+    session.commit()
+    return len(notifications)
+
+
+def run_dispatcher() -> None:
+    """Цикл диспетчера; пока очередь не пуста, порции идут без пауз"""
+    logger.info(
+        "Notification dispatcher started, %d email templates loaded",
+        get_email_templates().load_all(),
+    )
+    metrics_logged_at = time.monotonic()
+    try:
+        while True:
+            with Session(engine) as session:
+                processed = dispatch_batch(session=session)
+            if (
+                settings.emails_enabled
+                and time.monotonic() - metrics_logged_at > METRICS_LOG_INTERVAL_SECONDS
+            ):
+                logger.info("SMTP metrics: %s", get_mailer().metrics.snapshot())
+                metrics_logged_at = time.monotonic()
+            if processed < settings.OUTBOX_BATCH_SIZE:
+                time.sleep(settings.OUTBOX_POLL_INTERVAL_SECONDS)
+    finally:
+        if settings.emails_enabled:
+            get_mailer().close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    run_dispatcher()
@@ -0,0 +1,155 @@
+import hashlib
+import logging
+import os
+import tempfile
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any
+
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.core.db import engine
+from app.core.workers import get_process_pool
+from app.models.report import ReportJobCreate, ReportJobPublic
+from app.utils.reports import report_data_version, write_organization_report
+
+logger = logging.getLogger(__name__)
+
+# Папка внутри UPLOAD_DIR, в которой лежат задачи и готовые отчеты
+REPORTS_FOLDER = "reports"
+JOB_FILENAME = "job.json"
+
+
+def report_job_id(job_in: ReportJobCreate, data_version: str) -> str:
+    """
+    Идентификатор задачи - хэш параметров отчета и версии данных
+
+    Одинаковый запрос по неизменившимся данным получает тот же
+    идентификатор и, значит, уже готовый файл.
+    """
+    key = "|".join(
+        (
+            str(job_in.organization_id),
+            job_in.date_from.isoformat(),
+            job_in.date_to.isoformat(),
+            job_in.format,
+            data_version,
+        )
+    )
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def _job_dir(job_id: str) -> Path:
+    return Path(settings.UPLOAD_DIR) / REPORTS_FOLDER / job_id
+
+
+def report_artifact_path(job: ReportJobPublic) -> Path:
+    """Путь к файлу отчета задачи"""
+    return _job_dir(job.id) / f"report.{job.format}"
+
+
+def _write_atomic(path: Path, write: Any) -> None:
+    # Пишем во временный файл рядом и переименовываем: читатели видят либо
+    # старую версию файла, либо новую, но не недописанную
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as file:
+            write(file)
+        os.replace(tmp_name, path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+
+
+def read_report_job(job_id: str) -> ReportJobPublic | None:
+    """Состояние задачи с диска; None, если задачи нет"""
+    try:
+        data = (_job_dir(job_id) / JOB_FILENAME).read_bytes()
+    except FileNotFoundError:
+        return None
+    return ReportJobPublic.model_validate_json(data)
+
+
+def _save_job(job: ReportJobPublic, **changes: Any) -> ReportJobPublic:
+    job = job.model_copy(update={**changes, "updated_at": datetime.now(timezone.utc)})
+    _write_atomic(
+        _job_dir(job.id) / JOB_FILENAME,
+        lambda file: file.write(job.model_dump_json().encode()),
+    )
+    return job
+
+
+def _is_reusable(job: ReportJobPublic) -> bool:
+    if job.status == "done":
+        return report_artifact_path(job).exists()
+    if job.status == "failed":
+        return False
+    # Задача в очереди или в работе, если процесс пула не умер вместе с ней
+    timeout = timedelta(seconds=settings.REPORT_JOB_TIMEOUT_SECONDS)
+    return datetime.now(timezone.utc) - job.updated_at < timeout
+
+
+def build_report_artifact(*, session: Session, job: ReportJobPublic) -> ReportJobPublic:
+    """Генерирует файл отчета задачи и сохраняет итоговое состояние задачи"""
+    job = _save_job(job, status="running", error=None)
+    path = report_artifact_path(job)
+    try:
+        _write_atomic(
+            path,
+            lambda file: write_organization_report(
+                session=session,
+                organization_id=job.organization_id,
+                date_from=job.date_from,
+                date_to=job.date_to,
+                target=file,
+                format=job.format,
+            ),
+        )
+    except Exception as e:
+        logger.exception("Report job %s failed", job.id)
+        return _save_job(job, status="failed", error=str(e))
+    return _save_job(job, status="done", size=path.stat().st_size)
+
+
+def run_report_job(job_id: str) -> None:
+    """Точка входа процесса пула: генерация отчета с собственной сессией"""
+    job = read_report_job(job_id)
+    if job is None or job.status == "done":
+        return
+    with Session(engine) as session:
+        build_report_artifact(session=session, job=job)
+
+
+def submit_report_job(*, session: Session, job_in: ReportJobCreate) -> ReportJobPublic:
+    """
+    Ставит генерацию отчета в пул процессов
+
+    Если отчет с теми же параметрами по тем же данным уже готов или
+    генерируется, возвращает существующую задачу без новой генерации.
+    """
+    data_version = report_data_version(
+        session=session,
+        organization_id=job_in.organization_id,
+        date_from=job_in.date_from,
+        date_to=job_in.date_to,
+    )
+    job_id = report_job_id(job_in, data_version)
+    job = read_report_job(job_id)
+    if job is not None and _is_reusable(job):
+        return job
+
+    now = datetime.now(timezone.utc)
+    job = _save_job(
+        ReportJobPublic(
+            **job_in.model_dump(),
+            id=job_id,
+            status="queued",
+            data_version=data_version,
+            created_at=now,
+            updated_at=now,
+        )
+    )
+    get_process_pool().submit(run_report_job, job_id)
+    return job
@@ -1,108 +1,331 @@
+import csv
 import io
-from datetime import date, datetime
+import tempfile
+from collections.abc import Iterator
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from itertools import chain, islice
+from typing import Any, BinaryIO
 from uuid import UUID
 
-import pandas as pd
-from sqlmodel import Session, select
+import pyarrow as pa  # type: ignore[import-untyped]
+import pyarrow.parquet as pq  # type: ignore[import-untyped]
+import xlsxwriter  # type: ignore[import-untyped]
+from sqlalchemy import Text, cast, func, literal
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.orm import aliased
+from sqlmodel import Session, col, select
 
+from app.core.db import engine
 from app.models.appeal import Appeal
+from app.models.appeal_status import AppealStatus
+from app.models.organization import Organization
+from app.models.project import Project
+from app.models.report import ReportFormat
 from app.models.representative import Representative
+from app.models.user import User
 
+# Сколько строк забирать с серверного курсора за один раз
+REPORT_CHUNK_SIZE = 1000
+# По скольким первым строкам оценивается ширина колонок
+REPORT_WIDTH_SAMPLE = 200
+REPORT_MAX_COLUMN_WIDTH = 80
+REPORT_DATETIME_FORMAT = "yyyy-mm-dd hh:mm"
 
-def get_date_display(dt: datetime | None) -> str:
-    if not dt or not isinstance(dt, datetime):
-        return "-"
-    return dt.strftime("%Y-%m-%d %H:%M")
+# Строк в одной группе parquet-файла: крупные группы лучше сжимаются и
+# быстрее читаются колоночными движками
+PARQUET_ROW_GROUP_SIZE = 64 * 1024
 
+REPORT_MEDIA_TYPES: dict[ReportFormat, str] = {
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "csv": "text/csv; charset=utf-8",
+    "parquet": "application/vnd.apache.parquet",
+}
 
-def get_list_data(appeals: list[Appeal]) -> list:
-    """Функция для получения списка данных по заявкам для формирования dataframe"""
-    list_data = []
+_Responsible = aliased(User, name="responsible")
 
-    for appeal in appeals:
-        # Получаем список ответственных пользователей
-        responsible_users = {
-            specialist.user.get_full_name() for specialist in appeal.specialists
-        }
-        responsible = ", ".join(responsible_users)
 
-        # Получаем полное имя представителя
-        person_fullname = f"{appeal.user.last_name} {appeal.user.first_name}"
-        if appeal.user.middle_name:
-            person_fullname += f" {appeal.user.middle_name}"
+@dataclass(frozen=True)
+class ReportColumn:
+    """Колонка отчета: заголовок и SQL-выражение, из которого берется значение"""
 
-        row_data = [
-            str(appeal.id),  # Используем ID вместо номера
-            appeal.user.representative.organization.name,
-            person_fullname,
-            appeal.priority.name if appeal.priority else "-",
-            appeal.project.name if appeal.project else "-",
-            appeal.description,
-            get_date_display(appeal.created_at),
-            responsible,
-            get_date_display(appeal.actual_date),
-            appeal.status.name if appeal.status else "-",
-            appeal.solution or "-",
-        ]
-        list_data.append(row_data)
+    title: str
+    # Атрибут модели или SQL-выражение
+    expression: Any
+    kind: str = "str"  # str | datetime
 
-    return list_data
 
+REPORT_COLUMNS: tuple[ReportColumn, ...] = (
+    ReportColumn("ID номер", Appeal.id),
+    ReportColumn("Заказчик", Organization.name),
+    ReportColumn(
+        "Данные заказчика",
+        func.trim(Appeal.surname + " " + Appeal.name + " " + Appeal.patronymic),
+    ),
+    ReportColumn("Уровни приоритета", Appeal.priority),
+    ReportColumn("Продукт", Project.name),
+    ReportColumn("Описание обращения", Appeal.description),
+    ReportColumn("Дата создания", Appeal.dt, kind="datetime"),
+    ReportColumn(
+        "Ответственные", func.coalesce(_Responsible.full_name, _Responsible.email)
+    ),
+    ReportColumn("Дата решения", Appeal.actual_date, kind="datetime"),
+    ReportColumn(
+        "Статус выполнения", func.coalesce(AppealStatus.name_rus, AppealStatus.name)
+    ),
+    ReportColumn("Решение", Appeal.solving),
+)
 
-def generate_organization_report(
+
+def _arrow_type(column: ReportColumn) -> pa.DataType:
+    return pa.timestamp("us") if column.kind == "datetime" else pa.string()
+
+
+REPORT_ARROW_SCHEMA = pa.schema(
+    [pa.field(column.title, _arrow_type(column)) for column in REPORT_COLUMNS]
+)
+
+
+def report_statement(*, organization_id: UUID, date_from: date, date_to: date) -> Any:
+    """Плоский запрос строк отчета: одна строка результата на обращение"""
+    return (
+        select(
+            *(
+                column.expression.label(f"c{idx}")
+                for idx, column in enumerate(REPORT_COLUMNS)
+            )
+        )
+        .select_from(Appeal)
+        .join(Representative, col(Representative.user_id) == Appeal.user_id)
+        .join(Organization, col(Organization.id) == Representative.organization_id)
+        .join(AppealStatus, col(AppealStatus.id) == Appeal.status_id)
+        .outerjoin(Project, col(Project.id) == Appeal.project_id)
+        .outerjoin(_Responsible, col(_Responsible.id) == Appeal.responsible_user_id)
+        .where(
+            Representative.organization_id == organization_id,
+            Appeal.dt >= datetime.combine(date_from, time.min),
+            Appeal.dt < datetime.combine(date_to + timedelta(days=1), time.min),
+        )
+        .order_by(col(Appeal.dt), col(Appeal.id))
+    )
+
+
+def iter_report_rows(
+    *, session: Session, organization_id: UUID, date_from: date, date_to: date
+) -> Iterator[tuple[Any, ...]]:
+    """
+    Строки отчета с серверного курсора порциями по REPORT_CHUNK_SIZE,
+    без загрузки всего периода в память
+    """
+    statement = report_statement(
+        organization_id=organization_id, date_from=date_from, date_to=date_to
+    ).execution_options(stream_results=True, yield_per=REPORT_CHUNK_SIZE)
+    for row in session.exec(statement):
+        yield tuple(row)
+
+
+def _cell_width(value: Any) -> int:
+    if value is None:
+        return 1
+    if isinstance(value, datetime):
+        return len(REPORT_DATETIME_FORMAT)
+    return max((len(line) for line in str(value).splitlines()), default=0)
+
+
+def write_xlsx(rows: Iterator[tuple[Any, ...]], target: BinaryIO) -> None:
+    """
+    Пишет строки в xlsx в режиме constant_memory: каждая строка сбрасывается
+    на диск сразу после записи, поэтому память не зависит от размера отчета
+    """
+    workbook = xlsxwriter.Workbook(
+        target, {"constant_memory": True, "tmpdir": tempfile.gettempdir()}
+    )
+    worksheet = workbook.add_worksheet("Report")
+    header_format = workbook.add_format({"bold": True, "border": 1})
+    datetime_format = workbook.add_format({"num_format": REPORT_DATETIME_FORMAT})
+
+    # Ширину колонок оцениваем по первым строкам, а не по всему отчету
+    sample = list(islice(rows, REPORT_WIDTH_SAMPLE))
+    for idx, column in enumerate(REPORT_COLUMNS):
+        width = max([len(column.title), *(_cell_width(row[idx]) for row in sample)])
+        worksheet.set_column(idx, idx, min(width, REPORT_MAX_COLUMN_WIDTH) + 2)
+
+    for idx, column in enumerate(REPORT_COLUMNS):
+        worksheet.write_string(0, idx, column.title, header_format)
+
+    for row_idx, row in enumerate(chain(sample, rows), start=1):
+        for idx, column in enumerate(REPORT_COLUMNS):
+            value = row[idx]
+            if value is None:
+                worksheet.write_string(row_idx, idx, "-")
+            elif column.kind == "datetime":
+                worksheet.write_datetime(row_idx, idx, value, datetime_format)
+            else:
+                worksheet.write_string(row_idx, idx, str(value))
+
+    workbook.close()
+
+
+def _csv_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat(sep=" ")
+    return "" if value is None else value
+
+
+def iter_csv(rows: Iterator[tuple[Any, ...]]) -> Iterator[bytes]:
+    """
+    CSV по мере чтения строк: наружу отдаются порции по REPORT_CHUNK_SIZE
+    строк, весь отчет в памяти не собирается
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(column.title for column in REPORT_COLUMNS)
+    for count, row in enumerate(rows, start=1):
+        writer.writerow(_csv_value(value) for value in row)
+        if count % REPORT_CHUNK_SIZE == 0:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode()
+
+
+def write_csv(rows: Iterator[tuple[Any, ...]], target: BinaryIO) -> None:
+    for chunk in iter_csv(rows):
+        target.write(chunk)
+
+
+def _arrow_value(column: ReportColumn, value: Any) -> Any:
+    if value is None or column.kind == "datetime":
+        return value
+    return str(value)
+
+
+def write_parquet(rows: Iterator[tuple[Any, ...]], target: BinaryIO) -> None:
+    """
+    Пишет строки в parquet группами по PARQUET_ROW_GROUP_SIZE: в памяти
+    одновременно только одна группа, уже разложенная по колонкам
+    """
+    with pq.ParquetWriter(target, REPORT_ARROW_SCHEMA, compression="zstd") as writer:
+        while batch := list(islice(rows, PARQUET_ROW_GROUP_SIZE)):
+            arrays = [
+                pa.array(
+                    [_arrow_value(column, row[idx]) for row in batch],
+                    type=REPORT_ARROW_SCHEMA.field(idx).type,
+                )
+                for idx, column in enumerate(REPORT_COLUMNS)
+            ]
+            writer.write_table(
+                pa.Table.from_arrays(arrays, schema=REPORT_ARROW_SCHEMA),
+                row_group_size=PARQUET_ROW_GROUP_SIZE,
+            )
+
+
+REPORT_WRITERS = {
+    "xlsx": write_xlsx,
+    "csv": write_csv,
+    "parquet": write_parquet,
+}
+
+
+def write_organization_report(
     *,
     session: Session,
     organization_id: UUID,
     date_from: date,
     date_to: date,
-) -> str:
-    """Генерация отчета по обращениям организации за период"""
-    # Создаем временный файл
-    file = io.BytesIO()
-
-    # Получаем пользователей организации через представителей
-    representatives = session.exec(
-        select(Representative).where(Representative.organization_id == organization_id)
-    ).all()
-    user_ids = [rep.user_id for rep in representatives]
-
-    # Получаем обращения
-    appeals = session.exec(
-        select(Appeal)
-        .where(
-            Appeal.user_id.in_(user_ids),
-            Appeal.created_at >= datetime.combine(date_from, datetime.min.time()),
-            Appeal.created_at <= datetime.combine(date_to, datetime.max.time()),
-        )
-        .order_by(Appeal.created_at)
-    ).all()
-
-    # Формируем DataFrame
-    report_data = pd.DataFrame(
-        get_list_data(appeals),
-        columns=[
-            "ID номер",
-            "Заказчик",
-            "Данные заказчика",
-            "Уровни приоритета",
-            "Продукт",
-            "Описание обращения",
-            "Дата создания",
-            "Ответственные",
-            "Дата решения",
-            "Статус выполнения",
-            "Решение",
-        ],
+    target: BinaryIO,
+    format: ReportFormat = "xlsx",
+) -> None:
+    """Пишет отчет по обращениям организации за период в target"""
+    rows = iter_report_rows(
+        session=session,
+        organization_id=organization_id,
+        date_from=date_from,
+        date_to=date_to,
     )
+    REPORT_WRITERS[format](rows, target)
 
-    # Записываем в Excel
-    with pd.ExcelWriter(file) as writer:
-        report_data.to_excel(writer, sheet_name="Report", index=False)
-        # Автоподбор ширины колонок
-        worksheet = writer.sheets["Report"]
-        for idx, col in enumerate(report_data.columns):
-            max_length = max(report_data[col].astype(str).apply(len).max(), len(col))
-            worksheet.set_column(idx, idx, max_length + 2)
 
+def generate_organization_report(
+    *,
+    session: Session,
+    organization_id: UUID,
+    date_from: date,
+    date_to: date,
+    format: ReportFormat = "xlsx",
+) -> BinaryIO:
+    """
+    Генерация отчета по обращениям организации за период
+
+    Возвращает временный файл, открытый на чтение с начала; файл удаляется
+    при закрытии.
+    """
+    file = tempfile.TemporaryFile()
+    write_organization_report(
+        session=session,
+        organization_id=organization_id,
+        date_from=date_from,
+        date_to=date_to,
+        target=file,
+        format=format,
+    )
     file.seek(0)
     return file
+
+
+def report_data_version(
+    *, session: Session, organization_id: UUID, date_from: date, date_to: date
+) -> str:
+    """
+    Версия данных отчета: хэш всех его строк
+
+    Хэш считается одним агрегатом на стороне БД, без передачи строк в
+    приложение. Любое изменение обращения, попадающее в отчет, меняет версию.
+    """
+    statement = report_statement(
+        organization_id=organization_id, date_from=date_from, date_to=date_to
+    )
+    rows = statement.order_by(None).subquery()
+    # JSON-массив различает NULL и пустую строку, в отличие от concat_ws
+    serialized = cast(func.json_build_array(*rows.c), Text)
+    version = session.exec(
+        select(
+            func.count(),
+            func.md5(
+                func.string_agg(
+                    serialized,
+                    aggregate_order_by(  # type: ignore[no-untyped-call]
+                        literal("\n"), rows.c.c0
+                    ),
+                )
+            ),
+        ).select_from(rows)
+    ).one()
+    return f"{version[0]}-{version[1] or 'empty'}"
+
+
+def stream_organization_report_csv(
+    *, organization_id: UUID, date_from: date, date_to: date
+) -> Iterator[bytes]:
+    """
+    CSV-отчет прямо с курсора БД в тело ответа
+
+    Сессия своя: сессия запроса закрывается раньше, чем отправляется тело
+    потокового ответа.
+    """
+    with Session(engine) as session:
+        yield from iter_csv(
+            iter_report_rows(
+                session=session,
+                organization_id=organization_id,
+                date_from=date_from,
+                date_to=date_to,
+            )
+        )
+
+
+def iter_file(file: BinaryIO, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+    """Отдает файл порциями и закрывает его после отправки"""
+    with file:
+        while chunk := file.read(chunk_size):
+            yield chunk